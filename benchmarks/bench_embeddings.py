@@ -0,0 +1,139 @@
+"""
+Бенчмарк бэкендов эмбеддингов.
+
+Для каждого бэкенда (torch, torch-int8, onnx, onnx-int8) на корпусе контролей
+из Template.xml измеряет:
+- время загрузки модели;
+- пропускную способность векторизации корпуса (текстов в секунду);
+- задержку векторизации одного запроса (p50/p95);
+- recall@10 поиска относительно базового бэкенда torch fp32: доля первых 10
+  результатов базового бэкенда, найденных в первых 10 результатах бэкенда.
+
+Запросы - наименования случайных контролей корпуса.
+
+Запуск из корневой директории проекта:
+    python benchmarks/bench_embeddings.py --corpus 2000 --queries 200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.parser.controls_cache import load_controls_cached
+from src.vector_db.backends import BACKENDS, DEFAULT_BACKEND
+from src.vector_db.embeddings import EmbeddingGenerator
+
+TOP_K = 10
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(corpus: np.ndarray, queries: np.ndarray, k: int = TOP_K) -> np.ndarray:
+    """Индексы k ближайших по косинусу текстов корпуса для каждого запроса."""
+    scores = _normalize(queries) @ _normalize(corpus).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def _measure_backend(model_name: str, backend: str, corpus, queries, batch_size: int):
+    """Возвращает метрики бэкенда и векторы корпуса и запросов."""
+    generator = EmbeddingGenerator(model_name, cache_dir=None, backend=backend)
+    
+    start = time.perf_counter()
+    generator.load_model()
+    load_time = time.perf_counter() - start
+    
+    # Прогрев (первый вызов инициализирует сессию/потоки)
+    generator.generate_embedding(queries[0])
+    
+    start = time.perf_counter()
+    corpus_vectors = np.asarray(generator.generate_embeddings_batch(corpus, batch_size), dtype=np.float32)
+    throughput = len(corpus) / (time.perf_counter() - start)
+    
+    latencies = []
+    query_vectors = []
+    for query in queries:
+        start = time.perf_counter()
+        query_vectors.append(generator.generate_embedding(query))
+        latencies.append(time.perf_counter() - start)
+    
+    metrics = {
+        'load_s': load_time,
+        'throughput': throughput,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'p95_ms': float(np.percentile(latencies, 95)) * 1000,
+    }
+    return metrics, corpus_vectors, np.asarray(query_vectors, dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк бэкендов эмбеддингов')
+    parser.add_argument('--xml', default=str(project_root / 'Template.xml'), help='Путь к файлу Template.xml')
+    parser.add_argument('--model', default='paraphrase-multilingual-MiniLM-L12-v2', help='Модель эмбеддингов')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help='Бэкенды через запятую')
+    parser.add_argument('--corpus', type=int, default=2000, help='Количество контролей в корпусе (0 - все)')
+    parser.add_argument('--queries', type=int, default=200, help='Количество запросов')
+    parser.add_argument('--batch-size', type=int, default=32, help='Размер батча')
+    args = parser.parse_args()
+    
+    controls = load_controls_cached(args.xml)
+    if args.corpus:
+        controls = controls[:args.corpus]
+    corpus = [control.get_text_for_embedding() or " " for control in controls]
+    rng = random.Random(0)
+    queries = [control.name or control.identifier or " " for control in rng.sample(controls, min(args.queries, len(controls)))]
+    print(f"[INFO] Корпус: {len(corpus)} текстов, запросов: {len(queries)}, модель: {args.model}")
+    
+    backends = [name.strip() for name in args.backends.split(',') if name.strip()]
+    if DEFAULT_BACKEND not in backends:
+        # Базовый бэкенд нужен для recall@10
+        backends.insert(0, DEFAULT_BACKEND)
+    
+    results = {}
+    baseline_top = None
+    for backend in backends:
+        print(f"[INFO] Бэкенд {backend}...")
+        try:
+            metrics, corpus_vectors, query_vectors = _measure_backend(
+                args.model, backend, corpus, queries, args.batch_size
+            )
+        except Exception as e:
+            print(f"   [SKIP] {type(e).__name__}: {e}")
+            continue
+        top = _top_k(corpus_vectors, query_vectors, min(TOP_K, len(corpus)))
+        if backend == DEFAULT_BACKEND:
+            baseline_top = top
+        if baseline_top is not None:
+            metrics['recall'] = float(np.mean([
+                len(set(a) & set(b)) / len(a) for a, b in zip(baseline_top.tolist(), top.tolist())
+            ]))
+        results[backend] = metrics
+    
+    if not results:
+        print("[ERROR] Ни один бэкенд не загрузился")
+        return
+    
+    base = results.get(DEFAULT_BACKEND)
+    print()
+    print(f"   {'Бэкенд':<12} {'загрузка, с':>12} {'текстов/с':>10} {'p50, мс':>9} {'p95, мс':>9} "
+          f"{'recall@10':>10} {'ускорение':>10}")
+    for backend, m in results.items():
+        speedup = f"x{base['p50_ms'] / m['p50_ms']:.2f}" if base else '-'
+        recall = f"{m['recall']:.3f}" if 'recall' in m else '-'
+        print(f"   {backend:<12} {m['load_s']:12.2f} {m['throughput']:10.1f} {m['p50_ms']:9.2f} {m['p95_ms']:9.2f} "
+              f"{recall:>10} {speedup:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк памяти каталога контролей.
+
+Генерирует синтетический макет и сообщает, сколько байт приходится
+на один контроль в разных представлениях:
+- dataclass без __slots__ и без интернирования значений (прежняя модель);
+- Control со __slots__ и интернированными категориальными значениями;
+- колоночная таблица ControlTable (загрузка из бинарного кэша).
+
+Запуск из корневой директории проекта:
+    python benchmarks/bench_memory.py --rows 100000
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.bench_parser import generate_template
+from src.models.control import Control
+from src.parser.controls_cache import SourceKey, load_control_table_cache, save_controls_cache
+from src.parser.xml_parser import parse_template_xml
+
+
+# Прежняя модель: обычный dataclass с __dict__ у каждого экземпляра
+LegacyControl = make_dataclass('LegacyControl', [(f.name, str, f.default) for f in fields(Control)])
+
+
+def _copy_string(value: str) -> str:
+    """Создает отдельный объект строки (как без интернирования при разборе)."""
+    return (value + ' ')[:-1]
+
+
+def _measure(build) -> int:
+    """Возвращает объем памяти (байт), удерживаемой результатом build()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк памяти каталога контролей')
+    parser.add_argument('--rows', type=int, default=100_000, help='Количество строк в синтетическом макете')
+    parser.add_argument('--xml', help='Использовать существующий файл вместо синтетического')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.xml:
+            xml_path = Path(args.xml)
+        else:
+            xml_path = Path(tmp) / 'Template.xml'
+            print(f"[INFO] Генерация синтетического макета на {args.rows} строк...")
+            generate_template(xml_path, args.rows)
+        
+        print("[INFO] Разбор макета...")
+        controls = []
+        slotted = _measure(lambda: controls.extend(parse_template_xml(str(xml_path))))
+        count = len(controls)
+        names = [f.name for f in fields(Control)]
+        
+        # Прежний разбор: новый объект строки на каждое значение и __dict__ у экземпляра
+        legacy = _measure(lambda: [
+            LegacyControl(**{name: _copy_string(getattr(c, name)) for name in names}) for c in controls
+        ])
+        
+        cache_path = Path(tmp) / 'controls.cache'
+        save_controls_cache(cache_path, SourceKey(0, 0, bytes(32)), controls)
+        table = _measure(lambda: load_control_table_cache(cache_path))
+    
+    print(f"[OK] Контролей: {count}")
+    print(f"   {'Представление':<48} {'байт/контроль':>14}")
+    print(f"   {'dataclass без __slots__, без интернирования':<48} {legacy / count:14.0f}")
+    print(f"   {'Control (__slots__ + интернирование)':<48} {slotted / count:14.0f}  (x{legacy / slotted:.2f})")
+    print(f"   {'ControlTable (категориальные колонки)':<48} {table / count:14.0f}  (x{legacy / table:.2f})")
+
+
+if __name__ == "__main__":
+    main()
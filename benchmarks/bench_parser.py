@@ -0,0 +1,242 @@
+"""
+Микробенчмарк парсера Template.xml.
+
+Генерирует синтетический макет (по умолчанию 100 000 строк) и сравнивает
+стоимость разбора строки до и после компиляции плана заголовков:
+- "до": цепочка if/elif по имени заголовка и поиск item/content
+  во всех трех namespace для каждой ячейки;
+- "после": скомпилированный план (iter_template_xml).
+
+Запуск из корневой директории проекта:
+    python benchmarks/bench_parser.py --rows 100000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.control import Control
+from src.parser.xml_parser import (
+    HEADER_TO_FIELD, ROWS_ITEM_TAGS, _parse_row, compile_row_plan, extract_text_from_cell, iter_template_xml,
+)
+
+
+HEADERS = list(HEADER_TO_FIELD)
+
+
+def _cell(text: str) -> str:
+    """Формирует ячейку в формате табличного документа 1С."""
+    if not text:
+        return '<c><c><f>0</f></c></c>'
+    return ('<c><c><f>0</f><tl><v8:item><v8:lang>ru</v8:lang>'
+            f'<v8:content>{text}</v8:content></v8:item></tl></c></c>')
+
+
+def generate_template(path: Path, rows: int) -> None:
+    """
+    Генерирует синтетический Template.xml.
+    
+    Args:
+        path: Путь к создаваемому файлу
+        rows: Количество строк с контролями
+    """
+    flags = ('да', 'нет')
+    taxonomies = ('ФР', 'НФО', 'БФО')
+    markets = ('Страхование', 'Банки', 'ПУРЦБ')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<document xmlns="http://v8.1c.ru/8.2/data/spreadsheet" '
+                'xmlns:v8="http://v8.1c.ru/8.1/data/core">\n')
+        f.write('<rowsItem><index>0</index><row>'
+                + ''.join(_cell(h) for h in HEADERS) + '</row></rowsItem>\n')
+        for i in range(1, rows + 1):
+            values = [
+                f'http://www.cbr.ru/xbrl/{i % 50}.xsd', f'ID_{i}', f'Контроль {i}',
+                f'Если Показатель{i} &lt;&gt; 0 Тогда', '', flags[i % 2],
+                f'Описание контроля {i}', flags[i % 3 == 0], flags[i % 5 == 0],
+                f'T{i % 30}', '', f'Проверка ЦБ {i}', '', '',
+                taxonomies[i % 3], markets[i % 3],
+            ]
+            f.write(f'<rowsItem><index>{i}</index><row>'
+                    + ''.join(_cell(v) for v in values) + '</row></rowsItem>\n')
+        f.write('</document>\n')
+
+
+def _legacy_parse_row(row, column_mapping: dict):
+    """Разбор строки в прежнем виде: if/elif по заголовку на каждую ячейку."""
+    row_element = row.find('{http://v8.1c.ru/8.2/data/spreadsheet}row')
+    if row_element is None:
+        row_element = row.find('row')
+    if row_element is None:
+        return None
+    cells = row_element.findall('{http://v8.1c.ru/8.2/data/spreadsheet}c')
+    if not cells:
+        cells = row_element.findall('c')
+    control_data = {}
+    for idx, cell in enumerate(cells):
+        if idx in column_mapping:
+            header_name = column_mapping[idx]
+            text = extract_text_from_cell(cell)
+            if header_name == 'Uri':
+                control_data['uri'] = text
+            elif header_name == 'Идентификатор':
+                control_data['identifier'] = text
+            elif header_name == 'Наименование':
+                control_data['name'] = text
+            elif header_name == 'Алгоритм':
+                control_data['algorithm'] = text
+            elif header_name == 'Сверочный Uri':
+                control_data['verification_uri'] = text
+            elif header_name == 'ДоступноИсправление':
+                control_data['correction_available'] = text
+            elif header_name == 'Описание':
+                control_data['description'] = text
+            elif header_name == 'Обязательный':
+                control_data['required'] = text
+            elif header_name == 'Утверждение':
+                control_data['approval'] = text
+            elif header_name == 'КодТаблицы':
+                control_data['table_code'] = text
+            elif header_name == 'НаОснованииТребованияЦБ':
+                control_data['based_on_cbr_requirement'] = text
+            elif header_name == 'ОписаниеПроверкиПоДаннымЦБ':
+                control_data['cbr_check_description'] = text
+            elif header_name == 'Комменатрий':
+                control_data['comment'] = text
+            elif header_name == 'КодУтвержденияЦБ':
+                control_data['cbr_approval_code'] = text
+            elif header_name == 'Таксомномия':
+                control_data['taxonomy'] = text
+            elif header_name == 'Рынок':
+                control_data['market'] = text
+    if control_data.get('identifier') or control_data.get('name'):
+        return Control(**control_data)
+    return None
+
+
+def _legacy_iter(xml_path: Path):
+    """Потоковый проход с прежним разбором строк (для сравнения)."""
+    column_mapping = None
+    stack = []
+    for event, elem in ET.iterparse(str(xml_path), events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag not in ROWS_ITEM_TAGS:
+            continue
+        if column_mapping is None:
+            row_element = elem.find('{http://v8.1c.ru/8.2/data/spreadsheet}row')
+            cells = row_element.findall('{http://v8.1c.ru/8.2/data/spreadsheet}c')
+            column_mapping = {idx: extract_text_from_cell(c) for idx, c in enumerate(cells)}
+        else:
+            control = _legacy_parse_row(elem, column_mapping)
+            if control is not None:
+                yield control
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+
+def _measure(iterator_factory, repeat: int):
+    """Выполняет несколько полных проходов и возвращает (лучшее время, количество элементов)."""
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in iterator_factory())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def _measure_row_cost(xml_path: Path, batch_size: int = 1000):
+    """
+    Измеряет чистую стоимость разбора строки до и после на одних и тех же элементах.
+    
+    Строки читаются потоково пачками по batch_size, каждая пачка разбирается
+    обоими способами, время суммируется.
+    
+    Returns:
+        Кортеж (секунды "до", секунды "после", количество строк)
+    """
+    column_mapping = None
+    plan = None
+    batch = []
+    legacy_total = 0.0
+    compiled_total = 0.0
+    rows = 0
+    
+    def flush():
+        nonlocal legacy_total, compiled_total, rows
+        start = time.perf_counter()
+        for row in batch:
+            _legacy_parse_row(row, column_mapping)
+        legacy_total += time.perf_counter() - start
+        start = time.perf_counter()
+        for row in batch:
+            _parse_row(row, plan)
+        compiled_total += time.perf_counter() - start
+        rows += len(batch)
+        batch.clear()
+    
+    stack = []
+    for event, elem in ET.iterparse(str(xml_path), events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag not in ROWS_ITEM_TAGS:
+            continue
+        if stack:
+            stack[-1].remove(elem)
+        if plan is None:
+            row_element = elem.find('{http://v8.1c.ru/8.2/data/spreadsheet}row')
+            cells = row_element.findall('{http://v8.1c.ru/8.2/data/spreadsheet}c')
+            column_mapping = {idx: extract_text_from_cell(c) for idx, c in enumerate(cells)}
+            plan = compile_row_plan(elem)
+            continue
+        batch.append(elem)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return legacy_total, compiled_total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Микробенчмарк парсера Template.xml')
+    parser.add_argument('--rows', type=int, default=100_000, help='Количество строк в синтетическом макете')
+    parser.add_argument('--repeat', type=int, default=3, help='Количество повторов (берется лучшее время)')
+    parser.add_argument('--xml', help='Использовать существующий файл вместо синтетического')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.xml:
+            xml_path = Path(args.xml)
+        else:
+            xml_path = Path(tmp) / 'Template.xml'
+            print(f"[INFO] Генерация синтетического макета на {args.rows} строк...")
+            generate_template(xml_path, args.rows)
+        print(f"[INFO] Размер файла: {xml_path.stat().st_size / 1024 / 1024:.1f} МБ")
+        
+        legacy, compiled, rows = _measure_row_cost(xml_path)
+        print("[INFO] Разбор строки (без чтения XML):")
+        print(f"   до     {legacy / rows * 1e6:8.1f} мкс/строка")
+        print(f"   после  {compiled / rows * 1e6:8.1f} мкс/строка  (x{legacy / compiled:.1f})")
+        
+        print("[INFO] Полный проход по файлу:")
+        before, count = _measure(lambda: _legacy_iter(xml_path), args.repeat)
+        print(f"   до     {before:8.2f} с  {before / count * 1e6:8.1f} мкс/строка")
+        after, count = _measure(lambda: iter_template_xml(str(xml_path)), args.repeat)
+        print(f"   после  {after:8.2f} с  {after / count * 1e6:8.1f} мкс/строка  (x{before / after:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 """
 Скрипт для создания векторной БД на основе макета Template.xml.
 Запускайте этот скрипт из корневой директории проекта.
+
+С флагом --incremental существующая коллекция не пересоздается:
+векторизуются только новые и изменившиеся контроли.
+
+--workers N векторизует тексты в N процессах (у каждого своя копия модели),
+записывая готовые порции в БД параллельно с векторизацией остальных.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -12,10 +19,21 @@ sys.path.insert(0, str(project_root))
 
 from src.parser.xml_parser import load_controls
 from src.vector_db.chroma_manager import ChromaDBManager
+from src.vector_db.backends import BACKENDS, DEFAULT_BACKEND
+from src.vector_db.parallel import default_workers
 
 
-def create_vector_database():
-    """Создает векторную БД из Template.xml"""
+def create_vector_database(incremental: bool = False, workers: int = 1, batch_size: int = 32,
+                           backend: str = DEFAULT_BACKEND):
+    """
+    Создает векторную БД из Template.xml.
+    
+    Args:
+        incremental: Синхронизировать существующую коллекцию вместо пересоздания
+        workers: Количество процессов векторизации
+        batch_size: Размер батча модели эмбеддингов
+        backend: Бэкенд вычисления эмбеддингов (torch, torch-int8, onnx, onnx-int8)
+    """
     
     # Путь к XML файлу
     xml_path = project_root / "Template.xml"
@@ -44,13 +62,16 @@ def create_vector_database():
     print(f"\n[INFO] Создание векторной БД...")
     print(f"   Путь к БД: {db_path}")
     print(f"   Коллекция: {collection_name}")
-    print(f"   Модель: {model_name}")
+    print(f"   Модель: {model_name} ({backend})")
+    print(f"   Режим: {'инкрементальный' if incremental else 'полное пересоздание'}")
+    print(f"   Процессов векторизации: {workers}, размер батча: {batch_size}")
     print()
     
     try:
         # Инициализируем менеджер
         db_manager = ChromaDBManager(db_path=db_path, collection_name=collection_name)
         db_manager.embedding_generator.model_name = model_name
+        db_manager.embedding_generator.backend = backend
         
         # Callback для отображения прогресса
         def progress_callback(current: int, total: int, message: str):
@@ -58,12 +79,17 @@ def create_vector_database():
             print(f"   [{percentage:5.1f}%] {message}")
         
         # Создаем БД
-        db_manager.create_database_from_controls(controls, progress_callback=progress_callback)
+        plan = db_manager.create_database_from_controls(
+            controls, progress_callback=progress_callback, incremental=incremental,
+            workers=workers, batch_size=batch_size
+        )
         
         # Проверяем результат
         count = db_manager.get_collection_count()
         print(f"\n[OK] Векторная БД успешно создана!")
         print(f"   Обработано контролей: {len(controls)}")
+        print(f"   Векторизовано: {len(plan.embed)}, обновлены метаданные: {len(plan.update_metadata)}, "
+              f"удалено: {len(plan.delete)}, без изменений: {plan.unchanged}")
         print(f"   Элементов в БД: {count}")
         print(f"   Путь к БД: {Path(db_path).absolute()}")
         
@@ -77,12 +103,23 @@ def create_vector_database():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Создание векторной БД на основе макета Template.xml')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Обновить только изменившиеся контроли в существующей коллекции')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'Количество процессов векторизации (ядер доступно: {default_workers()})')
+    parser.add_argument('--batch-size', type=int, default=32, help='Размер батча модели эмбеддингов')
+    parser.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help='Бэкенд вычисления эмбеддингов')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Создание векторной БД на основе макета Template.xml")
     print("=" * 60)
     print()
     
-    success = create_vector_database()
+    success = create_vector_database(incremental=args.incremental, workers=max(1, args.workers),
+                                     batch_size=args.batch_size, backend=args.backend)
     
     print()
     if success:
@@ -0,0 +1,90 @@
+"""
+Скрипт для выгрузки каталога контролей из макета Template.xml в файл.
+Запускайте этот скрипт из корневой директории проекта.
+
+Примеры:
+    python export_controls.py --output controls.parquet
+    python export_controls.py --output controls.csv --table-code T1 --required да
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.catalog.filter_engine import FilterEngine
+from src.export.formats import EXPORT_FORMATS, write_export
+from src.parser.controls_cache import load_control_table_cached
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Выгрузка каталога контролей в файл')
+    parser.add_argument('--output', required=True, help='Путь к файлу выгрузки')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help='Формат выгрузки (по умолчанию - по расширению файла)')
+    parser.add_argument('--xml', default=str(project_root / 'Template.xml'), help='Путь к файлу Template.xml')
+    
+    filters = parser.add_argument_group('фильтры (как в интерфейсе)')
+    filters.add_argument('--identifier', default='', help='Подстрока идентификатора')
+    filters.add_argument('--name', default='', help='Подстрока наименования')
+    filters.add_argument('--uri', default='', help='Подстрока URI')
+    filters.add_argument('--table-code', default='', help='Подстрока кода таблицы')
+    filters.add_argument('--taxonomy', default='', help='Подстрока таксономии')
+    filters.add_argument('--market', default='', help='Подстрока рынка')
+    for flag in ('required', 'correction-available', 'approval'):
+        filters.add_argument(f'--{flag}', choices=['да', 'нет'], help='Значение флага')
+    return parser.parse_args()
+
+
+def _flag(value):
+    return None if value is None else value == 'да'
+
+
+def export_controls(args) -> bool:
+    """Выгружает контроли, удовлетворяющие фильтрам, в файл."""
+    output = Path(args.output)
+    format_name = args.format or output.suffix.lstrip('.').lower()
+    if format_name not in EXPORT_FORMATS:
+        print(f"[ERROR] Не удалось определить формат по расширению '{output.suffix}', укажите --format")
+        return False
+    
+    print(f"[INFO] Загрузка контролей из {args.xml}...")
+    try:
+        controls = load_control_table_cached(args.xml)
+        print(f"[OK] Загружено {len(controls)} контролей")
+    except Exception as e:
+        print(f"[ERROR] Ошибка при загрузке XML: {e}")
+        return False
+    
+    filters = {
+        'identifier': args.identifier,
+        'name': args.name,
+        'uri': args.uri,
+        'required': _flag(args.required),
+        'correction_available': _flag(args.correction_available),
+        'approval': _flag(args.approval),
+        'table_code': args.table_code,
+        'taxonomy': args.taxonomy,
+        'market': args.market,
+    }
+    positions = FilterEngine(controls).select(filters)
+    print(f"[INFO] Выгрузка {len(positions)} контролей в {output} ({EXPORT_FORMATS[format_name].label})...")
+    
+    start = time.perf_counter()
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        write_export(controls, positions, format_name, str(output))
+    except Exception as e:
+        print(f"[ERROR] Ошибка при выгрузке: {e}")
+        return False
+    
+    print(f"[OK] Файл записан за {time.perf_counter() - start:.1f} с, размер {output.stat().st_size / 2**20:.1f} МБ")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if export_controls(parse_args()) else 1)
@@ -0,0 +1,74 @@
+"""
+Скрипт поиска почти одинаковых контролей по векторной БД.
+Запускайте этот скрипт из корневой директории проекта после create_vector_db.py.
+
+Находит все пары контролей с косинусным сходством эмбеддингов не ниже порога
+и записывает отчет в CSV (UTF-8 с BOM, открывается в Excel).
+
+Примеры:
+    python find_duplicates.py --output duplicates.csv
+    python find_duplicates.py --output duplicates.csv --threshold 0.9
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.vector_db.chroma_manager import ChromaDBManager
+from src.vector_db.duplicates import (
+    BLOCK_SIZE, DEFAULT_THRESHOLD, duplicates_frame, export_embeddings, find_near_duplicates,
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Поиск почти одинаковых контролей')
+    parser.add_argument('--output', required=True, help='Путь к файлу отчета (CSV)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Порог косинусного сходства (от 0 до 1)')
+    parser.add_argument('--db-path', default='chroma_db', help='Путь к директории векторной БД')
+    parser.add_argument('--collection', default='controls', help='Название коллекции')
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE, help='Количество векторов в блоке')
+    parser.add_argument('--work-dir', help='Каталог для временной матрицы векторов (по умолчанию - системный)')
+    return parser.parse_args()
+
+
+def find_duplicates(args) -> bool:
+    """Ищет пары похожих контролей и записывает отчет."""
+    if not Path(args.db_path).is_dir():
+        print(f"[ERROR] Векторная БД не найдена: {args.db_path}. Сначала запустите create_vector_db.py")
+        return False
+    
+    def progress_callback(current: int, total: int, message: str):
+        print(f"\r   [{current * 100 // max(total, 1):3d}%] {message}", end='', flush=True)
+    
+    db_manager = ChromaDBManager(db_path=args.db_path, collection_name=args.collection)
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        print(f"[INFO] Выгрузка векторов из {args.db_path}/{args.collection}...")
+        start = time.perf_counter()
+        ids, metadatas, matrix = export_embeddings(db_manager, Path(work_dir) / 'embeddings.npy')
+        print(f"[OK] Выгружено {len(ids)} векторов за {time.perf_counter() - start:.1f} с")
+        
+        print(f"[INFO] Поиск пар со сходством не ниже {args.threshold}...")
+        start = time.perf_counter()
+        pairs = find_near_duplicates(matrix, args.threshold, args.block_size, progress_callback)
+        print(f"\n[OK] Найдено {len(pairs)} пар за {time.perf_counter() - start:.1f} с")
+        del matrix
+    
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = duplicates_frame(pairs, ids, metadatas)
+    report.to_csv(output, index=False, encoding='utf-8-sig')
+    print(f"[OK] Отчет записан: {output}")
+    if len(report):
+        print(report.head(10)[['Идентификатор 1', 'Идентификатор 2', 'Сходство']].to_string(index=False))
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if find_duplicates(parse_args()) else 1)
@@ -0,0 +1,106 @@
+"""
+Индекс контролей каталога по ключу и идентификатору.
+
+Каждому контролю назначается стабильный первичный ключ: идентификатор
+контроля, а для повторяющихся идентификаторов - идентификатор с номером
+вхождения (X, X#2, X#3, ...). Символ «#» в самом идентификаторе удваивается
+(«X#2» -> «X##2»), поэтому ключ повтора не совпадает с ключом другого
+идентификатора и ключи не зависят от порядка строк. Вставка или удаление
+строк макета не меняет ключей остальных контролей, поэтому выбранный в
+интерфейсе контроль остается выбранным после перезагрузки каталога. Для
+контролей без идентификатора ключ строится по хешу текста.
+
+Тот же ключ (с префиксом) служит ID записи в векторной БД (см. vector_db.sync).
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.control import Control
+
+
+def control_keys(controls: Sequence[Control]) -> List[str]:
+    """
+    Возвращает стабильные первичные ключи контролей.
+    
+    Args:
+        controls: Контроли в порядке следования в макете
+    
+    Returns:
+        Список ключей той же длины
+    """
+    seen: Dict[str, int] = {}
+    keys = []
+    for control in controls:
+        if control.identifier:
+            # В базе ключа «#» встречается только парами, одиночный «#» - начало номера вхождения
+            base = control.identifier.replace('#', '##')
+        else:
+            text = control.get_text_for_embedding()
+            base = f"sha_{hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]}"
+        occurrence = seen[base] = seen.get(base, 0) + 1
+        keys.append(base if occurrence == 1 else f"{base}#{occurrence}")
+    return keys
+
+
+class ControlIndex:
+    """
+    Индекс позиций контролей по первичному ключу и по идентификатору.
+    
+    Строится один раз на версию каталога; поиск выполняется по словарям
+    без обхода каталога.
+    """
+    
+    def __init__(self, controls: Sequence[Control]):
+        """
+        Строит индекс.
+        
+        Args:
+            controls: Контроли каталога (список Control или ControlTable)
+        """
+        self.keys = np.asarray(control_keys(controls), dtype=object)
+        self._positions: Dict[str, int] = {key: position for position, key in enumerate(self.keys)}
+        
+        # Позиция первого вхождения каждого идентификатора и позиции всех
+        # вхождений повторяющихся идентификаторов
+        self._first: Dict[str, int] = {}
+        occurrences: Dict[str, List[int]] = {}
+        for position, control in enumerate(controls):
+            identifier = control.identifier
+            if not identifier:
+                continue
+            first = self._first.setdefault(identifier, position)
+            if first != position:
+                occurrences.setdefault(identifier, [first]).append(position)
+        self._collisions: Dict[str, np.ndarray] = {
+            identifier: np.asarray(positions, dtype=np.int64) for identifier, positions in occurrences.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def position(self, key: Optional[str]) -> Optional[int]:
+        """Возвращает позицию контроля по первичному ключу (None - ключа нет в каталоге)."""
+        return self._positions.get(key) if key else None
+    
+    def key(self, position: int) -> str:
+        """Возвращает первичный ключ контроля в позиции каталога."""
+        return self.keys[position]
+    
+    def positions(self, identifier: str) -> np.ndarray:
+        """
+        Возвращает позиции всех контролей с идентификатором.
+        
+        Args:
+            identifier: Идентификатор контроля
+        
+        Returns:
+            Позиции по возрастанию (пустой массив - идентификатора нет в каталоге)
+        """
+        positions = self._collisions.get(identifier)
+        if positions is not None:
+            return positions
+        position = self._first.get(identifier) if identifier else None
+        return np.empty(0, dtype=np.int64) if position is None else np.array([position], dtype=np.int64)
@@ -0,0 +1,202 @@
+"""
+Сравнение двух версий каталога контролей.
+
+Контроли версий сопоставляются по первичному ключу (идентификатор, для
+повторяющихся идентификаторов - с номером вхождения, см. catalog.control_index)
+через хеш-индекс pandas, затем поля сопоставленных пар сравниваются по
+колонкам целиком. Время сравнения линейно по размеру каталогов, без
+построчного обхода в Python.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.control_table import CONTROL_FIELDS, ControlTable
+from .control_index import ControlIndex
+
+# Заголовки полей контроля в отчете о различиях
+FIELD_LABELS = {
+    'uri': 'URI',
+    'identifier': 'Идентификатор',
+    'name': 'Наименование',
+    'algorithm': 'Алгоритм',
+    'verification_uri': 'Сверочный URI',
+    'correction_available': 'ДоступноИсправление',
+    'description': 'Описание',
+    'required': 'Обязательный',
+    'approval': 'Утверждение',
+    'table_code': 'КодТаблицы',
+    'based_on_cbr_requirement': 'НаОснованииТребованияЦБ',
+    'cbr_check_description': 'ОписаниеПроверкиПоДаннымЦБ',
+    'comment': 'Комментарий',
+    'cbr_approval_code': 'КодУтвержденияЦБ',
+    'taxonomy': 'Таксономия',
+    'market': 'Рынок',
+}
+# Поля добавленных и удаленных контролей в отчете
+SUMMARY_FIELDS = ('identifier', 'name', 'table_code', 'taxonomy', 'market')
+# Колонки отчета
+KEY_COLUMN = 'Ключ'
+FIELD_COLUMN = 'Поле'
+OLD_COLUMN = 'Было'
+NEW_COLUMN = 'Стало'
+# Количество запоминаемых результатов сравнения (на весь процесс)
+DIFF_CACHE_SIZE = 4
+
+
+class CatalogDiff(NamedTuple):
+    """
+    Различия двух версий каталога.
+    
+    Атрибуты:
+        added: Позиции добавленных контролей в новой версии
+        removed: Позиции удаленных контролей в старой версии
+        changed_old: Позиции измененных контролей в старой версии
+        changed_new: Позиции тех же контролей в новой версии
+        changes: Поле -> булева маска по измененным парам (поле изменилось)
+        unchanged: Количество контролей без изменений
+    """
+    added: np.ndarray
+    removed: np.ndarray
+    changed_old: np.ndarray
+    changed_new: np.ndarray
+    changes: Dict[str, np.ndarray]
+    unchanged: int
+    
+    def field_counts(self) -> Dict[str, int]:
+        """Возвращает количество измененных контролей по каждому полю (только изменившиеся поля)."""
+        counts = {field_name: int(mask.sum()) for field_name, mask in self.changes.items()}
+        return {field_name: count for field_name, count in counts.items() if count}
+
+
+def diff_catalogs(old: ControlTable, new: ControlTable, old_index: Optional[ControlIndex] = None,
+                  new_index: Optional[ControlIndex] = None) -> CatalogDiff:
+    """
+    Сравнивает две версии каталога.
+    
+    Args:
+        old: Старая версия каталога
+        new: Новая версия каталога
+        old_index: Индекс первичных ключей старой версии (None - строится)
+        new_index: Индекс первичных ключей новой версии (None - строится)
+    
+    Returns:
+        Различия версий
+    """
+    old_keys = (old_index or ControlIndex(old)).keys
+    new_keys = (new_index or ControlIndex(new)).keys
+    
+    # Позиция контроля новой версии в старой (-1 - контроль добавлен); ключи уникальны
+    old_positions = pd.Index(old_keys).get_indexer(new_keys)
+    matched = old_positions >= 0
+    added = np.flatnonzero(~matched)
+    pairs_new = np.flatnonzero(matched)
+    pairs_old = old_positions[matched]
+    in_new = np.zeros(len(old_keys), dtype=bool)
+    in_new[pairs_old] = True
+    removed = np.flatnonzero(~in_new)
+    
+    differs = {field_name: old.column(field_name, pairs_old) != new.column(field_name, pairs_new)
+               for field_name in CONTROL_FIELDS}
+    changed = np.logical_or.reduce(list(differs.values()))
+    return CatalogDiff(
+        added=added,
+        removed=removed,
+        changed_old=pairs_old[changed],
+        changed_new=pairs_new[changed],
+        changes={field_name: mask[changed] for field_name, mask in differs.items()},
+        unchanged=int(len(pairs_new) - changed.sum()),
+    )
+
+
+def controls_frame(table: ControlTable, index: ControlIndex, positions: np.ndarray) -> pd.DataFrame:
+    """
+    Строит таблицу добавленных или удаленных контролей.
+    
+    Args:
+        table: Версия каталога, в которой находятся контроли
+        index: Индекс первичных ключей этой версии
+        positions: Позиции контролей
+    
+    Returns:
+        DataFrame: ключ и основные поля контролей
+    """
+    data = {KEY_COLUMN: index.keys[positions]}
+    for field_name in SUMMARY_FIELDS:
+        data[FIELD_LABELS[field_name]] = table.column(field_name, positions)
+    return pd.DataFrame(data)
+
+
+def changes_frame(diff: CatalogDiff, old: ControlTable, new: ControlTable, new_index: ControlIndex,
+                  fields: Optional[Tuple[str, ...]] = None) -> pd.DataFrame:
+    """
+    Строит таблицу изменений полей (одна строка - одно измененное поле контроля).
+    
+    Args:
+        diff: Различия версий
+        old: Старая версия каталога
+        new: Новая версия каталога
+        new_index: Индекс первичных ключей новой версии
+        fields: Поля, изменения которых включаются в таблицу (None - все)
+    
+    Returns:
+        DataFrame: ключ контроля, поле, старое и новое значение (в порядке новой версии)
+    """
+    frames = []
+    for field_name in fields or CONTROL_FIELDS:
+        mask = diff.changes[field_name]
+        if not mask.any():
+            continue
+        old_positions, new_positions = diff.changed_old[mask], diff.changed_new[mask]
+        frames.append(pd.DataFrame({
+            KEY_COLUMN: new_index.keys[new_positions],
+            FIELD_COLUMN: FIELD_LABELS[field_name],
+            OLD_COLUMN: old.column(field_name, old_positions),
+            NEW_COLUMN: new.column(field_name, new_positions),
+            '_position': new_positions,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=[KEY_COLUMN, FIELD_COLUMN, OLD_COLUMN, NEW_COLUMN])
+    frame = pd.concat(frames, ignore_index=True)
+    # Изменения одного контроля идут подряд, контроли - в порядке новой версии
+    frame = frame.iloc[np.argsort(frame['_position'].to_numpy(), kind='stable')]
+    return frame.drop(columns='_position').reset_index(drop=True)
+
+
+_diffs: 'OrderedDict[Tuple[Hashable, Hashable], CatalogDiff]' = OrderedDict()
+_diffs_lock = threading.Lock()
+
+
+def get_catalog_diff(old: ControlTable, new: ControlTable, old_index: ControlIndex, new_index: ControlIndex,
+                     old_version: Hashable, new_version: Hashable) -> CatalogDiff:
+    """
+    Возвращает общий для процесса результат сравнения версий каталога.
+    
+    Args:
+        old: Старая версия каталога
+        new: Новая версия каталога
+        old_index: Индекс первичных ключей старой версии
+        new_index: Индекс первичных ключей новой версии
+        old_version: Ключ версии старого каталога
+        new_version: Ключ версии нового каталога
+    
+    Returns:
+        Различия версий
+    """
+    key = (old_version, new_version)
+    with _diffs_lock:
+        diff = _diffs.get(key)
+        if diff is not None:
+            _diffs.move_to_end(key)
+            return diff
+    
+    diff = diff_catalogs(old, new, old_index, new_index)
+    with _diffs_lock:
+        _diffs[key] = diff
+        while len(_diffs) > DIFF_CACHE_SIZE:
+            _diffs.popitem(last=False)
+    return diff
@@ -0,0 +1,292 @@
+"""
+Движок фильтрации каталога контролей.
+
+Строится один раз на загрузку каталога поверх колоночной таблицы ControlTable:
+- колонки поиска по подстроке хранятся в нижнем регистре (чтобы не вызывать
+  lower() на каждый rerun) вместе с индексами триграмм для идентификатора,
+  наименования и URI; запросы короче триграммы проверяются векторно
+  (pandas.Series.str.contains) по всей колонке;
+- для флагов да/нет и категориальных полей индексом служат коды категорий:
+  условие вычисляется над словарем значений, а строки отбираются векторно.
+
+Применение фильтров сводится к пересечению булевой маски с массивами позиций.
+Результаты кэшируются (LRU, ограничение по суммарному объему) по версии каталога
+и замороженному набору фильтров, поэтому повторные rerun-ы Streamlit с теми же
+фильтрами не пересчитывают выборку. Выборка без фильтров (весь каталог) не
+кэшируется - она строится без индексов.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.control import Control
+from ..models.control_table import ControlTable
+
+
+# Поля с поиском подстроки по индексу триграмм
+SUBSTRING_FIELDS = ('identifier', 'name', 'uri')
+# Категориальные поля (в фильтре - значение из выпадающего списка)
+CATEGORY_FIELDS = ('table_code', 'taxonomy', 'market')
+# Флаги да/нет
+FLAG_FIELDS = ('required', 'correction_available', 'approval')
+
+NGRAM_SIZE = 3
+
+# Суммарный объем запоминаемых результатов фильтрации (байт, на весь процесс)
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _ngrams(text: str) -> Set[str]:
+    """Возвращает множество n-грамм строки."""
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _readonly(positions: np.ndarray) -> np.ndarray:
+    """Запрещает запись в массив позиций (он разделяется между сессиями через кэш)."""
+    positions.flags.writeable = False
+    return positions
+
+
+def freeze_filters(filters: Dict) -> Tuple:
+    """Возвращает хешируемое представление словаря фильтров (для ключа кэша)."""
+    return tuple(sorted(filters.items()))
+
+
+def has_conditions(filters: Dict) -> bool:
+    """Проверяет, задан ли хотя бы один фильтр (пустые строки и None не учитываются)."""
+    return any(value is not None and value != '' for value in filters.values())
+
+
+class FilterResultCache:
+    """
+    LRU-кэш результатов фильтрации, общий для всех сессий.
+    
+    Ключ - версия каталога и замороженный словарь фильтров, значение -
+    массив позиций контролей (int32, только для чтения). Размер кэша
+    ограничен суммарным объемом массивов: при превышении вытесняются
+    давно не использованные результаты, а результат больше всего лимита
+    не запоминается.
+    """
+    
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._results: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+    
+    def put(self, key: Tuple, positions: np.ndarray) -> None:
+        if positions.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._results.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._results[key] = positions
+            self._bytes += positions.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._results.popitem(last=False)
+                self._bytes -= evicted.nbytes
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self._bytes = 0
+
+
+_result_cache = FilterResultCache()
+
+
+class FilterEngine:
+    """
+    Индексы каталога для быстрого применения фильтров FilterState.
+    
+    Индексы полей строятся при первом обращении (или сразу, через build_all)
+    и далее переиспользуются всеми сессиями, работающими с каталогом.
+    """
+    
+    def __init__(self, controls: Sequence[Control], version: Optional[Hashable] = None):
+        """
+        Инициализирует движок фильтрации.
+        
+        Args:
+            controls: Таблица контролей каталога (список Control преобразуется в таблицу);
+                      позиции в результатах - индексы в этой последовательности
+            version: Версия каталога для кэша результатов (None - не кэшировать)
+        """
+        self._controls = controls
+        self.table = controls if isinstance(controls, ControlTable) else ControlTable.from_controls(controls)
+        self.size = len(controls)
+        self.version = version
+        self._columns: Dict[str, List[str]] = {}
+        self._series: Dict[str, pd.Series] = {}
+        self._ngram_index: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lower_categories: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+    
+    def build_all(self) -> 'FilterEngine':
+        """Строит все индексы заранее (чтобы первый фильтр не ждал построения)."""
+        for field_name in SUBSTRING_FIELDS:
+            self._get_ngram_index(field_name)
+            self._get_series(field_name)
+        for field_name in CATEGORY_FIELDS + FLAG_FIELDS:
+            self._get_lower_categories(field_name)
+        return self
+    
+    def _get_column(self, field_name: str) -> List[str]:
+        """Возвращает колонку поля в нижнем регистре."""
+        column = self._columns.get(field_name)
+        if column is None:
+            column = [value.lower() for value in self.table.column(field_name).tolist()]
+            self._columns[field_name] = column
+        return column
+    
+    def _get_series(self, field_name: str) -> pd.Series:
+        """Возвращает колонку поля в нижнем регистре как Series (для векторного поиска подстроки)."""
+        series = self._series.get(field_name)
+        if series is None:
+            series = pd.Series(self._get_column(field_name), dtype=object)
+            self._series[field_name] = series
+        return series
+    
+    def _get_lower_categories(self, field_name: str) -> List[str]:
+        """Возвращает словарь значений категориального поля в нижнем регистре."""
+        categories = self._lower_categories.get(field_name)
+        if categories is None:
+            categories = [value.lower() for value in self.table.categories(field_name).tolist()]
+            self._lower_categories[field_name] = categories
+        return categories
+    
+    def _get_ngram_index(self, field_name: str) -> Dict[str, np.ndarray]:
+        """Возвращает индекс триграмма -> позиции (по возрастанию)."""
+        index = self._ngram_index.get(field_name)
+        if index is None:
+            with self._lock:
+                index = self._ngram_index.get(field_name)
+                if index is None:
+                    postings: Dict[str, List[int]] = {}
+                    for position, value in enumerate(self._get_column(field_name)):
+                        for gram in _ngrams(value):
+                            gram_postings = postings.get(gram)
+                            if gram_postings is None:
+                                gram_postings = postings[gram] = []
+                            gram_postings.append(position)
+                    index = {gram: np.array(p, dtype=np.int32) for gram, p in postings.items()}
+                    self._ngram_index[field_name] = index
+        return index
+    
+    def _match_categories(self, field_name: str, predicate) -> np.ndarray:
+        """Булева маска строк, у которых значение категории удовлетворяет условию."""
+        matching_codes = [code for code, value in enumerate(self._get_lower_categories(field_name))
+                          if predicate(value)]
+        return np.isin(self.table.codes(field_name), matching_codes)
+    
+    def _match_substring(self, field_name: str, term: str, mask: Optional[np.ndarray]) -> np.ndarray:
+        """Позиции (по возрастанию), где поле содержит подстроку term в нижнем регистре."""
+        column = self._get_column(field_name)
+        
+        if len(term) < NGRAM_SIZE:
+            # Запрос короче триграммы - индекс не помогает, подстрока ищется векторно по колонке
+            series = self._get_series(field_name)
+            if mask is None:
+                return np.flatnonzero(series.str.contains(term, regex=False).to_numpy(dtype=bool)).astype(np.int32)
+            candidates = np.flatnonzero(mask)
+            found = series.iloc[candidates].str.contains(term, regex=False).to_numpy(dtype=bool)
+            return candidates[found].astype(np.int32)
+        
+        index = self._get_ngram_index(field_name)
+        postings = []
+        for gram in _ngrams(term):
+            gram_postings = index.get(gram)
+            if gram_postings is None:
+                return np.empty(0, dtype=np.int32)
+            postings.append(gram_postings)
+        postings.sort(key=len)
+        
+        candidates = postings[0]
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        for gram_postings in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, gram_postings, assume_unique=True)
+        candidates = candidates.tolist()
+        
+        # Триграммы дают надмножество: проверяем вхождение подстроки целиком
+        return np.array([i for i in candidates if term in column[i]], dtype=np.int32)
+    
+    def select(self, filters: Dict) -> np.ndarray:
+        """
+        Возвращает позиции контролей, удовлетворяющих фильтрам.
+        
+        Для движка с версией каталога результат берется из LRU-кэша
+        (кроме выборки без фильтров).
+        
+        Args:
+            filters: Словарь фильтров в формате FilterState.get_filters()
+        
+        Returns:
+            Массив позиций контролей (int32) по возрастанию (только для чтения)
+        """
+        if self.version is None or not has_conditions(filters):
+            return self._select(filters)
+        
+        key = (self.version, freeze_filters(filters))
+        positions = _result_cache.get(key)
+        if positions is None:
+            positions = self._select(filters)
+            _result_cache.put(key, positions)
+        return positions
+    
+    def _select(self, filters: Dict) -> np.ndarray:
+        """Вычисляет позиции контролей по индексам (без кэша)."""
+        mask: Optional[np.ndarray] = None
+        
+        def narrow(matched: np.ndarray) -> None:
+            nonlocal mask
+            mask = matched if mask is None else mask & matched
+        
+        # Сначала векторные условия по кодам категорий - они сужают кандидатов для подстрок
+        for field_name in FLAG_FIELDS:
+            if filters.get(field_name) is not None:
+                expected = 'да' if filters[field_name] else 'нет'
+                narrow(self._match_categories(field_name, lambda value: value == expected))
+        
+        for field_name in CATEGORY_FIELDS:
+            if filters.get(field_name):
+                search_term = filters[field_name].lower()
+                narrow(self._match_categories(field_name, lambda value: search_term in value))
+        
+        positions = None
+        for field_name in SUBSTRING_FIELDS:
+            if filters.get(field_name):
+                positions = self._match_substring(field_name, filters[field_name].lower(), mask)
+                mask = np.zeros(self.size, dtype=bool)
+                mask[positions] = True
+        
+        if positions is None:
+            positions = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        return _readonly(positions.astype(np.int32, copy=False))
+    
+    def apply(self, filters: Dict) -> List[Control]:
+        """
+        Применяет фильтры к каталогу.
+        
+        Args:
+            filters: Словарь фильтров в формате FilterState.get_filters()
+        
+        Returns:
+            Отфильтрованный список контролей (в исходном порядке)
+        """
+        controls = self._controls
+        return [controls[i] for i in self.select(filters).tolist()]
@@ -0,0 +1,153 @@
+"""
+Общее для всего процесса хранилище каталога контролей.
+
+Каталог загружается один раз на процесс и разделяется всеми сессиями
+Streamlit вместо хранения копии списка в st.session_state каждой сессии.
+При изменении Template.xml каталог перечитывается и публикуется атомарно:
+сессии видят либо старую, либо новую версию целиком. Перечитывать файл может
+сама сессия (get_control_store) или фоновый поток (см. catalog.watcher), тогда
+сессии не ждут разбора макета.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+from ..models.control_table import ControlTable
+from ..parser.controls_cache import load_control_table_cached
+from .control_index import ControlIndex
+from .filter_engine import FilterEngine
+
+
+@dataclass(frozen=True)
+class ControlStore:
+    """
+    Неизменяемый снимок каталога контролей.
+    
+    Атрибуты:
+        controls: Колоночная таблица контролей в порядке следования в макете
+        source_path: Путь к исходному файлу макета
+        version: Версия каталога (размер и mtime исходного файла)
+        filter_engine: Индексы для фильтрации, построенные по этому снимку
+        index: Первичные ключи контролей и индекс позиций по ключу и идентификатору
+        loaded_at: Время загрузки (time.time())
+    """
+    controls: ControlTable
+    source_path: Path
+    version: Tuple[int, int]
+    filter_engine: FilterEngine
+    index: ControlIndex
+    loaded_at: float = field(default_factory=time.time)
+    
+    def __len__(self) -> int:
+        return len(self.controls)
+    
+    @property
+    def cache_key(self) -> Tuple[str, Tuple[int, int]]:
+        """Ключ версии каталога для общих кэшей (индексы поиска, таблица списка, выгрузки)."""
+        return str(self.source_path), self.version
+
+
+def cache_source(catalog_version: Hashable) -> Hashable:
+    """
+    Возвращает источник версии каталога для общих кэшей.
+    
+    Общие кэши (таблица списка, индексы поиска) хранят только последнюю
+    версию каждого макета, поэтому версии одного макета вытесняют друг друга,
+    а разных макетов - нет.
+    
+    Args:
+        catalog_version: Ключ версии каталога (ControlStore.cache_key)
+    
+    Returns:
+        Путь к макету для ключа ControlStore.cache_key, для других ключей - сам ключ
+    """
+    if isinstance(catalog_version, tuple) and len(catalog_version) == 2 and isinstance(catalog_version[0], str):
+        return catalog_version[0]
+    return catalog_version
+
+
+def source_version(xml_path: Path) -> Tuple[int, int]:
+    """Возвращает версию исходного файла (размер, mtime в наносекундах)."""
+    stat = xml_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+_stores: Dict[Path, ControlStore] = {}
+_lock = threading.Lock()
+
+
+def build_control_store(xml_path: Path) -> ControlStore:
+    """
+    Загружает каталог и строит его индексы (без публикации).
+    
+    Args:
+        xml_path: Абсолютный путь к файлу Template.xml
+    
+    Returns:
+        Снимок каталога
+    
+    Raises:
+        FileNotFoundError: Если файл не найден
+    """
+    version = source_version(xml_path)
+    controls = load_control_table_cached(str(xml_path))
+    return ControlStore(
+        controls=controls,
+        source_path=xml_path,
+        version=version,
+        filter_engine=FilterEngine(controls, version=(str(xml_path), version)).build_all(),
+        index=ControlIndex(controls),
+    )
+
+
+def publish_control_store(store: ControlStore) -> None:
+    """Делает снимок каталога текущей версией для всех сессий."""
+    with _lock:
+        _stores[store.source_path] = store
+
+
+def published_control_store(xml_path: str) -> Optional[ControlStore]:
+    """Возвращает опубликованный снимок каталога, не проверяя исходный файл (None - не загружен)."""
+    return _stores.get(Path(xml_path).resolve())
+
+
+def get_control_store(xml_path: str, check_source: bool = True) -> ControlStore:
+    """
+    Возвращает общий для процесса каталог контролей.
+    
+    Если исходный файл изменился с момента загрузки, каталог перечитывается
+    (один раз для всех сессий) и подменяется новой версией.
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
+        check_source: Сверять версию исходного файла (False - файл отслеживает
+                      фоновый поток, перечитывается только еще не загруженный каталог)
+    
+    Returns:
+        Снимок каталога
+    
+    Raises:
+        FileNotFoundError: Если файл не найден
+    """
+    xml_path = Path(xml_path).resolve()
+    store = _stores.get(xml_path)
+    if store is not None and not check_source:
+        return store
+    
+    version = source_version(xml_path)
+    if store is not None and store.version == version:
+        return store
+    
+    with _lock:
+        # Другая сессия могла уже перечитать файл, пока мы ждали блокировку
+        store = _stores.get(xml_path)
+        if store is not None and (not check_source or store.version == source_version(xml_path)):
+            return store
+        
+        store = build_control_store(xml_path)
+        _stores[xml_path] = store
+        return store
+
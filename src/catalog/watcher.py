@@ -0,0 +1,132 @@
+"""
+Фоновое отслеживание изменений файла макета.
+
+Поток опрашивает размер и mtime Template.xml. Когда файл изменился и его
+версия не менялась в течение одного интервала опроса (запись файла
+завершена), поток перечитывает каталог, строит индексы и публикует новую
+версию для всех сессий (catalog.store.publish_control_store). Сессии
+продолжают работать со старой версией, пока новая не опубликована, и не ждут
+разбора макета. После публикации вызываются обработчики (например,
+построение индексов поиска и синхронизация векторной БД).
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from .store import (
+    ControlStore, build_control_store, publish_control_store, published_control_store, source_version,
+)
+
+logger = logging.getLogger(__name__)
+
+# Интервал опроса файла макета (секунды)
+WATCH_INTERVAL = 2.0
+
+# Обработчик публикации новой версии каталога
+PublishListener = Callable[[ControlStore], None]
+
+
+class CatalogWatcher:
+    """Фоновый поток, перечитывающий каталог при изменении файла макета."""
+    
+    def __init__(self, xml_path: str, interval: float = WATCH_INTERVAL,
+                 listeners: Sequence[PublishListener] = ()):
+        """
+        Инициализирует отслеживание.
+        
+        Args:
+            xml_path: Путь к файлу Template.xml
+            interval: Интервал опроса файла (секунды)
+            listeners: Обработчики, вызываемые в потоке после публикации новой версии
+        """
+        self.xml_path = Path(xml_path).resolve()
+        self.interval = interval
+        self.listeners = list(listeners)
+        # Версия файла при прошлом опросе (публикуется только версия, не менявшаяся между опросами)
+        self._pending: Optional[Tuple[int, int]] = None
+        # Версия, которую не удалось загрузить (повторная попытка - только после нового изменения)
+        self._failed: Optional[Tuple[int, int]] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> 'CatalogWatcher':
+        """Запускает поток отслеживания."""
+        self._thread = threading.Thread(target=self._run, name=f'catalog-watcher-{self.xml_path.name}', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Останавливает поток отслеживания."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def check(self) -> Optional[ControlStore]:
+        """
+        Проверяет файл макета и публикует новую версию каталога, если файл изменился.
+        
+        Returns:
+            Опубликованный снимок каталога или None, если публиковать нечего
+        """
+        try:
+            version = source_version(self.xml_path)
+        except OSError:
+            return None
+        
+        # Первую версию загружает сессия (get_control_store), поток отслеживает только изменения
+        current = published_control_store(str(self.xml_path))
+        if current is None or current.version == version or version == self._failed:
+            self._pending = None
+            return None
+        if version != self._pending:
+            # Файл мог быть записан не полностью - ждем следующего опроса
+            self._pending = version
+            return None
+        
+        try:
+            store = build_control_store(self.xml_path)
+        except Exception as e:
+            logger.warning("Не удалось перечитать %s: %s", self.xml_path, e)
+            self._failed = version
+            return None
+        publish_control_store(store)
+        self._pending = None
+        logger.info("Опубликована новая версия каталога: %d контролей", len(store))
+        
+        for listener in self.listeners:
+            try:
+                listener(store)
+            except Exception as e:
+                logger.exception("Ошибка обработчика новой версии каталога: %s", e)
+        return store
+    
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
+
+
+_watchers: Dict[Path, CatalogWatcher] = {}
+_lock = threading.Lock()
+
+
+def watch_control_store(xml_path: str, interval: float = WATCH_INTERVAL,
+                        listeners: Sequence[PublishListener] = ()) -> CatalogWatcher:
+    """
+    Запускает отслеживание файла макета (один поток на файл для всего процесса).
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
+        interval: Интервал опроса файла (секунды)
+        listeners: Обработчики новой версии каталога (учитываются при первом вызове)
+    
+    Returns:
+        Поток отслеживания файла
+    """
+    path = Path(xml_path).resolve()
+    with _lock:
+        watcher = _watchers.get(path)
+        if watcher is None:
+            watcher = _watchers[path] = CatalogWatcher(str(path), interval, listeners).start()
+        return watcher
@@ -0,0 +1,59 @@
+"""
+Выгрузка контролей в Excel (xlsx).
+
+Книга формируется в потоковом режиме openpyxl (write_only): строки пишутся
+порциями и не хранятся в памяти как объекты ячеек.
+"""
+
+from typing import BinaryIO, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from ..models.control_table import ControlTable
+from .rows import EXPORT_COLUMNS, export_headers, iter_export_chunks
+
+
+SHEET_NAME = 'Контроли'
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Максимальная ширина колонки (в символах)
+MAX_COLUMN_WIDTH = 50
+
+
+def _column_widths(table: ControlTable, positions: np.ndarray) -> List[int]:
+    """Вычисляет ширину колонок по самому длинному значению (векторно по колонкам)."""
+    headers = export_headers()
+    widths = [max(len(str(int(positions.max()))) if len(positions) else 0, len(headers[0]))]
+    for title, field_name in EXPORT_COLUMNS.items():
+        lengths = pd.Series(table.column(field_name, positions), dtype=object).str.len()
+        widths.append(max(int(lengths.max()) if len(lengths) else 0, len(title)))
+    # Ограничиваем максимальную ширину колонки
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+def write_excel(table: ControlTable, positions: Sequence[int], output: Union[str, BinaryIO]) -> None:
+    """
+    Записывает контроли в файл Excel.
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        output: Путь к файлу или бинарный поток
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(SHEET_NAME)
+    
+    # В потоковом режиме ширину колонок нужно задать до записи строк
+    for col_idx, width in enumerate(_column_widths(table, positions), 1):
+        worksheet.column_dimensions[get_column_letter(col_idx)].width = width
+    
+    worksheet.append(export_headers())
+    for chunk in iter_export_chunks(table, positions):
+        for row in chunk.itertuples(index=False, name=None):
+            worksheet.append(row)
+    workbook.save(output)
+
@@ -0,0 +1,174 @@
+"""
+Форматы выгрузки каталога контролей.
+
+Все форматы пишутся из одних и тех же строк выгрузки (iter_export_chunks)
+порциями прямо в файл или поток, поэтому выгрузка всего каталога не
+собирается в памяти целиком:
+- xlsx - Excel (openpyxl, потоковый режим write_only);
+- csv - UTF-8 с BOM (корректно открывается в Excel);
+- parquet - группа строк на порцию (требуется pyarrow);
+- jsonl - JSON Lines, одна запись на строку.
+"""
+
+import importlib.util
+import io
+from contextlib import contextmanager
+from io import BytesIO
+from typing import BinaryIO, Callable, Dict, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..models.control_table import ControlTable
+from .excel import XLSX_MIME, write_excel
+from .rows import EXPORT_CHUNK_SIZE, EXPORT_COLUMNS, ID_COLUMN, export_headers, iter_export_chunks
+
+
+Output = Union[str, BinaryIO]
+
+
+@contextmanager
+def _open_text(output: Output, encoding: str):
+    """Открывает путь или бинарный поток для записи текста."""
+    if isinstance(output, (str, bytes)) or hasattr(output, '__fspath__'):
+        with open(output, 'w', encoding=encoding, newline='') as f:
+            yield f
+    else:
+        wrapper = io.TextIOWrapper(output, encoding=encoding, newline='', write_through=True)
+        try:
+            yield wrapper
+        finally:
+            # Поток принадлежит вызывающему коду - не закрываем его вместе с оберткой
+            wrapper.flush()
+            wrapper.detach()
+
+
+def write_csv(table: ControlTable, positions: Sequence[int], output: Output,
+              chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """
+    Записывает контроли в CSV (UTF-8 с BOM, разделитель - запятая).
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        output: Путь к файлу или бинарный поток
+        chunk_size: Количество строк в порции
+    """
+    with _open_text(output, 'utf-8-sig') as f:
+        header = True
+        for chunk in iter_export_chunks(table, positions, chunk_size):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+        if header:
+            # Пустая выборка - только строка заголовков (тем же writer, что и строки данных)
+            pd.DataFrame(columns=export_headers()).to_csv(f, index=False)
+
+
+def write_jsonl(table: ControlTable, positions: Sequence[int], output: Output,
+                chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """
+    Записывает контроли в JSON Lines (UTF-8, одна запись на строку).
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        output: Путь к файлу или бинарный поток
+        chunk_size: Количество строк в порции
+    """
+    with _open_text(output, 'utf-8') as f:
+        for chunk in iter_export_chunks(table, positions, chunk_size):
+            text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+            f.write(text if text.endswith('\n') else text + '\n')
+
+
+def write_parquet(table: ControlTable, positions: Sequence[int], output: Output,
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> None:
+    """
+    Записывает контроли в Parquet (одна группа строк на порцию).
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        output: Путь к файлу или бинарный поток
+        chunk_size: Количество строк в порции
+    
+    Raises:
+        ImportError: Если не установлен pyarrow
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Для выгрузки в Parquet установите пакет pyarrow") from e
+    
+    schema = pa.schema([(ID_COLUMN, pa.int64())] + [(title, pa.string()) for title in EXPORT_COLUMNS])
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in iter_export_chunks(table, positions, chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+class ExportFormat(NamedTuple):
+    """
+    Описание формата выгрузки.
+    
+    Атрибуты:
+        label: Название формата в интерфейсе
+        extension: Расширение файла
+        mime: MIME-тип файла
+        writer: Функция записи (table, positions, output)
+        requires: Необязательные пакеты, без которых формат недоступен
+    """
+    label: str
+    extension: str
+    mime: str
+    writer: Callable[[ControlTable, Sequence[int], Output], None]
+    requires: Tuple[str, ...] = ()
+    
+    def missing_packages(self) -> Tuple[str, ...]:
+        """Возвращает не установленные пакеты из requires."""
+        return tuple(package for package in self.requires if importlib.util.find_spec(package) is None)
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    'xlsx': ExportFormat('Excel', 'xlsx', XLSX_MIME, write_excel),
+    'csv': ExportFormat('CSV', 'csv', 'text/csv', write_csv),
+    'parquet': ExportFormat('Parquet', 'parquet', 'application/vnd.apache.parquet', write_parquet,
+                            requires=('pyarrow',)),
+    'jsonl': ExportFormat('JSON Lines', 'jsonl', 'application/jsonl', write_jsonl),
+}
+
+
+def write_export(table: ControlTable, positions: Sequence[int], format_name: str, output: Output) -> None:
+    """
+    Записывает выгрузку в указанном формате.
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        format_name: Ключ формата в EXPORT_FORMATS
+        output: Путь к файлу или бинарный поток
+    
+    Raises:
+        ValueError: Если формат не поддерживается
+    """
+    export_format = EXPORT_FORMATS.get(format_name)
+    if export_format is None:
+        raise ValueError(f"Неподдерживаемый формат выгрузки: {format_name}")
+    export_format.writer(table, np.asarray(positions, dtype=np.int64), output)
+
+
+def export_bytes(table: ControlTable, positions: Sequence[int], format_name: str) -> bytes:
+    """
+    Формирует файл выгрузки в памяти (для кнопки скачивания в интерфейсе).
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей
+        format_name: Ключ формата в EXPORT_FORMATS
+    
+    Returns:
+        Содержимое файла
+    """
+    output = BytesIO()
+    write_export(table, positions, format_name, output)
+    return output.getvalue()
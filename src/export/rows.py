@@ -0,0 +1,60 @@
+"""
+Строки выгрузки каталога контролей.
+
+Выгрузка строится по позициям контролей в колоночной таблице и отдается
+порциями (DataFrame по EXPORT_CHUNK_SIZE строк), чтобы большие выгрузки
+не материализовались целиком.
+"""
+
+from typing import Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..models.control_table import ControlTable
+
+
+# Колонки выгрузки: заголовок -> поле Control (перед ними - колонка ID)
+EXPORT_COLUMNS = {
+    'Идентификатор': 'identifier',
+    'Наименование': 'name',
+    'URI': 'uri',
+    'Обязательный': 'required',
+    'ДоступноИсправление': 'correction_available',
+    'Утверждение': 'approval',
+    'КодТаблицы': 'table_code',
+    'Таксономия': 'taxonomy',
+    'Рынок': 'market',
+}
+# Колонка с позицией контроля в каталоге
+ID_COLUMN = 'ID'
+
+# Количество строк в одной порции выгрузки
+EXPORT_CHUNK_SIZE = 10_000
+
+
+def export_headers() -> list:
+    """Возвращает заголовки колонок выгрузки."""
+    return [ID_COLUMN] + list(EXPORT_COLUMNS)
+
+
+def iter_export_chunks(table: ControlTable, positions: Sequence[int],
+                       chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Возвращает строки выгрузки порциями.
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции выгружаемых контролей (в порядке выгрузки)
+        chunk_size: Количество строк в порции
+    
+    Yields:
+        DataFrame с колонкой ID и колонками EXPORT_COLUMNS (исходные значения)
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    for start in range(0, len(positions), chunk_size):
+        chunk = positions[start:start + chunk_size]
+        data = {ID_COLUMN: chunk}
+        for title, field_name in EXPORT_COLUMNS.items():
+            data[title] = table.column(field_name, chunk)
+        yield pd.DataFrame(data)
@@ -44,6 +44,12 @@ def render_create_vector_db_command(controls: list[Control], xml_path: str) -> N
             index=0,
             help="Модель для создания эмбеддингов (рекомендуется multilingual для русского языка)"
         )
+        
+        incremental = st.checkbox(
+            "Обновить только изменения",
+            value=False,
+            help="Не пересоздавать коллекцию: векторизуются только новые и изменившиеся контроли"
+        )
     
     # Кнопка создания БД
     if st.button("🚀 Создать векторную БД", type="primary", use_container_width=True):
@@ -55,6 +61,8 @@ def render_create_vector_db_command(controls: list[Control], xml_path: str) -> N
             # Инициализируем менеджер
             db_manager = ChromaDBManager(db_path=db_path, collection_name=collection_name)
             db_manager.embedding_generator.model_name = model_name
+            if incremental and not db_manager.embedding_model_matches():
+                st.warning("Коллекция построена другой моделью эмбеддингов - она будет пересоздана целиком")
             
             # Создаем прогресс-бар
             progress_bar = st.progress(0)
@@ -73,17 +81,22 @@ def render_create_vector_db_command(controls: list[Control], xml_path: str) -> N
             
             # Создаем БД
             with st.spinner("Создание векторной БД..."):
-                db_manager.create_database_from_controls(controls, progress_callback=progress_callback)
+                plan = db_manager.create_database_from_controls(
+                    controls, progress_callback=progress_callback, incremental=incremental
+                )
             
             # Успех
             progress_bar.progress(1.0)
             status_text.text("Готово!")
             st.success(f"✅ Векторная БД успешно создана! Обработано {len(controls)} контролей.")
+            if incremental:
+                st.info(f"Векторизовано: {len(plan.embed)}, обновлены метаданные: {len(plan.update_metadata)}, "
+                        f"удалено: {len(plan.delete)}, без изменений: {plan.unchanged}")
             
             # Показываем информацию о БД
             count = db_manager.get_collection_count()
             st.info(f"📊 В базе данных: {count} элементов")
-            
+        
         except Exception as e:
             st.error(f"❌ Ошибка при создании векторной БД: {str(e)}")
             st.exception(e)
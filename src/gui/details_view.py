@@ -2,47 +2,41 @@
 Компонент для отображения детального описания контроля.
 """
 
+import numpy as np
 import streamlit as st
-from typing import List, Optional
+from typing import Optional, Sequence
+from ..catalog.control_index import ControlIndex
 from ..models.control import Control
 
 
-def render_control_details(controls: List[Control], selected_control_id: Optional[str] = None) -> None:
+def render_control_details(controls: Sequence[Control], selected_control_id: Optional[str],
+                           control_index: ControlIndex) -> None:
     """
     Отображает детальное описание выбранного контроля.
     
     Args:
-        controls: Список всех контролей
-        selected_control_id: ID выбранного контроля (формат: "identifier_index")
+        controls: Все контроли каталога (список Control или ControlTable)
+        selected_control_id: Первичный ключ выбранного контроля (см. catalog.control_index)
+        control_index: Индекс первичных ключей каталога
     """
     st.header("📄 Описание контроля и основные характеристики")
     
-    if not selected_control_id or not controls:
+    if not selected_control_id or not len(controls):
         st.info("Выберите контроль из списка для просмотра деталей")
         return
     
-    # Парсим ID выбранного контроля
-    try:
-        parts = selected_control_id.rsplit('_', 1)
-        if len(parts) == 2:
-            index = int(parts[1])
-            if 0 <= index < len(controls):
-                control = controls[index]
-            else:
-                st.error("Неверный индекс контроля")
-                return
-        else:
-            # Пытаемся найти по идентификатору
-            control = next((c for c in controls if c.identifier == selected_control_id), None)
-            if not control:
-                st.error("Контроль не найден")
-                return
-    except (ValueError, IndexError):
-        st.error("Неверный формат ID контроля")
+    current_index = control_index.position(selected_control_id)
+    if current_index is None:
+        st.error("Контроль не найден")
         return
-    
-    # Находим индекс текущего контроля
-    current_index = next((i for i, c in enumerate(controls) if c.identifier == control.identifier), 0)
+    control = controls[current_index]
+    
+    # Идентификатор может повторяться в макете - показываем, какое вхождение выбрано
+    occurrences = control_index.positions(control.identifier)
+    if len(occurrences) > 1:
+        occurrence = int(np.searchsorted(occurrences, current_index)) + 1
+        st.warning(f"Идентификатор встречается в каталоге {len(occurrences)} раз(а), "
+                   f"показано вхождение {occurrence}")
     
     # URI (вынесено до основной информации)
     st.subheader("URI")
@@ -0,0 +1,85 @@
+"""
+Компонент для сравнения двух версий макета.
+"""
+
+import streamlit as st
+from pathlib import Path
+from typing import Dict
+from ..catalog.diff import FIELD_LABELS, changes_frame, controls_frame, get_catalog_diff
+from ..catalog.store import get_control_store
+
+
+# Максимальное количество строк в таблицах различий
+DIFF_DISPLAY_LIMIT = 1000
+
+
+def _show_frame(frame, total: int) -> None:
+    """Отображает первые DIFF_DISPLAY_LIMIT строк таблицы различий."""
+    st.dataframe(frame.head(DIFF_DISPLAY_LIMIT), use_container_width=True, hide_index=True)
+    if total > DIFF_DISPLAY_LIMIT:
+        st.caption(f"Показаны первые {DIFF_DISPLAY_LIMIT} из {total}")
+
+
+def render_catalog_diff(templates: Dict[str, Path]) -> None:
+    """
+    Отображает различия двух версий макета.
+    
+    Контроли сопоставляются по первичному ключу (идентификатор с номером
+    вхождения), различия считаются один раз на пару версий и разделяются
+    всеми сессиями.
+    
+    Args:
+        templates: Доступные версии макета {название: путь}
+    """
+    names = list(templates)
+    col_old, col_new, col_run = st.columns([4, 4, 2])
+    with col_old:
+        old_name = st.selectbox("Старая версия", options=names, index=min(1, len(names) - 1), key='diff_old')
+    with col_new:
+        new_name = st.selectbox("Новая версия", options=names, index=0, key='diff_new')
+    with col_run:
+        enabled = st.toggle("Сравнить", key='diff_enabled')
+    
+    if old_name == new_name:
+        st.info("Выберите две разные версии макета")
+        return
+    if not enabled:
+        return
+    
+    try:
+        with st.spinner("Сравнение версий..."):
+            old = get_control_store(str(templates[old_name]), check_source=False)
+            new = get_control_store(str(templates[new_name]), check_source=False)
+            diff = get_catalog_diff(old.controls, new.controls, old.index, new.index, old.cache_key, new.cache_key)
+    except Exception as e:
+        st.error(f"Ошибка при сравнении версий: {str(e)}")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Добавлено", len(diff.added))
+    col2.metric("Удалено", len(diff.removed))
+    col3.metric("Изменено", len(diff.changed_new))
+    col4.metric("Без изменений", diff.unchanged)
+    
+    section = st.radio("Показать", options=["Измененные", "Добавленные", "Удаленные"],
+                       horizontal=True, key='diff_section')
+    if section == "Добавленные":
+        _show_frame(controls_frame(new.controls, new.index, diff.added[:DIFF_DISPLAY_LIMIT]), len(diff.added))
+    elif section == "Удаленные":
+        _show_frame(controls_frame(old.controls, old.index, diff.removed[:DIFF_DISPLAY_LIMIT]), len(diff.removed))
+    else:
+        # Изменения по полям: количество контролей, у которых изменилось поле
+        field_counts = diff.field_counts()
+        if not field_counts:
+            st.info("Нет измененных контролей")
+            return
+        labels = {FIELD_LABELS[field_name]: field_name for field_name in field_counts}
+        selected = st.multiselect(
+            "Поля",
+            options=list(labels),
+            format_func=lambda label: f"{label} ({field_counts[labels[label]]})",
+            key=f'diff_fields_{old_name}_{new_name}'
+        )
+        fields = tuple(labels[label] for label in selected) or tuple(field_counts)
+        frame = changes_frame(diff, old.controls, new.controls, new.index, fields)
+        _show_frame(frame, len(frame))
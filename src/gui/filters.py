@@ -3,8 +3,10 @@
 """
 
 import streamlit as st
-from typing import Dict, Optional, Callable
+import numpy as np
+from typing import Dict, Optional, Callable, Sequence
 from ..models.control import Control
+from ..catalog.filter_engine import FilterEngine
 
 
 class FilterState:
@@ -43,65 +45,36 @@ class FilterState:
             'market': '',
         }
     
-    def apply_filters(self, controls: list[Control]) -> list[Control]:
+    def select(self, engine: FilterEngine) -> np.ndarray:
+        """
+        Возвращает позиции контролей каталога, удовлетворяющих фильтрам.
+        
+        Результат кэшируется движком по версии каталога и значениям фильтров,
+        поэтому повторный вызов с теми же фильтрами ничего не пересчитывает.
+        
+        Args:
+            engine: Движок фильтрации каталога
+            
+        Returns:
+            Массив позиций контролей по возрастанию (только для чтения)
+        """
+        return engine.select(self.get_filters())
+    
+    def apply_filters(self, controls: Sequence[Control], engine: Optional[FilterEngine] = None) -> list[Control]:
         """
         Применяет фильтры к списку контролей.
         
         Args:
             controls: Список контролей для фильтрации
+            engine: Движок фильтрации, построенный по этим же контролям
+                    (если не передан, индексы строятся на лету)
             
         Returns:
             Отфильтрованный список контролей
         """
-        filters = self.get_filters()
-        filtered = controls
-        
-        # Фильтр по идентификатору
-        if filters['identifier']:
-            search_term = filters['identifier'].lower()
-            filtered = [c for c in filtered if search_term in (c.identifier or '').lower()]
-        
-        # Фильтр по наименованию
-        if filters['name']:
-            search_term = filters['name'].lower()
-            filtered = [c for c in filtered if search_term in (c.name or '').lower()]
-        
-        # Фильтр по URI
-        if filters['uri']:
-            search_term = filters['uri'].lower()
-            filtered = [c for c in filtered if search_term in (c.uri or '').lower()]
-        
-        # Фильтр по обязательности
-        if filters['required'] is not None:
-            required_value = 'да' if filters['required'] else 'нет'
-            filtered = [c for c in filtered if (c.required or '').lower() == required_value.lower()]
-        
-        # Фильтр по доступности исправления
-        if filters['correction_available'] is not None:
-            correction_value = 'да' if filters['correction_available'] else 'нет'
-            filtered = [c for c in filtered if (c.correction_available or '').lower() == correction_value.lower()]
-        
-        # Фильтр по утверждению
-        if filters['approval'] is not None:
-            approval_value = 'да' if filters['approval'] else 'нет'
-            filtered = [c for c in filtered if (c.approval or '').lower() == approval_value.lower()]
-        
-        # Фильтр по коду таблицы
-        if filters['table_code']:
-            search_term = filters['table_code'].lower()
-            filtered = [c for c in filtered if search_term in (c.table_code or '').lower()]
-        
-        # Фильтр по таксономии
-        if filters['taxonomy']:
-            search_term = filters['taxonomy'].lower()
-            filtered = [c for c in filtered if search_term in (c.taxonomy or '').lower()]
-        
-        # Фильтр по рынку
-        if filters['market']:
-            search_term = filters['market'].lower()
-            filtered = [c for c in filtered if search_term in (c.market or '').lower()]
-        
-        return filtered
+        if engine is None:
+            engine = FilterEngine(controls)
+        return engine.apply(self.get_filters())
 
 
 def render_table_headers_with_filters(filter_state: FilterState, controls: list[Control]) -> None:
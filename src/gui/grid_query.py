@@ -0,0 +1,296 @@
+"""
+Серверная обработка запросов таблицы контролей (фильтры колонок, сортировка, страницы).
+
+AgGrid получает только строки текущей страницы. Модели фильтров и сортировки,
+заданные пользователем в заголовках колонок, возвращаются из таблицы в состоянии
+грида (gridState) и применяются здесь ко всей отфильтрованной выборке каталога.
+Значения колонок вычисляются так же, как они отображаются в таблице, поэтому
+повторное применение тех же фильтров и сортировки на стороне браузера к странице
+не меняет ее содержимого и порядка.
+
+Отображаемые значения всех строк каталога (DisplayTable) строятся один раз на
+версию каталога; каждый rerun только выбирает строки по позициям.
+"""
+
+import threading
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..catalog.store import cache_source
+from ..export.rows import EXPORT_COLUMNS, ID_COLUMN
+from ..models.control_table import ControlTable
+
+
+# Колонки таблицы совпадают с колонками выгрузки (заголовок -> поле Control)
+LIST_COLUMNS = EXPORT_COLUMNS
+# Колонки-флаги да/нет (в таблице отображаются символом ✓)
+FLAG_COLUMNS = ('Обязательный', 'ДоступноИсправление', 'Утверждение')
+FLAG_MARK = '✓'
+
+# Допустимые размеры страницы таблицы
+PAGE_SIZES = (50, 100, 200, 500)
+DEFAULT_PAGE_SIZE = 100
+
+
+def display_column(table: ControlTable, title: str, positions: np.ndarray) -> np.ndarray:
+    """
+    Возвращает значения колонки таблицы в том виде, в каком они отображаются.
+    
+    Args:
+        table: Колоночная таблица каталога
+        title: Заголовок колонки (ID или ключ LIST_COLUMNS)
+        positions: Позиции строк в каталоге
+    
+    Returns:
+        Массив значений колонки для указанных строк
+    """
+    if title == ID_COLUMN:
+        return np.asarray(positions, dtype=np.int64)
+    field_name = LIST_COLUMNS[title]
+    if title in FLAG_COLUMNS:
+        # Флаг вычисляется над словарем значений, а не над каждой строкой
+        marks = np.array([FLAG_MARK if value.lower() == 'да' else '' for value in table.categories(field_name)],
+                         dtype=object)
+        return marks.take(table.codes(field_name)[positions])
+    return table.column(field_name, positions)
+
+
+def build_page_frame(table: ControlTable, positions: np.ndarray) -> pd.DataFrame:
+    """
+    Строит DataFrame для отображения строк страницы.
+    
+    Args:
+        table: Колоночная таблица каталога
+        positions: Позиции строк страницы в каталоге
+    
+    Returns:
+        DataFrame с колонкой ID и колонками LIST_COLUMNS
+    """
+    data = {ID_COLUMN: np.asarray(positions, dtype=np.int64)}
+    for title in LIST_COLUMNS:
+        data[title] = display_column(table, title, positions)
+    return pd.DataFrame(data)
+
+
+class DisplayTable:
+    """
+    Отображаемые значения колонок таблицы для всех строк каталога.
+    
+    Строится один раз на версию каталога. Значения в нижнем регистре (для
+    текстовых фильтров) и ранги значений (для сортировки) вычисляются при
+    первом обращении к колонке.
+    """
+    
+    def __init__(self, table: ControlTable):
+        """
+        Строит отображаемую таблицу.
+        
+        Args:
+            table: Колоночная таблица каталога
+        """
+        self.frame = build_page_frame(table, np.arange(len(table), dtype=np.int64))
+        self._columns = {title: self.frame[title].to_numpy() for title in self.frame.columns}
+        self._lower: Dict[str, np.ndarray] = {}
+        self._ranks: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.frame)
+    
+    def column(self, title: str, positions: np.ndarray) -> np.ndarray:
+        """Возвращает отображаемые значения колонки для указанных строк."""
+        return self._columns[title][positions]
+    
+    def lower(self, title: str, positions: np.ndarray) -> np.ndarray:
+        """Возвращает значения текстовой колонки в нижнем регистре для указанных строк."""
+        with self._lock:
+            values = self._lower.get(title)
+            if values is None:
+                values = self._lower[title] = pd.Series(self._columns[title], dtype=object).str.lower().to_numpy()
+        return values[positions]
+    
+    def ranks(self, title: str, positions: np.ndarray) -> np.ndarray:
+        """Возвращает ранги значений колонки (порядок сортировки) для указанных строк."""
+        with self._lock:
+            ranks = self._ranks.get(title)
+            if ranks is None:
+                ranks = self._ranks[title] = pd.factorize(self._columns[title], sort=True)[0]
+        return ranks[positions]
+    
+    def page_frame(self, positions: np.ndarray) -> pd.DataFrame:
+        """Возвращает DataFrame строк страницы (то же, что build_page_frame, без пересчета значений)."""
+        return self.frame.take(positions).reset_index(drop=True)
+
+
+# Источник каталога (макет) -> (версия каталога, отображаемая таблица последней версии)
+_displays: Dict[Hashable, Tuple[Hashable, DisplayTable]] = {}
+_displays_lock = threading.Lock()
+
+
+def get_display_table(table: ControlTable, catalog_version: Optional[Hashable]) -> DisplayTable:
+    """
+    Возвращает общую для процесса отображаемую таблицу версии каталога.
+    
+    Хранится по одной таблице на макет (последняя запрошенная версия), поэтому
+    сессии, открывшие разные версии макета из templates/, не вытесняют друг друга.
+    
+    Args:
+        table: Колоночная таблица каталога
+        catalog_version: Версия каталога (None - таблица строится без кэширования)
+    
+    Returns:
+        Отображаемая таблица каталога
+    """
+    if catalog_version is None:
+        return DisplayTable(table)
+    
+    source = cache_source(catalog_version)
+    with _displays_lock:
+        cached = _displays.get(source)
+        if cached is not None and cached[0] == catalog_version:
+            return cached[1]
+        display = DisplayTable(table)
+        _displays[source] = (catalog_version, display)
+        return display
+
+
+def _match_text_condition(values: np.ndarray, lower_values: np.ndarray, condition: Dict) -> np.ndarray:
+    """Булева маска для условия текстового фильтра AgGrid (без учета регистра)."""
+    kind = condition.get('type', 'contains')
+    if kind == 'blank':
+        return (pd.Series(values, dtype=object).str.strip() == '').to_numpy(dtype=bool)
+    if kind == 'notBlank':
+        return (pd.Series(values, dtype=object).str.strip() != '').to_numpy(dtype=bool)
+    
+    term = str(condition.get('filter') or '').lower()
+    lower = pd.Series(lower_values, dtype=object)
+    if kind == 'contains':
+        matched = lower.str.contains(term, regex=False)
+    elif kind == 'notContains':
+        matched = ~lower.str.contains(term, regex=False)
+    elif kind == 'equals':
+        matched = lower == term
+    elif kind == 'notEqual':
+        matched = lower != term
+    elif kind == 'startsWith':
+        matched = lower.str.startswith(term)
+    elif kind == 'endsWith':
+        matched = lower.str.endswith(term)
+    else:
+        return np.ones(len(values), dtype=bool)
+    return matched.to_numpy(dtype=bool)
+
+
+def _match_number_condition(values: np.ndarray, condition: Dict) -> np.ndarray:
+    """Булева маска для условия числового фильтра AgGrid."""
+    kind = condition.get('type', 'equals')
+    if kind == 'blank':
+        return np.zeros(len(values), dtype=bool)
+    if kind == 'notBlank':
+        return np.ones(len(values), dtype=bool)
+    
+    number = condition.get('filter')
+    if number is None:
+        return np.ones(len(values), dtype=bool)
+    if kind == 'equals':
+        return values == number
+    if kind == 'notEqual':
+        return values != number
+    if kind == 'lessThan':
+        return values < number
+    if kind == 'lessThanOrEqual':
+        return values <= number
+    if kind == 'greaterThan':
+        return values > number
+    if kind == 'greaterThanOrEqual':
+        return values >= number
+    if kind == 'inRange':
+        upper = condition.get('filterTo')
+        return (values >= number) if upper is None else (values >= number) & (values <= upper)
+    return np.ones(len(values), dtype=bool)
+
+
+def _match_column_filter(display: DisplayTable, title: str, positions: np.ndarray, model: Dict) -> np.ndarray:
+    """Булева маска для модели фильтра одной колонки (включая составные условия)."""
+    conditions = model.get('conditions')
+    if conditions:
+        masks = [_match_column_filter(display, title, positions, condition) for condition in conditions]
+        if model.get('operator', 'AND').upper() == 'OR':
+            return np.logical_or.reduce(masks)
+        return np.logical_and.reduce(masks)
+    values = display.column(title, positions)
+    if model.get('filterType') == 'number':
+        return _match_number_condition(values, model)
+    return _match_text_condition(values, display.lower(title, positions), model)
+
+
+def apply_filter_model(display: DisplayTable, positions: np.ndarray, filter_model: Optional[Dict]) -> np.ndarray:
+    """
+    Применяет модель фильтров колонок AgGrid к позициям каталога.
+    
+    Args:
+        display: Отображаемая таблица каталога
+        positions: Позиции строк, прошедших остальные фильтры
+        filter_model: Модель фильтров AgGrid ({заголовок колонки: модель фильтра})
+    
+    Returns:
+        Позиции строк, удовлетворяющих фильтрам колонок (порядок сохраняется)
+    """
+    for title, model in (filter_model or {}).items():
+        if not len(positions):
+            break
+        if title != ID_COLUMN and title not in LIST_COLUMNS:
+            continue
+        positions = positions[_match_column_filter(display, title, positions, model)]
+    return positions
+
+
+def sort_positions(display: DisplayTable, positions: np.ndarray, sort_model: Optional[List[Dict]]) -> np.ndarray:
+    """
+    Упорядочивает позиции каталога по модели сортировки AgGrid.
+    
+    Сортировка устойчивая: строки с равными ключами остаются в порядке каталога.
+    
+    Args:
+        display: Отображаемая таблица каталога
+        positions: Позиции строк
+        sort_model: Модель сортировки AgGrid (список {'colId': ..., 'sort': 'asc'|'desc'})
+    
+    Returns:
+        Позиции строк в порядке сортировки
+    """
+    keys = []
+    for item in sort_model or []:
+        title = item.get('colId')
+        if title != ID_COLUMN and title not in LIST_COLUMNS:
+            continue
+        # Ранги значений вместо самих строк: их можно сортировать по убыванию вычитанием
+        ranks = display.ranks(title, positions)
+        keys.append(-ranks if item.get('sort') == 'desc' else ranks)
+    if not keys or not len(positions):
+        return positions
+    # Для np.lexsort главный ключ - последний
+    return positions[np.lexsort(keys[::-1])]
+
+
+def page_count(total: int, page_size: int) -> int:
+    """Возвращает количество страниц (не меньше одной)."""
+    return max(1, -(-total // page_size))
+
+
+def page_positions(positions: Sequence[int], page: int, page_size: int) -> np.ndarray:
+    """
+    Возвращает позиции строк страницы.
+    
+    Args:
+        positions: Упорядоченные позиции всех строк выборки
+        page: Номер страницы (с единицы)
+        page_size: Размер страницы
+    
+    Returns:
+        Позиции строк страницы
+    """
+    start = (page - 1) * page_size
+    return np.asarray(positions[start:start + page_size], dtype=np.int64)
@@ -2,27 +2,94 @@
 Компонент для отображения списка контролей в табличном виде.
 """
 
+import copy
 import streamlit as st
+import numpy as np
 import pandas as pd
-from io import BytesIO
-from typing import List, Optional
-from openpyxl.utils import get_column_letter
+from functools import lru_cache
+from typing import Dict, Hashable, Optional, Sequence
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from ..models.control import Control
+from ..catalog.control_index import ControlIndex
+from ..export.formats import EXPORT_FORMATS, export_bytes
+from ..models.control_table import ControlTable
+from ..search.hybrid import get_search_engine
 from .filters import FilterState
+from .grid_query import (
+    DEFAULT_PAGE_SIZE, ID_COLUMN, LIST_COLUMNS, PAGE_SIZES, apply_filter_model, build_page_frame,
+    get_display_table, page_count, page_positions, sort_positions,
+)
 
 
-def render_controls_list(all_controls: List[Control], filter_state: FilterState, selected_control_id: Optional[str] = None) -> Optional[str]:
+# Ключ session_state с фильтрами и сортировкой колонок таблицы
+GRID_QUERY_KEY = 'controls_grid_query'
+# Ширина колонок таблицы
+COLUMN_WIDTHS = {
+    "ID": 80,
+    "Идентификатор": 150,
+    "Наименование": 200,
+    "URI": 200,
+    "Обязательный": 100,
+    "ДоступноИсправление": 150,
+    "Утверждение": 100,
+    "КодТаблицы": 150,
+    "Таксономия": 150,
+    "Рынок": 150,
+}
+
+
+@lru_cache(maxsize=1)
+def _base_grid_options() -> Dict:
+    """
+    Строит настройки AgGrid для таблицы контролей.
+    
+    Колонки и их типы не зависят от каталога, поэтому настройки строятся
+    один раз на процесс по пустой таблице тех же колонок.
+    
+    Returns:
+        Словарь gridOptions (не изменять - см. _grid_options)
+    """
+    gb = GridOptionsBuilder.from_dataframe(build_page_frame(ControlTable.from_controls([]), np.empty(0, dtype=np.int64)))
+    gb.configure_default_column(
+        filter=True,
+        sortable=True,
+        resizable=True,
+        editable=False
+    )
+    
+    # Настройка ширины колонок
+    for title, width in COLUMN_WIDTHS.items():
+        gb.configure_column(title, width=width)
+    
+    # Пагинация выполняется на сервере - в таблице только одна страница
+    gb.configure_pagination(enabled=False)
+    
+    # Настройка выбора строк
+    gb.configure_selection('single')
+    
+    return gb.build()
+
+
+def _grid_options() -> Dict:
+    """Возвращает копию настроек AgGrid, которую можно дополнять для текущего rerun."""
+    return copy.deepcopy(_base_grid_options())
+
+
+def render_controls_list(all_controls: ControlTable, filtered_positions: Sequence[int], filter_state: FilterState,
+                         control_index: ControlIndex, selected_control_id: Optional[str] = None,
+                         catalog_version: Optional[Hashable] = None) -> Optional[str]:
     """
     Отображает список контролей в табличном виде.
     
     Args:
-        all_controls: Список всех контролей (для фильтрации)
+        all_controls: Колоночная таблица всех контролей каталога
+        filtered_positions: Позиции контролей, прошедших фильтры (FilterState.select)
         filter_state: Объект состояния фильтров
-        selected_control_id: ID выбранного контроля
-        
+        control_index: Индекс первичных ключей каталога
+        selected_control_id: Первичный ключ выбранного контроля (см. catalog.control_index)
+        catalog_version: Версия каталога для кэша выгрузок (None - не кэшировать)
+    
     Returns:
-        ID выбранного контроля или None
+        Первичный ключ выбранного контроля или None
     """
     if not all_controls:
         st.info("Нет контролей для отображения")
@@ -30,9 +97,6 @@ def render_controls_list(all_controls: List[Control], filter_state: FilterState,
     
     st.header("📋 Список контролей")
     
-    # Применяем фильтры
-    controls = filter_state.apply_filters(all_controls)
-    
     # Быстрый поиск и кнопки в одной строке
     # Добавляем CSS для выравнивания высоты кнопок с высотой строки поиска
     st.markdown("""
@@ -103,9 +167,13 @@ def render_controls_list(all_controls: List[Control], filter_state: FilterState,
     """, unsafe_allow_html=True)
     
     # Создаем интерфейс поиска и кнопок
-    col_search, col_find, col_btn, col_export = st.columns([7, 1, 1, 1])
+    col_search, col_semantic, col_find, col_btn, col_format, col_export = st.columns([5, 1, 1, 1, 1, 1])
     with col_search:
         search_term = st.text_input("", placeholder="Быстрый поиск по таблице", key="quick_search", label_visibility="collapsed")
+    with col_semantic:
+        # Запрос к векторной БД (векторизация запроса моделью) - только по явному выбору пользователя
+        use_semantic = st.toggle("По смыслу", key='semantic_search',
+                                 help="Добавить в результаты контроли, близкие к запросу по смыслу (векторная БД)")
     with col_find:
         if st.button("Найти", use_container_width=True, key='find_button'):
             st.rerun()
@@ -116,140 +184,123 @@ def render_controls_list(all_controls: List[Control], filter_state: FilterState,
             # Удаляем ключ быстрого поиска из session_state (будет пересоздан с пустым значением)
             if 'quick_search' in st.session_state:
                 del st.session_state.quick_search
+            # Сбрасываем фильтры и сортировку колонок, примененные на сервере
+            st.session_state.pop(GRID_QUERY_KEY, None)
             # Увеличиваем счетчик для пересоздания таблицы (это сбросит фильтры AgGrid)
             if 'aggrid_reset_counter' not in st.session_state:
                 st.session_state.aggrid_reset_counter = 0
             st.session_state.aggrid_reset_counter += 1
             st.rerun()
+    with col_format:
+        export_format_name = st.selectbox(
+            "Формат выгрузки",
+            options=list(EXPORT_FORMATS),
+            format_func=lambda name: EXPORT_FORMATS[name].label,
+            key='export_format',
+            label_visibility="collapsed"
+        )
     with col_export:
         # Placeholder для кнопки экспорта (будет обновлен после подготовки данных)
         export_button_placeholder = st.empty()
     
-    # Подготавливаем данные для таблицы и экспорта
-    table_data = []
-    export_data = []
-    
-    for idx, control in enumerate(controls):
-        # Применяем быстрый поиск
-        if search_term:
-            search_lower = search_term.lower()
-            if not any(search_lower in str(val).lower() for val in [
-                control.identifier, control.name, control.table_code, 
-                control.taxonomy, control.market
-            ]):
-                continue
-        
-        # Обрезаем URI для отображения
-        uri_display = control.uri[:100] + "..." if len(control.uri) > 100 else control.uri
-        
-        # Данные для таблицы (с обрезанным URI и символами для чекбоксов)
-        table_data.append({
-            'ID': idx,
-            'Идентификатор': control.identifier or '',
-            'Наименование': control.name or '',
-            'URI': uri_display,
-            'Обязательный': '✓' if (control.required or '').lower() == 'да' else '',
-            'ДоступноИсправление': '✓' if (control.correction_available or '').lower() == 'да' else '',
-            'Утверждение': '✓' if (control.approval or '').lower() == 'да' else '',
-            'КодТаблицы': control.table_code or '',
-            'Таксономия': control.taxonomy or '',
-            'Рынок': control.market or '',
-        })
-        
-        # Данные для экспорта (с полными URI и исходными значениями)
-        export_data.append({
-            'ID': idx,
-            'Идентификатор': control.identifier or '',
-            'Наименование': control.name or '',
-            'URI': control.uri or '',
-            'Обязательный': control.required or '',
-            'ДоступноИсправление': control.correction_available or '',
-            'Утверждение': control.approval or '',
-            'КодТаблицы': control.table_code or '',
-            'Таксономия': control.taxonomy or '',
-            'Рынок': control.market or '',
-        })
+    # Быстрый поиск: выборку задает поиск подстрок по индексу триграмм (все слова
+    # запроса - части полей контроля, например начало кода или идентификатора).
+    # Внутри нее найденное BM25 по основам слов упорядочено по релевантности,
+    # остальное идет следом в порядке каталога. С переключателем «По смыслу»
+    # поиск гибридный (семантический по векторной БД, объединение RRF), и близкие
+    # по смыслу контроли добавляются к выборке
+    positions = np.asarray(filtered_positions, dtype=np.int64)
+    if search_term:
+        engine = get_search_engine(all_controls, catalog_version, control_index)
+        ranked = engine.search(search_term, positions, filters=filter_state.get_filters(), semantic=use_semantic)
+        matched = engine.quick(search_term, positions)
+        if not use_semantic:
+            ranked = ranked[np.isin(ranked, matched)]
+        positions = np.concatenate([ranked, matched[~np.isin(matched, ranked)]])
     
-    # Подготавливаем Excel файл для экспорта
-    excel_bytes = None
-    if export_data:
-        df_export = pd.DataFrame(export_data)
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_export.to_excel(writer, index=False, sheet_name='Контроли')
-            # Настраиваем ширину колонок
-            worksheet = writer.sheets['Контроли']
-            for col_idx, col in enumerate(df_export.columns, 1):
-                max_length = max(
-                    df_export[col].astype(str).map(len).max(),
-                    len(col)
-                )
-                # Ограничиваем максимальную ширину колонки
-                adjusted_width = min(max_length + 2, 50)
-                # Получаем букву колонки (A, B, C, ..., Z, AA, AB, ...)
-                col_letter = get_column_letter(col_idx)
-                worksheet.column_dimensions[col_letter].width = adjusted_width
-        
-        excel_bytes = output.getvalue()
+    # Фильтры и сортировка колонок таблицы применяются на сервере ко всей выборке
+    # по отображаемым значениям, построенным один раз на версию каталога
+    display = get_display_table(all_controls, catalog_version)
+    grid_query = st.session_state.get(GRID_QUERY_KEY, {})
+    positions = apply_filter_model(display, positions, grid_query.get('filter'))
+    positions = sort_positions(display, positions, grid_query.get('sort'))
     
-    # Обновляем кнопку экспорта в Excel
-    if excel_bytes:
+    # Состояние запроса: фильтры, строка поиска и фильтры/сортировка колонок таблицы
+    query_key = (tuple(sorted(filter_state.get_filters().items())), search_term, use_semantic, repr(grid_query))
+    if len(positions):
+        export_format = EXPORT_FORMATS[export_format_name]
         with export_button_placeholder.container():
-            st.download_button(
-                label="Выгрузить в Excel",
-                data=excel_bytes,
-                file_name="контроли.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True,
-                key='export_excel_button'
-            )
-    
-    if not table_data:
-        st.info("Нет результатов, соответствующих критериям поиска")
-        return None
-    
-    # Создаем DataFrame для отображения
-    df = pd.DataFrame(table_data)
+            missing = export_format.missing_packages()
+            if missing:
+                st.button("Выгрузить", disabled=True, use_container_width=True, key='export_download_button',
+                          help=f"Для выгрузки в {export_format.label} установите: {', '.join(missing)}")
+            else:
+                # Файл формируется только при нажатии кнопки (в момент скачивания)
+                # и не хранится между rerun-ами. Streamlit отдает файл из памяти, поэтому
+                # здесь он собирается целиком (export_bytes); потоковая запись без
+                # сборки в памяти - только при выгрузке в файл (write_export)
+                export_positions = positions
+                st.download_button(
+                    label="Выгрузить",
+                    data=lambda: export_bytes(all_controls, export_positions, export_format_name),
+                    file_name=f"контроли.{export_format.extension}",
+                    mime=export_format.mime,
+                    on_click='ignore',
+                    use_container_width=True,
+                    key='export_download_button'
+                )
     
     # Инициализируем счетчик для сброса таблицы
     if 'aggrid_reset_counter' not in st.session_state:
         st.session_state.aggrid_reset_counter = 0
     
-    # Настройка AgGrid с встроенными фильтрами в колонках
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(
-        filter=True,
-        sortable=True,
-        resizable=True,
-        editable=False
-    )
-    
-    # Настройка ширины колонок
-    gb.configure_column("ID", width=80)
-    gb.configure_column("Идентификатор", width=150)
-    gb.configure_column("Наименование", width=200)
-    gb.configure_column("URI", width=200)
-    gb.configure_column("Обязательный", width=100)
-    gb.configure_column("ДоступноИсправление", width=150)
-    gb.configure_column("Утверждение", width=100)
-    gb.configure_column("КодТаблицы", width=150)
-    gb.configure_column("Таксономия", width=150)
-    gb.configure_column("Рынок", width=150)
+    if not len(positions) and not grid_query:
+        st.info("Нет результатов, соответствующих критериям поиска")
+        return None
     
-    # Отключаем пагинацию - показываем все элементы на одной странице
-    gb.configure_pagination(enabled=False)
+    # Постраничный вывод: в браузер передаются только строки текущей страницы
+    col_info, col_page_size, col_page = st.columns([6, 2, 2])
+    with col_page_size:
+        page_size = st.selectbox("Строк на странице", options=PAGE_SIZES,
+                                 index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key='list_page_size')
+    pages = page_count(len(positions), page_size)
+    # При изменении выборки или версии каталога возвращаемся на первую страницу
+    query_signature = (catalog_version, len(all_controls), query_key, page_size)
+    if st.session_state.get('list_query_signature') != query_signature:
+        st.session_state.list_query_signature = query_signature
+        st.session_state.list_page = 1
+    elif st.session_state.get('list_page', 1) > pages:
+        st.session_state.list_page = pages
+    with col_page:
+        page = st.number_input("Страница", min_value=1, max_value=pages, step=1, key='list_page')
+    page_rows = page_positions(positions, int(page), page_size)
+    with col_info:
+        if len(page_rows):
+            first_row = (int(page) - 1) * page_size + 1
+            st.caption(f"Строки {first_row}–{first_row + len(page_rows) - 1} из {len(positions)} "
+                       f"(страница {int(page)} из {pages})")
+        else:
+            st.caption("Нет результатов, соответствующих фильтрам колонок")
     
-    # Настройка выбора строк
-    gb.configure_selection('single')
+    # Данные для таблицы (только строки страницы, флаги отображаются символом ✓)
+    df = display.page_frame(page_rows)
     
-    grid_options = gb.build()
+    grid_options = _grid_options()
+    # Восстанавливаем фильтры и сортировку колонок, если таблица создается заново
+    if grid_query:
+        grid_options['initialState'] = {
+            'filter': {'filterModel': grid_query.get('filter') or {}},
+            'sort': {'sortModel': grid_query.get('sort') or []},
+        }
     
     # Отображаем таблицу с встроенными фильтрами в колонках
     # Используем счетчик в ключе для пересоздания таблицы при сбросе фильтров
     grid_response = AgGrid(
         df,
         gridOptions=grid_options,
-        update_mode=GridUpdateMode.SELECTION_CHANGED,
+        # Изменение фильтров и сортировки колонок вызывает rerun, чтобы применить их ко всей выборке
+        update_mode=(GridUpdateMode.SELECTION_CHANGED | GridUpdateMode.FILTERING_CHANGED
+                     | GridUpdateMode.SORTING_CHANGED),
         allow_unsafe_jscode=True,
         theme='streamlit',
         height=800,
@@ -257,29 +308,32 @@ def render_controls_list(all_controls: List[Control], filter_state: FilterState,
         key=f'controls_table_{st.session_state.aggrid_reset_counter}'
     )
     
+    # Изменение фильтров или сортировки в заголовках колонок применяется ко всей выборке
+    grid_state = grid_response.grid_state or {}
+    new_query = {
+        'filter': (grid_state.get('filter') or {}).get('filterModel') or {},
+        'sort': (grid_state.get('sort') or {}).get('sortModel') or [],
+    }
+    if grid_state and new_query != {'filter': grid_query.get('filter') or {}, 'sort': grid_query.get('sort') or []}:
+        st.session_state[GRID_QUERY_KEY] = new_query if (new_query['filter'] or new_query['sort']) else {}
+        st.rerun()
+    
     # Получаем выбранную строку
     selected_rows = grid_response.get('selected_rows', [])
     
-    # Обработка выбранной строки из AgGrid
-    if selected_rows is not None:
-        # selected_rows может быть DataFrame или списком словарей
-        if isinstance(selected_rows, pd.DataFrame):
-            if not selected_rows.empty:
-                selected_row = selected_rows.iloc[0].to_dict()
-                selected_identifier = selected_row.get('Идентификатор', '')
-                for idx, control in enumerate(controls):
-                    if control.identifier == selected_identifier:
-                        return f"{control.identifier}_{idx}"
-        elif isinstance(selected_rows, list):
-            if len(selected_rows) > 0:
-                selected_row = selected_rows[0]
-                if isinstance(selected_row, dict):
-                    selected_identifier = selected_row.get('Идентификатор', '')
-                else:
-                    selected_identifier = getattr(selected_row, 'Идентификатор', '')
-                for idx, control in enumerate(controls):
-                    if control.identifier == selected_identifier:
-                        return f"{control.identifier}_{idx}"
+    # Обработка выбранной строки из AgGrid (колонка ID - позиция контроля в каталоге)
+    selected_row = None
+    if isinstance(selected_rows, pd.DataFrame):
+        if not selected_rows.empty:
+            selected_row = selected_rows.iloc[0].to_dict()
+    elif isinstance(selected_rows, list) and selected_rows:
+        selected_row = selected_rows[0]
+        if not isinstance(selected_row, dict):
+            selected_row = {ID_COLUMN: getattr(selected_row, ID_COLUMN, None)}
+    
+    if selected_row is not None and selected_row.get(ID_COLUMN) is not None:
+        position = int(selected_row[ID_COLUMN])
+        if 0 <= position < len(all_controls):
+            return control_index.key(position)
     
     return selected_control_id
-
@@ -2,19 +2,28 @@
 Главный файл Streamlit приложения информационной системы по дополнительным контролям.
 """
 
+import logging
 import streamlit as st
 import sys
 from pathlib import Path
+from typing import Dict, Optional
 
 # Добавляем корневую директорию проекта в путь для импортов
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.parser.xml_parser import load_controls
-from src.models.control import Control
+from src.catalog.store import ControlStore, get_control_store
+from src.catalog.watcher import watch_control_store
 from src.gui.filters import FilterState
+from src.gui.grid_query import get_display_table
 from src.gui.list_view import render_controls_list
 from src.gui.details_view import render_control_details
+from src.gui.diff_view import render_catalog_diff
+from src.search.hybrid import get_search_engine
+from src.vector_db.chroma_manager import ChromaDBManager
+from src.vector_db.registry import DEFAULT_DB_PATH, warm_up
+
+logger = logging.getLogger(__name__)
 
 
 # Настройка страницы
@@ -39,64 +48,132 @@ st.markdown("""
 
 # Путь к XML файлу (фиксированный, настраивается администратором)
 XML_FILE_PATH = project_root / "Template.xml"
+# Каталог с другими версиями макета (*.xml) для просмотра и сравнения
+TEMPLATES_DIR = project_root / "templates"
+# Синхронизировать векторную БД при обновлении Template.xml (настраивается администратором)
+AUTO_SYNC_VECTOR_DB = False
 
 # Инициализация состояния сессии
-if 'controls' not in st.session_state:
-    st.session_state.controls = []
+# Сами контроли хранятся в общем для процесса каталоге (src.catalog.store),
+# в сессии - только выбранный контроль и версия каталога
 if 'selected_control_id' not in st.session_state:
     st.session_state.selected_control_id = None
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = False
+if 'catalog_version' not in st.session_state:
+    st.session_state.catalog_version = None
 
 
-def load_controls_from_xml(xml_path: str) -> list[Control]:
+def load_control_store(xml_path: str) -> Optional[ControlStore]:
     """
-    Загружает контроли из XML файла.
+    Возвращает общий каталог контролей, загруженный из XML файла.
+    
+    Каталог загружается один раз на процесс (с использованием бинарного
+    кэша) и разделяется всеми сессиями; новые версии публикует поток
+    отслеживания макета.
     
     Args:
         xml_path: Путь к XML файлу
-        
+    
     Returns:
-        Список контролей
+        Каталог контролей или None при ошибке загрузки
     """
     try:
-        controls = load_controls(xml_path)
-        return controls
+        return get_control_store(xml_path, check_source=False)
     except Exception as e:
         st.error(f"Ошибка при загрузке XML: {str(e)}")
-        return []
+        return None
+
+
+def available_templates() -> Dict[str, Path]:
+    """
+    Возвращает доступные версии макета.
+    
+    Returns:
+        Словарь {название: путь}; первым идет основной Template.xml
+    """
+    templates = {XML_FILE_PATH.name: XML_FILE_PATH}
+    if TEMPLATES_DIR.is_dir():
+        for path in sorted(TEMPLATES_DIR.glob('*.xml')):
+            templates[f"{TEMPLATES_DIR.name}/{path.name}"] = path
+    return templates
+
+
+def on_catalog_published(store: ControlStore) -> None:
+    """
+    Готовит новую версию каталога в потоке отслеживания макета.
+    
+    Индексы поиска и таблица списка строятся до первого обращения сессий,
+    векторная БД (если включено AUTO_SYNC_VECTOR_DB и БД создана)
+    синхронизируется инкрементально.
+    
+    Args:
+        store: Опубликованный снимок каталога
+    """
+    get_display_table(store.controls, store.cache_key)
+    engine = get_search_engine(store.controls, store.cache_key, store.index)
+    
+    # Векторная БД построена по основному макету
+    if AUTO_SYNC_VECTOR_DB and store.source_path == XML_FILE_PATH.resolve() and Path(DEFAULT_DB_PATH).is_dir():
+        plan = ChromaDBManager(db_path=DEFAULT_DB_PATH).sync_from_controls(store.controls)
+        # Поиск перечитывает коллекцию (значения категорий для фильтров) и забывает прежние результаты
+        engine.reset_semantic()
+        logger.info("Векторная БД синхронизирована: векторизовано %d, обновлены метаданные: %d, удалено: %d",
+                    len(plan.embed), len(plan.update_metadata), len(plan.delete))
 
 
 def main():
     """Главная функция приложения."""
     
-    # Автоматическая загрузка данных при первом запуске
-    if not st.session_state.data_loaded:
-        if XML_FILE_PATH.exists():
-            with st.spinner("Загрузка данных..."):
-                controls = load_controls_from_xml(str(XML_FILE_PATH))
-                if controls:
-                    st.session_state.controls = controls
-                    st.session_state.data_loaded = True
-                    st.session_state.selected_control_id = None
-                    st.success(f"✅ Загружено {len(controls)} контролей")
-                    st.rerun()
-                else:
-                    st.error("Не удалось загрузить контроли из файла")
-                    st.stop()
-        else:
-            st.error(f"❌ Файл Template.xml не найден по пути: {XML_FILE_PATH}")
-            st.info("Обратитесь к администратору для настройки файла макета.")
-            st.stop()
-    
-    controls = st.session_state.controls
+    # Модель эмбеддингов и клиент ChromaDB загружаются в фоне один раз на процесс,
+    # чтобы первый семантический поиск не ждал загрузки модели
+    warm_up()
+    
+    if not XML_FILE_PATH.exists():
+        st.error(f"❌ Файл Template.xml не найден по пути: {XML_FILE_PATH}")
+        st.info("Обратитесь к администратору для настройки файла макета.")
+        st.stop()
     
     # Заголовок
     st.title("📊 Информационная система по дополнительным контролям")
     
+    # Версия макета для просмотра (основной Template.xml или версия из каталога templates)
+    templates = available_templates()
+    template_name = XML_FILE_PATH.name
+    if len(templates) > 1:
+        template_name = st.selectbox("Версия макета", options=list(templates), key='template_name')
+    xml_path = templates[template_name]
+    
+    # Изменения макетов отслеживают фоновые потоки (один на файл для процесса): они перечитывают
+    # макет и публикуют новую версию каталога, сессии не ждут разбора файла
+    for path in templates.values():
+        watch_control_store(str(path), listeners=[on_catalog_published])
+    
+    with st.spinner("Загрузка данных..."):
+        store = load_control_store(str(xml_path))
+    if store is None or not store.controls:
+        st.error("Не удалось загрузить контроли из файла")
+        st.stop()
+    
+    # При смене версии каталога (или макета) выбор сохраняется по первичному ключу
+    # и сбрасывается, только если контроля нет в этой версии
+    if st.session_state.catalog_version != store.cache_key:
+        st.session_state.catalog_version = store.cache_key
+        if store.index.position(st.session_state.selected_control_id) is None:
+            st.session_state.selected_control_id = None
+    
+    controls = store.controls
+    
+    # Сравнение версий макета (различия считаются только по запросу пользователя)
+    if len(templates) > 1:
+        with st.expander("🔀 Сравнение версий макета"):
+            render_catalog_diff(templates)
+    
     # Инициализируем состояние фильтров
     filter_state = FilterState()
     
+    # Фильтры применяются один раз за rerun; результат (позиции в каталоге)
+    # кэшируется по версии каталога и значениям фильтров
+    filtered_positions = filter_state.select(store.filter_engine)
+    
     # Добавляем CSS для прокрутки нижней панели
     st.markdown("""
     <style>
@@ -116,8 +193,10 @@ def main():
     """, unsafe_allow_html=True)
     
     # Верхняя панель - список контролей
-    # Список контролей (фильтры отображаются и применяются внутри)
-    selected_id = render_controls_list(controls, filter_state, st.session_state.selected_control_id)
+    selected_id = render_controls_list(
+        controls, filtered_positions, filter_state, store.index, st.session_state.selected_control_id,
+        catalog_version=store.cache_key
+    )
     if selected_id:
         st.session_state.selected_control_id = selected_id
     
@@ -125,9 +204,8 @@ def main():
     st.divider()
     
     # Нижняя панель - описание контроля
-    # Описание контроля (применяем фильтры для консистентности)
-    filtered_controls = filter_state.apply_filters(controls)
-    render_control_details(filtered_controls, st.session_state.selected_control_id)
+    # Позиция выбранного контроля находится по первичному ключу через индекс каталога
+    render_control_details(controls, st.session_state.selected_control_id, store.index)
 
 
 if __name__ == "__main__":
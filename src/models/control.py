@@ -6,11 +6,28 @@ from dataclasses import dataclass
 from typing import Optional, List
 
 
-@dataclass
+# Поля с небольшим количеством различных значений (флаги да/нет, коды, справочники).
+# При разборе макета их значения интернируются, в ControlTable хранятся как категориальные.
+CATEGORICAL_FIELDS = (
+    'correction_available',
+    'required',
+    'approval',
+    'table_code',
+    'based_on_cbr_requirement',
+    'cbr_approval_code',
+    'taxonomy',
+    'market',
+)
+
+
+@dataclass(slots=True)
 class Control:
     """
     Модель данных контроля дополнительной проверки.
     
+    Класс использует __slots__: у экземпляров нет собственного __dict__,
+    что заметно уменьшает память на больших каталогах.
+    
     Атрибуты:
         uri: URI (ссылки на XSD-схемы, разделенные точкой с запятой)
         identifier: Идентификатор контроля
@@ -0,0 +1,271 @@
+"""
+Колоночное представление каталога контролей.
+
+Каждое поле Control хранится отдельной колонкой NumPy: поля с небольшим
+количеством различных значений (флаги да/нет, код таблицы, таксономия,
+рынок и т.п.) - как категориальные (коды + словарь значений), остальные -
+как массивы строк. Доступ к отдельному контролю выполняется через легкое
+представление строки ControlRow, совместимое с Control по атрибутам, методам
+и сравнению (но не по типу).
+"""
+
+from collections import abc
+from dataclasses import fields
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .control import CATEGORICAL_FIELDS, Control
+
+
+# Поля модели в порядке объявления
+CONTROL_FIELDS = tuple(f.name for f in fields(Control))
+
+_FIELD_SET = frozenset(CONTROL_FIELDS)
+
+
+def _compact_codes(codes: np.ndarray, category_count: int) -> np.ndarray:
+    """Приводит коды категорий к минимальному целочисленному типу."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if category_count <= np.iinfo(dtype).max:
+            return codes.astype(dtype, copy=False)
+    return codes.astype(np.int64, copy=False)
+
+
+class ControlRow:
+    """
+    Легкое представление строки ControlTable.
+    
+    Поддерживает те же атрибуты и методы, что и Control (get_uri_list,
+    to_dict, get_text_for_embedding), не копируя данные строки заранее:
+    значение поля читается из таблицы при первом обращении и запоминается
+    в строке, повторные обращения - обычное чтение атрибута.
+    
+    ControlRow не является Control (isinstance(row, Control) ложно), но
+    сравнивается (==) с Control и другими строками по значениям полей, как
+    сам Control; как и Control, не хешируется. Где нужен объект Control,
+    используйте to_control().
+    """
+    
+    __slots__ = ('_table', '_position', '__dict__')
+    
+    def __init__(self, table: 'ControlTable', position: int):
+        self._table = table
+        self._position = position
+    
+    def __getattr__(self, name: str):
+        # Вызывается только для полей, еще не прочитанных из таблицы
+        if name in _FIELD_SET:
+            value = self.__dict__[name] = self._table.value(name, self._position)
+            return value
+        raise AttributeError(name)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ControlRow, Control)):
+            return all(getattr(self, name) == getattr(other, name) for name in CONTROL_FIELDS)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"ControlRow({self._position}, identifier={self.identifier!r})"
+    
+    @property
+    def position(self) -> int:
+        """Позиция строки в таблице."""
+        return self._position
+    
+    def to_control(self) -> Control:
+        """Материализует строку в объект Control."""
+        return Control(**self.to_dict())
+    
+    # Методы Control работают только с атрибутами полей, поэтому переиспользуются как есть
+    get_uri_list = Control.get_uri_list
+    to_dict = Control.to_dict
+    get_text_for_embedding = Control.get_text_for_embedding
+
+
+class ControlTable(abc.Sequence):
+    """
+    Колоночная таблица контролей.
+    
+    Ведет себя как последовательность ControlRow, поэтому код, работающий
+    со списком Control (индексация, итерация, len), продолжает работать.
+    """
+    
+    def __init__(self, length: int, values: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], categories: Dict[str, np.ndarray]):
+        """
+        Инициализирует таблицу из готовых колонок.
+        
+        Args:
+            length: Количество строк
+            values: Колонки строк (dtype=object) для некатегориальных полей
+            codes: Коды категорий для категориальных полей
+            categories: Словари значений категориальных полей (dtype=object)
+        """
+        self._length = length
+        self._values = values
+        self._codes = codes
+        self._categories = categories
+    
+    @classmethod
+    def from_controls(cls, controls: Iterable[Control]) -> 'ControlTable':
+        """
+        Строит таблицу из последовательности контролей.
+        
+        Args:
+            controls: Контроли (Control или совместимые объекты)
+        
+        Returns:
+            Колоночная таблица
+        """
+        controls = list(controls)
+        columns = {name: [getattr(c, name) for c in controls] for name in CONTROL_FIELDS}
+        return cls.from_columns(len(controls), columns)
+    
+    @classmethod
+    def from_columns(cls, length: int, columns: Dict[str, Sequence[str]]) -> 'ControlTable':
+        """
+        Строит таблицу из колонок значений.
+        
+        Args:
+            length: Количество строк
+            columns: Словарь {поле: последовательность значений}
+        
+        Returns:
+            Колоночная таблица
+        """
+        values, codes, categories = {}, {}, {}
+        for name in CONTROL_FIELDS:
+            column = np.empty(length, dtype=object)
+            column[:] = columns[name]
+            if name in CATEGORICAL_FIELDS:
+                field_codes, uniques = pd.factorize(column)
+                codes[name] = _compact_codes(field_codes, len(uniques))
+                categories[name] = np.asarray(uniques, dtype=object)
+            else:
+                values[name] = column
+        return cls(length, values, codes, categories)
+    
+    @classmethod
+    def from_dictionary_columns(cls, length: int, columns: Dict[str, tuple]) -> 'ControlTable':
+        """
+        Строит таблицу из словарно-кодированных колонок (формат бинарного кэша).
+        
+        Args:
+            length: Количество строк
+            columns: Словарь {поле: (список уникальных значений, массив кодов)}
+        
+        Returns:
+            Колоночная таблица
+        """
+        values, codes, categories = {}, {}, {}
+        for name in CONTROL_FIELDS:
+            uniques, field_codes = columns[name]
+            dictionary = np.empty(len(uniques), dtype=object)
+            dictionary[:] = uniques
+            field_codes = np.asarray(field_codes)
+            if name in CATEGORICAL_FIELDS:
+                codes[name] = _compact_codes(field_codes, len(uniques))
+                categories[name] = dictionary
+            else:
+                values[name] = dictionary.take(field_codes)
+        return cls(length, values, codes, categories)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [ControlRow(self, i) for i in range(*index.indices(self._length))]
+        position = int(index)
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("Индекс контроля вне диапазона")
+        return ControlRow(self, position)
+    
+    def __iter__(self) -> Iterator[ControlRow]:
+        for position in range(self._length):
+            yield ControlRow(self, position)
+    
+    def value(self, name: str, position: int) -> str:
+        """Возвращает значение поля в строке."""
+        column_codes = self._codes.get(name)
+        if column_codes is not None:
+            return self._categories[name][column_codes[position]]
+        return self._values[name][position]
+    
+    def column(self, name: str, positions: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Возвращает колонку поля в виде массива строк.
+        
+        Args:
+            name: Имя поля
+            positions: Позиции строк (по умолчанию - все строки)
+        
+        Returns:
+            Массив значений (dtype=object)
+        """
+        column_codes = self._codes.get(name)
+        if column_codes is not None:
+            if positions is not None:
+                column_codes = column_codes[positions]
+            return self._categories[name].take(column_codes)
+        column = self._values[name]
+        return column if positions is None else column[positions]
+    
+    def categorical(self, name: str, positions: Optional[Sequence[int]] = None) -> pd.Categorical:
+        """Возвращает категориальную колонку (коды без копирования словаря)."""
+        column_codes = self._codes[name]
+        if positions is not None:
+            column_codes = column_codes[positions]
+        return pd.Categorical.from_codes(column_codes, categories=pd.Index(self._categories[name]))
+    
+    def categories(self, name: str) -> np.ndarray:
+        """Возвращает словарь значений категориального поля."""
+        return self._categories[name]
+    
+    def codes(self, name: str) -> np.ndarray:
+        """Возвращает коды категориального поля."""
+        return self._codes[name]
+    
+    def to_frame(self, positions: Optional[Sequence[int]] = None,
+                 columns: Sequence[str] = CONTROL_FIELDS) -> pd.DataFrame:
+        """
+        Строит DataFrame по выбранным строкам и полям.
+        
+        Категориальные поля возвращаются как pandas Categorical. Индекс
+        DataFrame - позиции строк в таблице.
+        
+        Args:
+            positions: Позиции строк (по умолчанию - все строки)
+            columns: Поля, попадающие в DataFrame
+        
+        Returns:
+            DataFrame с колонками-полями Control
+        """
+        if positions is None:
+            index = pd.RangeIndex(self._length)
+        else:
+            positions = np.asarray(positions, dtype=np.int64)
+            index = pd.Index(positions)
+        data = {}
+        for name in columns:
+            if name in self._codes:
+                data[name] = self.categorical(name, None if positions is None else positions)
+            else:
+                data[name] = self.column(name, positions)
+        return pd.DataFrame(data, index=index)
+    
+    def to_controls(self) -> List[Control]:
+        """Материализует все строки в список Control."""
+        columns = [self.column(name).tolist() for name in CONTROL_FIELDS]
+        return list(map(Control, *columns))
+    
+    def nbytes(self) -> int:
+        """Возвращает объем памяти массивов колонок (без самих строк)."""
+        arrays = list(self._values.values()) + list(self._codes.values()) + list(self._categories.values())
+        return sum(a.nbytes for a in arrays)
@@ -0,0 +1,327 @@
+"""
+Бинарный кэш разобранных контролей на диске.
+
+Разбор большого Template.xml занимает секунды, поэтому результат
+сохраняется в компактном колоночном формате без pickle. Кэш привязан
+к размеру, времени изменения и SHA-256 содержимого исходного файла.
+
+Формат файла (little-endian):
+    MAGIC, версия формата
+    размер исходного файла, mtime (нс), SHA-256 содержимого
+    количество строк, количество колонок
+    для каждой колонки (в порядке полей Control):
+        имя поля
+        словарь уникальных значений (UTF-8, разделитель \\x00)
+        коды строк (массив uint8/uint16/uint32 индексов в словаре)
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import threading
+from array import array
+from dataclasses import fields
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..models.control import Control
+from ..models.control_table import ControlTable
+from .xml_parser import parse_template_xml
+
+
+MAGIC = b'CTLCACHE'
+FORMAT_VERSION = 1
+
+# Поля модели в порядке позиционных аргументов конструктора
+CONTROL_FIELDS = tuple(f.name for f in fields(Control))
+
+_HEADER = struct.Struct('<8sHQq32sIH')
+_STRING_SEPARATOR = '\x00'
+_CODE_TYPES = ((0xFF, 'B'), (0xFFFF, 'H'), (0xFFFFFFFF, 'I'))
+_CODE_TYPECODES = tuple(typecode for _, typecode in _CODE_TYPES)
+
+
+class SourceKey(NamedTuple):
+    """
+    Ключ исходного файла, к которому привязан кэш.
+    
+    Атрибуты:
+        size: Размер файла в байтах
+        mtime_ns: Время последнего изменения (наносекунды)
+        sha256: SHA-256 содержимого файла
+    """
+    size: int
+    mtime_ns: int
+    sha256: bytes
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> bytes:
+    """Вычисляет SHA-256 содержимого файла, читая его блоками."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def default_cache_path(xml_path: Path) -> Path:
+    """Возвращает путь к кэшу по умолчанию (.cache рядом с макетом)."""
+    xml_path = Path(xml_path)
+    return xml_path.parent / '.cache' / f'{xml_path.name}.controls'
+
+
+def _write_blob(f, data: bytes) -> None:
+    f.write(struct.pack('<Q', len(data)))
+    f.write(data)
+
+
+def _read_blob(f) -> bytes:
+    (length,) = struct.unpack('<Q', f.read(8))
+    if length > os.fstat(f.fileno()).st_size - f.tell():
+        raise ValueError("Файл кэша обрезан")
+    data = f.read(length)
+    if len(data) != length:
+        raise ValueError("Файл кэша обрезан")
+    return data
+
+
+def _native_to_le(codes: array) -> bytes:
+    if sys.byteorder != 'little':
+        codes = array(codes.typecode, codes)
+        codes.byteswap()
+    return codes.tobytes()
+
+
+def save_controls_cache(cache_path: Path, key: SourceKey, controls: Sequence[Control]) -> None:
+    """
+    Сохраняет контроли в кэш (атомарно, через временный файл).
+    
+    Args:
+        cache_path: Путь к файлу кэша
+        key: Ключ исходного файла
+        controls: Список контролей (или колоночная таблица)
+    """
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # Временный файл уникален для процесса и потока: кэш могут записывать несколько потоков сразу
+    tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, key.size, key.mtime_ns, key.sha256,
+                                 len(controls), len(CONTROL_FIELDS)))
+            for field_name in CONTROL_FIELDS:
+                # Словарное кодирование: повторяющиеся значения хранятся один раз
+                dictionary = {}
+                codes = [dictionary.setdefault(getattr(c, field_name), len(dictionary)) for c in controls]
+                typecode = next(t for limit, t in _CODE_TYPES if len(dictionary) <= limit)
+                
+                _write_blob(f, field_name.encode('utf-8'))
+                f.write(struct.pack('<I', len(dictionary)))
+                _write_blob(f, _STRING_SEPARATOR.join(dictionary).encode('utf-8'))
+                f.write(typecode.encode('ascii'))
+                _write_blob(f, _native_to_le(array(typecode, codes)))
+        os.replace(tmp_path, cache_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def read_cache_key(cache_path: Path) -> Optional[SourceKey]:
+    """
+    Читает только заголовок кэша.
+    
+    Returns:
+        Ключ исходного файла или None, если кэш отсутствует или несовместим
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(header) != _HEADER.size:
+        return None
+    magic, version, size, mtime_ns, sha256, _, _ = _HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return SourceKey(size, mtime_ns, sha256)
+
+
+def _read_dictionary_columns(cache_path: Path) -> Tuple[int, Dict[str, Tuple[List[str], array]]]:
+    """
+    Читает словарно-кодированные колонки из кэша.
+    
+    Returns:
+        Кортеж (количество строк, {поле: (уникальные значения, коды строк)})
+    
+    Raises:
+        ValueError: Если файл кэша поврежден или не совпадает схема полей
+    """
+    with open(cache_path, 'rb') as f:
+        magic, version, _, _, _, row_count, column_count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Неподдерживаемый формат кэша")
+        if column_count != len(CONTROL_FIELDS):
+            raise ValueError("Схема кэша не совпадает с моделью Control")
+        
+        columns = {}
+        for field_name in CONTROL_FIELDS:
+            if _read_blob(f).decode('utf-8') != field_name:
+                raise ValueError("Схема кэша не совпадает с моделью Control")
+            (unique_count,) = struct.unpack('<I', f.read(4))
+            blob = _read_blob(f).decode('utf-8')
+            values = blob.split(_STRING_SEPARATOR) if unique_count else []
+            if len(values) != unique_count:
+                raise ValueError("Файл кэша поврежден")
+            
+            typecode = f.read(1).decode('ascii')
+            if typecode not in _CODE_TYPECODES:
+                raise ValueError("Файл кэша поврежден")
+            codes = array(typecode)
+            codes.frombytes(_read_blob(f))
+            if sys.byteorder != 'little':
+                codes.byteswap()
+            if len(codes) != row_count or (row_count and max(codes) >= unique_count):
+                raise ValueError("Файл кэша поврежден")
+            columns[field_name] = (values, codes)
+    return row_count, columns
+
+
+def load_controls_cache(cache_path: Path) -> List[Control]:
+    """
+    Загружает контроли из кэша.
+    
+    Args:
+        cache_path: Путь к файлу кэша
+    
+    Returns:
+        Список объектов Control
+    
+    Raises:
+        ValueError: Если файл кэша поврежден или не совпадает схема полей
+    """
+    row_count, columns = _read_dictionary_columns(cache_path)
+    if not row_count:
+        return []
+    # Порядок колонок совпадает с порядком позиционных аргументов Control
+    decoded = [list(map(values.__getitem__, codes)) for values, codes in columns.values()]
+    return list(map(Control, *decoded))
+
+
+def load_control_table_cache(cache_path: Path) -> ControlTable:
+    """
+    Загружает контроли из кэша сразу в колоночную таблицу.
+    
+    Словарное кодирование кэша напрямую становится категориальными колонками,
+    объекты Control не создаются.
+    
+    Args:
+        cache_path: Путь к файлу кэша
+    
+    Returns:
+        Колоночная таблица контролей
+    
+    Raises:
+        ValueError: Если файл кэша поврежден или не совпадает схема полей
+    """
+    row_count, columns = _read_dictionary_columns(cache_path)
+    return ControlTable.from_dictionary_columns(row_count, columns)
+
+
+def _load_cached(xml_path: str, cache_path: Optional[str], read_cache: Callable, from_controls: Callable):
+    """
+    Общая логика загрузки с проверкой актуальности кэша.
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
+        cache_path: Путь к файлу кэша (по умолчанию .cache рядом с макетом)
+        read_cache: Функция чтения кэша в нужное представление
+        from_controls: Преобразование списка Control (после разбора XML) в то же представление
+    """
+    xml_path = Path(xml_path)
+    if not xml_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {xml_path}")
+    cache_path = Path(cache_path) if cache_path else default_cache_path(xml_path)
+    
+    stat = xml_path.stat()
+    cached_key = read_cache_key(cache_path)
+    sha256 = None
+    
+    if cached_key is not None and cached_key.size == stat.st_size:
+        if cached_key.mtime_ns != stat.st_mtime_ns:
+            sha256 = file_sha256(xml_path)
+        if cached_key.mtime_ns == stat.st_mtime_ns or cached_key.sha256 == sha256:
+            try:
+                result = read_cache(cache_path)
+            except (OSError, ValueError, TypeError, IndexError, struct.error, UnicodeDecodeError):
+                # Поврежденный кэш не должен мешать загрузке - каталог разбирается заново
+                result = None
+            if result is not None:
+                if cached_key.mtime_ns != stat.st_mtime_ns:
+                    # Содержимое то же - обновляем ключ, чтобы не хешировать файл повторно
+                    _try_update_key(cache_path, SourceKey(stat.st_size, stat.st_mtime_ns, sha256))
+                return result
+    
+    if sha256 is None:
+        sha256 = file_sha256(xml_path)
+    controls = parse_template_xml(str(xml_path))
+    _try_save(cache_path, SourceKey(stat.st_size, stat.st_mtime_ns, sha256), controls)
+    return from_controls(controls)
+
+
+def load_controls_cached(xml_path: str, cache_path: Optional[str] = None) -> List[Control]:
+    """
+    Загружает контроли из кэша, а при его отсутствии или устаревании - из XML.
+    
+    Кэш считается актуальным, если совпадают размер и mtime исходного файла.
+    Если изменился только mtime (например, после git checkout), сверяется
+    SHA-256 содержимого, и при совпадении кэш используется без разбора XML.
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
+        cache_path: Путь к файлу кэша (по умолчанию .cache рядом с макетом)
+    
+    Returns:
+        Список объектов Control
+    
+    Raises:
+        FileNotFoundError: Если файл не найден
+    """
+    return _load_cached(xml_path, cache_path, load_controls_cache, list)
+
+
+def load_control_table_cached(xml_path: str, cache_path: Optional[str] = None) -> ControlTable:
+    """
+    Загружает каталог в колоночную таблицу через кэш (см. load_controls_cached).
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
+        cache_path: Путь к файлу кэша (по умолчанию .cache рядом с макетом)
+    
+    Returns:
+        Колоночная таблица контролей
+    
+    Raises:
+        FileNotFoundError: Если файл не найден
+    """
+    return _load_cached(xml_path, cache_path, load_control_table_cache, ControlTable.from_controls)
+
+
+def _try_update_key(cache_path: Path, key: SourceKey) -> None:
+    """Перезаписывает ключ в заголовке кэша, не трогая колонки."""
+    try:
+        with open(cache_path, 'r+b') as f:
+            magic, version, _, _, _, row_count, column_count = _HEADER.unpack(f.read(_HEADER.size))
+            f.seek(0)
+            f.write(_HEADER.pack(magic, version, key.size, key.mtime_ns, key.sha256, row_count, column_count))
+    except (OSError, struct.error):
+        pass
+
+
+def _try_save(cache_path: Path, key: SourceKey, controls: Sequence[Control]) -> None:
+    """Сохраняет кэш, игнорируя ошибки записи (кэш - только оптимизация)."""
+    try:
+        save_controls_cache(cache_path, key, controls)
+    except OSError:
+        pass
@@ -2,11 +2,12 @@
 Парсер XML-макета Template.xml для извлечения данных о контролях.
 """
 
+import sys
 import xml.etree.ElementTree as ET
-from typing import List, Optional
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
 from pathlib import Path
 
-from ..models.control import Control
+from ..models.control import CATEGORICAL_FIELDS, Control
 
 
 def extract_text_from_cell(cell_element) -> str:
@@ -41,151 +42,258 @@ def extract_text_from_cell(cell_element) -> str:
     return ""
 
 
-def parse_template_xml(xml_path: str) -> List[Control]:
+# Namespace табличного документа и базовых типов 1С
+SPREADSHEET_NS = 'http://v8.1c.ru/8.2/data/spreadsheet'
+CORE_NAMESPACES = ('http://v8.1c.ru/8.1/data/core', 'http://v8.1c.ru/8.2/data/core', '')
+
+# Теги строки табличного документа (с namespace и без)
+ROWS_ITEM_TAGS = ('{%s}rowsItem' % SPREADSHEET_NS, 'rowsItem')
+
+# Маппинг заголовков макета на поля модели
+HEADER_TO_FIELD = {
+    'Uri': 'uri',
+    'Идентификатор': 'identifier',
+    'Наименование': 'name',
+    'Алгоритм': 'algorithm',
+    'Сверочный Uri': 'verification_uri',
+    'ДоступноИсправление': 'correction_available',
+    'Описание': 'description',
+    'Обязательный': 'required',
+    'Утверждение': 'approval',
+    'КодТаблицы': 'table_code',
+    'НаОснованииТребованияЦБ': 'based_on_cbr_requirement',
+    'ОписаниеПроверкиПоДаннымЦБ': 'cbr_check_description',
+    'Комменатрий': 'comment',  # Опечатка в оригинале
+    'КодУтвержденияЦБ': 'cbr_approval_code',
+    'Таксомномия': 'taxonomy',
+    'Рынок': 'market',
+}
+
+
+def _qualify(namespace: str, tag: str) -> str:
+    """Возвращает имя тега в нотации ElementTree ({namespace}tag)."""
+    return '{%s}%s' % (namespace, tag) if namespace else tag
+
+
+class RowPlan(NamedTuple):
     """
-    Парсит XML-макет и извлекает данные о контролях.
+    Скомпилированный план разбора строк документа.
+    
+    Строится один раз по строке заголовков: namespace определены заранее,
+    а колонки сразу сопоставлены полям модели.
+    
+    Атрибуты:
+        row_tag: Тег элемента row внутри rowsItem
+        cell_tag: Тег ячейки c
+        item_tag: Тег элемента item (ищется среди потомков ячейки)
+        content_tag: Тег элемента content внутри item
+        columns: Тройки (индекс колонки, поле модели, интернировать ли значение),
+                 упорядоченные по индексу
+    """
+    row_tag: str
+    cell_tag: str
+    item_tag: str
+    content_tag: str
+    columns: Tuple[Tuple[int, str, bool], ...]
+
+
+def _namespace_of(tag: str) -> str:
+    """Возвращает namespace тега или пустую строку."""
+    if tag.startswith('{'):
+        return tag[1:tag.index('}')]
+    return ''
+
+
+def _detect_core_namespace(cells) -> str:
+    """
+    Определяет namespace элементов item/content по ячейкам заголовка.
     
     Args:
-        xml_path: Путь к файлу Template.xml
+        cells: Ячейки строки заголовков
         
     Returns:
-        Список объектов Control
+        Namespace базовых типов (пустая строка, если namespace не используется)
+    """
+    for namespace in CORE_NAMESPACES:
+        item_path = './/' + _qualify(namespace, 'item')
+        for cell in cells:
+            if cell.find(item_path) is not None:
+                return namespace
+    return CORE_NAMESPACES[0]
+
+
+def compile_row_plan(header_row) -> RowPlan:
+    """
+    Компилирует план разбора по первой строке макета.
+    
+    Args:
+        header_row: Элемент rowsItem со строкой заголовков
+        
+    Returns:
+        План разбора строк данных
         
     Raises:
-        FileNotFoundError: Если файл не найден
-        ET.ParseError: Если XML невалиден
+        ValueError: Если в строке нет структуры row
     """
-    xml_path = Path(xml_path)
-    if not xml_path.exists():
-        raise FileNotFoundError(f"Файл не найден: {xml_path}")
+    spreadsheet_ns = _namespace_of(header_row.tag)
+    row_tag = _qualify(spreadsheet_ns, 'row')
+    cell_tag = _qualify(spreadsheet_ns, 'c')
     
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    # Извлекаем заголовки (только прямые дочерние элементы c в row)
+    header_row_element = header_row.find(row_tag)
+    if header_row_element is None:
+        raise ValueError("Не найдена структура row в строке заголовков")
+    header_cells = header_row_element.findall(cell_tag)
     
-    # Определяем namespace
-    # Пробуем разные версии namespace
-    namespaces = {
-        'ss': 'http://v8.1c.ru/8.2/data/spreadsheet',
-        'ss8': 'http://v8.1c.ru/8.1/data/spreadsheet',
-        'core': 'http://v8.1c.ru/8.1/data/core',
-        'core8': 'http://v8.1c.ru/8.2/data/core',
-    }
+    core_ns = _detect_core_namespace(header_cells)
+    item_tag = _qualify(core_ns, 'item')
+    content_tag = _qualify(core_ns, 'content')
     
-    # Находим все строки (пробуем с namespace)
-    rows = root.findall('.//{http://v8.1c.ru/8.2/data/spreadsheet}rowsItem')
-    if not rows:
-        # Пробуем без namespace
-        rows = root.findall('.//rowsItem')
-    if not rows:
-        return []
+    columns = []
+    for idx, cell in enumerate(header_cells):
+        field = HEADER_TO_FIELD.get(extract_text_from_cell(cell))
+        if field is not None:
+            # Значения категориальных полей повторяются: интернируем, чтобы
+            # все контроли ссылались на один объект строки
+            columns.append((idx, field, field in CATEGORICAL_FIELDS))
     
-    # Первая строка содержит заголовки
-    if len(rows) == 0:
-        raise ValueError("Не найдено строк в XML")
+    return RowPlan(row_tag, cell_tag, item_tag, content_tag, tuple(columns))
+
+
+def _parse_row(row, plan: RowPlan) -> Optional[Control]:
+    """
+    Преобразует строку макета в объект Control по скомпилированному плану.
     
-    header_row = rows[0]
+    Args:
+        row: Элемент rowsItem со строкой данных
+        plan: План разбора, построенный по строке заголовков
+        
+    Returns:
+        Объект Control или None, если строка пустая
+    """
+    # Извлекаем ячейки строки (только прямые дочерние элементы c в row)
+    row_element = row.find(plan.row_tag)
+    if row_element is None:
+        return None
+    cells = row_element.findall(plan.cell_tag)
+    if not cells:
+        return None
     
-    # Извлекаем заголовки (только прямые дочерние элементы c в row)
-    header_row_element = header_row.find('{http://v8.1c.ru/8.2/data/spreadsheet}row')
-    if header_row_element is None:
-        header_row_element = header_row.find('row')
-    if header_row_element is None:
-        raise ValueError("Не найдена структура row в строке заголовков")
+    item_tag = plan.item_tag
+    content_tag = plan.content_tag
+    cell_count = len(cells)
+    control_data = {}
+    
+    for idx, field, intern in plan.columns:
+        if idx >= cell_count:
+            break
+        text = ""
+        # iter() обходит потомков на стороне C и заметно быстрее find('.//...')
+        item = next(cells[idx].iter(item_tag), None)
+        if item is not None:
+            content = item.find(content_tag)
+            if content is not None and content.text:
+                text = content.text.strip()
+                if intern:
+                    text = sys.intern(text)
+        control_data[field] = text
     
-    header_cells = header_row_element.findall('{http://v8.1c.ru/8.2/data/spreadsheet}c')
-    if not header_cells:
-        header_cells = header_row_element.findall('c')
-    headers = []
-    for cell in header_cells:
-        text = extract_text_from_cell(cell)
-        headers.append(text)
-    
-    # Создаем маппинг индекса колонки к имени заголовка
-    column_mapping = {}
-    for idx, header in enumerate(headers):
-        if header:
-            column_mapping[idx] = header
-    
-    # Парсим данные (начиная со второй строки, первая - заголовки)
-    controls = []
-    for row_idx, row in enumerate(rows):
-        # Пропускаем первую строку (заголовки)
-        if row_idx == 0:
+    # Создаем объект Control только если есть хотя бы идентификатор или наименование
+    if control_data.get('identifier') or control_data.get('name'):
+        return Control(**control_data)
+    return None
+
+
+def _iter_rows(xml_path: Path) -> Iterator[Control]:
+    """
+    Потоково читает XML через iterparse и выдает контроли по одной строке.
+    
+    Обработанные элементы rowsItem очищаются и удаляются из родителя,
+    поэтому в памяти одновременно находится только текущая строка.
+    """
+    plan = None
+    rows_tag = None
+    # Стек открытых элементов: нужен, чтобы отцепить rowsItem от родителя
+    stack = []
+    
+    for event, elem in ET.iterparse(str(xml_path), events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
             continue
+        stack.pop()
         
-        # Извлекаем ячейки строки (только прямые дочерние элементы c в row)
-        row_element = row.find('{http://v8.1c.ru/8.2/data/spreadsheet}row')
-        if row_element is None:
-            row_element = row.find('row')
-        if row_element is None:
-            continue
+        if elem.tag != rows_tag:
+            if rows_tag is not None or elem.tag not in ROWS_ITEM_TAGS:
+                continue
+            # Namespace документа определяется по первой строке
+            rows_tag = elem.tag
         
-        cells = row_element.findall('{http://v8.1c.ru/8.2/data/spreadsheet}c')
-        if not cells:
-            cells = row_element.findall('c')
-        if not cells:
-            continue
+        # Первая строка содержит заголовки
+        if plan is None:
+            plan = compile_row_plan(elem)
+        else:
+            control = _parse_row(elem, plan)
+            if control is not None:
+                yield control
         
-        # Создаем словарь для текущего контроля
-        control_data = {}
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+
+
+def iter_template_xml(xml_path: str) -> Iterator[Control]:
+    """
+    Потоково парсит XML-макет и выдает контроли по мере чтения файла.
+    
+    В отличие от полного построения дерева, пиковое потребление памяти
+    не зависит от размера файла.
+    
+    Args:
+        xml_path: Путь к файлу Template.xml
         
-        # Извлекаем данные из ячеек
-        for idx, cell in enumerate(cells):
-            if idx in column_mapping:
-                header_name = column_mapping[idx]
-                text = extract_text_from_cell(cell)
-                
-                # Маппинг заголовков на поля модели
-                if header_name == 'Uri':
-                    control_data['uri'] = text
-                elif header_name == 'Идентификатор':
-                    control_data['identifier'] = text
-                elif header_name == 'Наименование':
-                    control_data['name'] = text
-                elif header_name == 'Алгоритм':
-                    control_data['algorithm'] = text
-                elif header_name == 'Сверочный Uri':
-                    control_data['verification_uri'] = text
-                elif header_name == 'ДоступноИсправление':
-                    control_data['correction_available'] = text
-                elif header_name == 'Описание':
-                    control_data['description'] = text
-                elif header_name == 'Обязательный':
-                    control_data['required'] = text
-                elif header_name == 'Утверждение':
-                    control_data['approval'] = text
-                elif header_name == 'КодТаблицы':
-                    control_data['table_code'] = text
-                elif header_name == 'НаОснованииТребованияЦБ':
-                    control_data['based_on_cbr_requirement'] = text
-                elif header_name == 'ОписаниеПроверкиПоДаннымЦБ':
-                    control_data['cbr_check_description'] = text
-                elif header_name == 'Комменатрий':  # Опечатка в оригинале
-                    control_data['comment'] = text
-                elif header_name == 'КодУтвержденияЦБ':
-                    control_data['cbr_approval_code'] = text
-                elif header_name == 'Таксомномия':
-                    control_data['taxonomy'] = text
-                elif header_name == 'Рынок':
-                    control_data['market'] = text
+    Returns:
+        Итератор объектов Control
         
-        # Создаем объект Control только если есть хотя бы идентификатор или наименование
-        if control_data.get('identifier') or control_data.get('name'):
-            control = Control(**control_data)
-            controls.append(control)
+    Raises:
+        FileNotFoundError: Если файл не найден
+        ET.ParseError: Если XML невалиден (при итерации)
+        ValueError: Если строка заголовков не содержит row (при итерации)
+    """
+    xml_path = Path(xml_path)
+    if not xml_path.exists():
+        raise FileNotFoundError(f"Файл не найден: {xml_path}")
+    return _iter_rows(xml_path)
+
+
+def parse_template_xml(xml_path: str) -> List[Control]:
+    """
+    Парсит XML-макет и извлекает данные о контролях.
     
-    return controls
+    Args:
+        xml_path: Путь к файлу Template.xml
+        
+    Returns:
+        Список объектов Control
+        
+    Raises:
+        FileNotFoundError: Если файл не найден
+        ET.ParseError: Если XML невалиден
+        ValueError: Если строка заголовков не содержит row
+    """
+    return list(iter_template_xml(xml_path))
 
 
-def load_controls(xml_path: str) -> List[Control]:
+def load_controls(xml_path: str, stream: bool = False) -> Union[List[Control], Iterator[Control]]:
     """
     Загружает контроли из XML-файла.
     
     Args:
         xml_path: Путь к файлу Template.xml
+        stream: Если True, возвращает генератор, читающий файл построчно
         
     Returns:
-        Список объектов Control
+        Список объектов Control или итератор при stream=True
     """
+    if stream:
+        return iter_template_xml(xml_path)
     return parse_template_xml(xml_path)
-
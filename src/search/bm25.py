@@ -0,0 +1,106 @@
+"""
+Полнотекстовый индекс BM25 по текстам контролей.
+
+Индекс строится один раз на версию каталога по тексту для эмбеддинга
+(Control.get_text_for_embedding) и хранится в виде инвертированных списков
+(CSR): для каждого терма - позиции контролей и готовые веса BM25. Поиск
+сводится к сложению весов списков термов запроса в массиве оценок, без
+обхода текстов.
+"""
+
+from collections import Counter
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .stemmer import tokenize
+
+# Параметры BM25 (стандартные значения Okapi BM25)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class BM25Index:
+    """Инвертированный индекс BM25 по набору документов."""
+    
+    def __init__(self, documents: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        """
+        Строит индекс.
+        
+        Args:
+            documents: Тексты документов (позиция документа - позиция контроля в каталоге)
+            k1: Параметр насыщения частоты терма
+            b: Параметр нормализации по длине документа
+        """
+        self.size = len(documents)
+        vocabulary: Dict[str, int] = {}
+        term_ids, doc_ids, frequencies = [], [], []
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for position, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[position] = len(tokens)
+            for term, count in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(position)
+                frequencies.append(count)
+        
+        self._vocabulary = vocabulary
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        self._offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocabulary)), out=self._offsets[1:])
+        self._doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        
+        # Запрос учитывает только наличие терма, поэтому вес BM25 каждой пары
+        # (терм, документ) вычисляется заранее
+        tf = np.asarray(frequencies, dtype=np.float32)[order]
+        document_frequency = np.diff(self._offsets).astype(np.float32)
+        idf = np.log1p((self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+        average_length = float(lengths.mean()) if self.size else 0.0
+        norm = 1 - b + b * lengths[self._doc_ids] / max(average_length, 1.0)
+        self._weights = (np.repeat(idf, np.diff(self._offsets)) * tf * (k1 + 1) / (tf + k1 * norm)).astype(np.float32)
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def scores(self, query: str) -> np.ndarray:
+        """
+        Вычисляет оценки BM25 всех документов для запроса.
+        
+        Args:
+            query: Текст запроса
+        
+        Returns:
+            Массив оценок float32 (0 - документ не содержит термов запроса)
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            # Позиции в списке терма уникальны, поэтому сложение по индексам корректно
+            scores[self._doc_ids[start:end]] += self._weights[start:end]
+        return scores
+    
+    def search(self, query: str, positions: Optional[np.ndarray] = None,
+               limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ищет документы по запросу.
+        
+        Args:
+            query: Текст запроса
+            positions: Позиции документов, среди которых ведется поиск (None - все)
+            limit: Максимальное количество результатов (None - все найденные)
+        
+        Returns:
+            Кортеж (позиции найденных документов по убыванию оценки, их оценки)
+        """
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores) if positions is None else positions[scores[positions] > 0]
+        candidate_scores = scores[candidates]
+        # Устойчивая сортировка: при равной оценке - порядок каталога
+        order = np.argsort(-candidate_scores, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return candidates[order], candidate_scores[order]
@@ -0,0 +1,225 @@
+"""
+Гибридный поиск по каталогу контролей: BM25 + семантический поиск ChromaDB.
+
+Лексические результаты (BM25 по основам слов) и ближайшие по смыслу
+контроли из векторной БД объединяются методом Reciprocal Rank Fusion:
+оценка контроля - сумма 1 / (RRF_K + ранг) по всем спискам, где он найден.
+Лексический поиск выполняется в памяти за миллисекунды; семантические
+результаты запоминаются по тексту запроса, поэтому повторные rerun-ы
+Streamlit (смена страницы, сортировка) не опрашивают векторную БД заново.
+По умолчанию поиск только лексический: запрос к векторной БД (векторизация
+запроса моделью) выполняется лишь по явному запросу пользователя.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..catalog.control_index import ControlIndex
+from ..catalog.filter_engine import freeze_filters
+from ..catalog.store import cache_source
+from ..models.control_table import ControlTable
+from ..vector_db.chroma_manager import ChromaDBManager
+from ..vector_db.registry import DEFAULT_DB_PATH
+from ..vector_db.sync import RECORD_ID_PREFIX
+from .bm25 import BM25Index
+from .quick import QUICK_SEARCH_FIELDS, QuickSearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Константа сглаживания RRF (значение из исходной статьи Cormack et al.)
+RRF_K = 60
+# Количество результатов векторной БД, участвующих в объединении
+SEMANTIC_LIMIT = 50
+# Количество запоминаемых семантических результатов на каталог
+SEMANTIC_CACHE_SIZE = 256
+
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], k: int = RRF_K) -> np.ndarray:
+    """
+    Объединяет ранжированные списки позиций методом Reciprocal Rank Fusion.
+    
+    Args:
+        rankings: Списки позиций, каждый - по убыванию релевантности
+        k: Константа сглаживания
+    
+    Returns:
+        Позиции из всех списков по убыванию суммарной оценки (при равенстве -
+        в порядке каталога)
+    """
+    rankings = [np.asarray(ranking, dtype=np.int64) for ranking in rankings if len(ranking)]
+    if not rankings:
+        return np.empty(0, dtype=np.int64)
+    positions = np.concatenate(rankings)
+    weights = np.concatenate([1.0 / (k + np.arange(1, len(ranking) + 1)) for ranking in rankings])
+    unique, inverse = np.unique(positions, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights)
+    return unique[np.lexsort((unique, -scores))]
+
+
+class HybridSearchEngine:
+    """
+    Гибридный поиск по одной версии каталога.
+    
+    Индексы BM25 и быстрого поиска строятся при создании; записи векторной БД сопоставляются
+    позициям каталога через индекс первичных ключей (catalog.control_index).
+    """
+    
+    def __init__(self, table: ControlTable, db_path: Optional[str] = DEFAULT_DB_PATH,
+                 collection_name: str = "controls", control_index: Optional[ControlIndex] = None):
+        """
+        Инициализирует поиск.
+        
+        Args:
+            table: Колоночная таблица каталога
+            db_path: Путь к векторной БД (None - только лексический поиск)
+            collection_name: Название коллекции в БД
+            control_index: Индекс первичных ключей каталога (None - строится
+                           при первом семантическом запросе)
+        """
+        self.table = table
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.lexical_index = BM25Index([row.get_text_for_embedding() for row in table])
+        self.quick_index = QuickSearchIndex(list(zip(*(table.column(field_name) for field_name in QUICK_SEARCH_FIELDS))))
+        self._control_index = control_index
+        self._manager = None
+        self._semantic_results: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lexical(self, query: str, positions: Optional[np.ndarray] = None,
+                limit: Optional[int] = None) -> np.ndarray:
+        """Возвращает позиции контролей по убыванию оценки BM25 (все найденные, если limit не задан)."""
+        return self.lexical_index.search(query, positions, limit)[0]
+    
+    def quick(self, query: str, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Возвращает позиции контролей, поля которых содержат все термы запроса (в порядке positions)."""
+        return self.quick_index.search(query, positions)
+    
+    def semantic_available(self) -> bool:
+        """Проверяет, что векторная БД создана (иначе семантический поиск пропускается)."""
+        return self.db_path is not None and Path(self.db_path).is_dir()
+    
+    def semantic(self, query: str, limit: int = SEMANTIC_LIMIT, filters: Optional[Dict] = None) -> np.ndarray:
+        """
+        Возвращает позиции контролей, ближайших к запросу по смыслу.
+        
+        Записи векторной БД сопоставляются контролям каталога по первичному
+        ключу в ID записи (см. vector_db.sync.stable_ids); записи, отсутствующие в текущей версии
+        каталога, пропускаются. Фильтры выполняются в самой векторной БД.
+        
+        Args:
+            query: Текст запроса
+            limit: Количество результатов векторной БД
+            filters: Словарь фильтров в формате FilterState.get_filters()
+        
+        Returns:
+            Позиции контролей по убыванию близости (пустой массив, если БД
+            недоступна)
+        """
+        if not query or not self.semantic_available():
+            return np.empty(0, dtype=np.int64)
+        
+        key = (query, limit, freeze_filters(filters or {}))
+        with self._lock:
+            cached = self._semantic_results.get(key)
+            if cached is not None:
+                self._semantic_results.move_to_end(key)
+                return cached
+        
+        try:
+            manager = self._get_manager()
+            results = manager.search(query, n_results=limit, filters=filters) if manager.get_collection_count() else []
+        except Exception as e:
+            logger.warning("Семантический поиск недоступен: %s", e)
+            results = []
+        
+        control_index = self._get_control_index()
+        found = (control_index.position(result['id'][len(RECORD_ID_PREFIX):]) for result in results
+                 if result['id'].startswith(RECORD_ID_PREFIX))
+        positions = np.asarray([position for position in found if position is not None], dtype=np.int64)
+        positions.flags.writeable = False
+        with self._lock:
+            self._semantic_results[key] = positions
+            while len(self._semantic_results) > SEMANTIC_CACHE_SIZE:
+                self._semantic_results.popitem(last=False)
+        return positions
+    
+    def search(self, query: str, positions: np.ndarray, filters: Optional[Dict] = None,
+               semantic: bool = False) -> np.ndarray:
+        """
+        Выполняет гибридный поиск среди заданных позиций каталога.
+        
+        Args:
+            query: Текст запроса
+            positions: Позиции контролей, прошедших фильтры
+            filters: Фильтры, по которым получены positions (передаются в векторную БД,
+                     чтобы ближайшие по смыслу контроли искались только среди них)
+            semantic: Учитывать результаты векторной БД (по умолчанию - только BM25)
+        
+        Returns:
+            Позиции найденных контролей по убыванию объединенной оценки
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        rankings = [self.lexical(query, positions)]
+        if semantic:
+            found = self.semantic(query, filters=filters)
+            rankings.append(found[np.isin(found, positions)])
+        return reciprocal_rank_fusion(rankings)
+    
+    def reset_semantic(self) -> None:
+        """Сбрасывает подключение к векторной БД и запомненные семантические результаты (после синхронизации БД)."""
+        with self._lock:
+            self._manager = None
+            self._semantic_results.clear()
+    
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = ChromaDBManager(db_path=self.db_path, collection_name=self.collection_name)
+            return self._manager
+    
+    def _get_control_index(self) -> ControlIndex:
+        with self._lock:
+            if self._control_index is None:
+                self._control_index = ControlIndex(self.table)
+            return self._control_index
+
+
+# Источник каталога (макет) -> (версия каталога, поиск по последней версии)
+_engines: Dict[Hashable, Tuple[Hashable, HybridSearchEngine]] = {}
+_engines_lock = threading.Lock()
+
+
+def get_search_engine(table: ControlTable, catalog_version: Optional[Hashable],
+                      control_index: Optional[ControlIndex] = None) -> HybridSearchEngine:
+    """
+    Возвращает общий для процесса поиск по версии каталога.
+    
+    Индексы строятся один раз на версию каталога и разделяются всеми сессиями.
+    Хранится по одному поиску на макет (последняя запрошенная версия), поэтому
+    сессии, открывшие разные версии макета из templates/, не вытесняют друг друга.
+    
+    Args:
+        table: Колоночная таблица каталога
+        catalog_version: Версия каталога (None - индекс строится без кэширования)
+        control_index: Индекс первичных ключей этой версии каталога
+    
+    Returns:
+        Гибридный поиск по каталогу
+    """
+    if catalog_version is None:
+        return HybridSearchEngine(table, control_index=control_index)
+    
+    source = cache_source(catalog_version)
+    with _engines_lock:
+        cached = _engines.get(source)
+        if cached is not None and cached[0] == catalog_version:
+            return cached[1]
+        engine = HybridSearchEngine(table, control_index=control_index)
+        _engines[source] = (catalog_version, engine)
+        return engine
@@ -0,0 +1,170 @@
+"""
+Быстрый поиск подстрок по полям контролей.
+
+Для каждого контроля один раз на версию каталога строится строка поиска:
+значения полей QUICK_SEARCH_FIELDS, приведенные к виду для поиска (регистр,
+«ё» -> «е») со схлопнутыми пробелами. По строкам строится индекс триграмм
+(CSR, как в BM25Index): для каждой триграммы - позиции контролей, в строке
+которых она встречается. Запрос разбивается на термы; контроль найден, если
+каждый терм - подстрока его строки поиска (термы объединяются по И, начало
+слова или кода тоже находится). Кандидаты отбираются пересечением списков
+триграмм термов, и только они проверяются поиском подстроки, поэтому время
+запроса почти не зависит от размера каталога.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .stemmer import normalize
+
+# Поля, по которым работает быстрый поиск
+QUICK_SEARCH_FIELDS = ('identifier', 'name', 'table_code', 'taxonomy', 'market')
+# Длина n-грамм индекса
+NGRAM = 3
+
+# Разделитель строк поиска при построении индекса (не встречается в термах запроса)
+_SEPARATOR = '\x00'
+# Сдвиг кода символа в ключе триграммы (коды Unicode занимают 21 бит)
+_CODE_BITS = 21
+
+
+def search_text(values: Sequence[str]) -> str:
+    """
+    Возвращает строку поиска по значениям полей контроля.
+    
+    Args:
+        values: Значения полей
+    
+    Returns:
+        Значения через перевод строки, в виде для поиска, со схлопнутыми пробелами
+    """
+    return '\n'.join(' '.join(normalize(value or '').split()) for value in values)
+
+
+def query_terms(query: str) -> List[str]:
+    """Разбивает запрос на термы (в виде для поиска, без повторов)."""
+    return list(dict.fromkeys(normalize(query).split()))
+
+
+def _ngram_keys(codes: np.ndarray) -> np.ndarray:
+    """Возвращает ключи всех триграмм последовательности кодов символов."""
+    keys = codes[:len(codes) - NGRAM + 1].astype(np.int64)
+    for offset in range(1, NGRAM):
+        keys = (keys << _CODE_BITS) | codes[offset:len(codes) - NGRAM + 1 + offset]
+    return keys
+
+
+def _codes(text: str) -> np.ndarray:
+    """Возвращает коды символов строки."""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+class QuickSearchIndex:
+    """Индекс триграмм по строкам поиска контролей."""
+    
+    def __init__(self, rows: Sequence[Sequence[str]]):
+        """
+        Строит индекс.
+        
+        Args:
+            rows: Значения полей поиска каждого контроля (позиция - позиция в каталоге)
+        """
+        self.size = len(rows)
+        self._texts = np.empty(self.size, dtype=object)
+        self._texts[:] = [search_text(values) for values in rows]
+        
+        # Все строки склеиваются через разделитель, ключи триграмм вычисляются
+        # одним проходом NumPy; триграммы с разделителем отбрасываются
+        codes = _codes(_SEPARATOR.join(self._texts) + _SEPARATOR)
+        lengths = np.fromiter((len(text) + 1 for text in self._texts), dtype=np.int64, count=self.size)
+        documents = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+        keys = _ngram_keys(codes)
+        documents = documents[:len(keys)]
+        valid = np.ones(len(keys), dtype=bool)
+        for offset in range(NGRAM):
+            valid &= codes[offset:offset + len(keys)] != ord(_SEPARATOR)
+        
+        self._ngrams, ngram_ids = np.unique(keys[valid], return_inverse=True)
+        documents = documents[valid]
+        # Устойчивая сортировка по триграмме сохраняет порядок позиций внутри списка;
+        # для словаря до 65536 триграмм NumPy сортирует 16-битные ключи поразрядно
+        ngram_ids = ngram_ids.astype(np.uint16 if len(self._ngrams) <= 1 << 16 else np.int64)
+        order = np.argsort(ngram_ids, kind='stable')
+        ngram_ids, documents = ngram_ids[order], documents[order]
+        # Повторы триграммы в одной строке идут подряд - остается первая пара
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (ngram_ids[1:] != ngram_ids[:-1]) | (documents[1:] != documents[:-1])
+        ngram_ids = ngram_ids[first]
+        self._documents = documents[first].astype(np.int32)
+        self._offsets = np.zeros(len(self._ngrams) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ngram_ids, minlength=len(self._ngrams)), out=self._offsets[1:])
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _candidates(self, term: str) -> np.ndarray:
+        """Возвращает позиции строк, содержащих все триграммы терма (по возрастанию)."""
+        keys = np.unique(_ngram_keys(_codes(term)))
+        ids = np.searchsorted(self._ngrams, keys)
+        if not len(self._ngrams) or (ids >= len(self._ngrams)).any() or (self._ngrams[ids % len(self._ngrams)] != keys).any():
+            return np.empty(0, dtype=np.int32)
+        postings = sorted((self._documents[self._offsets[i]:self._offsets[i + 1]] for i in ids), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        return candidates
+    
+    def search(self, query: str, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Ищет контроли, строка поиска которых содержит все термы запроса.
+        
+        Args:
+            query: Текст запроса
+            positions: Позиции контролей, среди которых ведется поиск (None - все)
+        
+        Returns:
+            Позиции найденных контролей в порядке positions (по возрастанию, если
+            positions не задан)
+        """
+        if positions is None:
+            positions = np.arange(self.size, dtype=np.int64)
+        terms = query_terms(query)
+        if not terms:
+            return positions
+        
+        # Длинные термы отбирают меньше кандидатов, поэтому пересекаются первыми
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):
+            if len(term) < NGRAM:
+                break
+            found = self._candidates(term)
+            candidates = found if candidates is None else np.intersect1d(candidates, found, assume_unique=True)
+            if not len(candidates):
+                return np.empty(0, dtype=np.int64)
+        
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        if candidates is not None:
+            found = np.zeros(self.size, dtype=bool)
+            found[candidates] = True
+            mask &= found
+        candidates = np.flatnonzero(mask)
+        
+        # Триграммы только отбирают кандидатов: терм длиннее триграммы и короткие
+        # термы проверяются поиском подстроки (терм из одной триграммы - нет).
+        # Короткие термы проверяются последними и векторно - кандидатов может быть весь каталог
+        for term in sorted(terms, key=len, reverse=True):
+            if len(term) > NGRAM and len(candidates):
+                texts = self._texts[candidates]
+                candidates = candidates[np.array([term in text for text in texts], dtype=bool)]
+            elif len(term) < NGRAM and len(candidates):
+                found = pd.Series(self._texts[candidates]).str.contains(term, regex=False)
+                candidates = candidates[found.to_numpy(dtype=bool)]
+        
+        mask[:] = False
+        mask[candidates] = True
+        return positions[mask[positions]]
@@ -0,0 +1,142 @@
+"""
+Стемминг и токенизация русского текста для полнотекстового поиска.
+
+Стеммер - реализация алгоритма Snowball для русского языка (Портер):
+окончания отрезаются только в области RV (после первой гласной), поэтому
+разные формы слова («контроль», «контроля», «контролей») сводятся к одной
+основе. Токены без кириллицы (коды, идентификаторы, числа) не стеммируются.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+VOWELS = frozenset('аеиоуыэюя')
+
+_PERFECTIVE_GERUND_1 = ('вшись', 'вши', 'в')
+_PERFECTIVE_GERUND_2 = ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв')
+_ADJECTIVE = ('ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей', 'ий', 'ый', 'ой',
+              'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею')
+_PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+_PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+_REFLEXIVE = ('ся', 'сь')
+_VERB_1 = ('ете', 'йте', 'ешь', 'нно', 'ла', 'на', 'ли', 'ем', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'й', 'л', 'н')
+_VERB_2 = ('ейте', 'уйте', 'ила', 'ыла', 'ена', 'ите', 'или', 'ыли', 'ило', 'ыло', 'ено', 'ует', 'уют', 'ены',
+           'ить', 'ыть', 'ишь', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ят', 'ит', 'ыт', 'ую', 'ю')
+_NOUN = ('иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие', 'ье', 'еи', 'ии', 'ей', 'ой',
+         'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию', 'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у',
+         'ы', 'ь', 'ю', 'я')
+_SUPERLATIVE = ('ейше', 'ейш')
+_DERIVATIONAL = ('ость', 'ост')
+
+_TOKEN_RE = re.compile(r'\w+')
+_CYRILLIC_RE = re.compile('[а-я]')
+
+
+def _longest_suffix(word: str, suffixes) -> str:
+    """Возвращает самое длинное из окончаний, которым заканчивается слово ('' - нет)."""
+    return max((suffix for suffix in suffixes if word.endswith(suffix)), key=len, default='')
+
+
+def _remove_grouped(word: str, group_1, group_2) -> Optional[str]:
+    """
+    Отрезает самое длинное окончание из двух групп.
+    
+    Окончания первой группы отрезаются, только если перед ними стоит «а» или «я».
+    Возвращает None, если окончание не найдено или условие не выполнено.
+    """
+    suffix_1 = _longest_suffix(word, group_1)
+    suffix_2 = _longest_suffix(word, group_2)
+    if len(suffix_2) >= len(suffix_1):
+        return word[:-len(suffix_2)] if suffix_2 else None
+    stem = word[:-len(suffix_1)]
+    return stem if stem[-1:] in ('а', 'я') else None
+
+
+def _region(word: str, start: int) -> int:
+    """Начало области после первого сочетания «гласная + согласная», начиная с позиции start."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+@lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    """
+    Возвращает основу русского слова (ожидается нижний регистр, «ё» заменена на «е»).
+    
+    Args:
+        word: Слово
+    
+    Returns:
+        Основа слова
+    """
+    rv_start = next((i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    
+    # Шаг 1: деепричастие, иначе возвратная частица и прилагательное/глагол/существительное
+    result = _remove_grouped(rv, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if result is not None:
+        rv = result
+    else:
+        reflexive = _longest_suffix(rv, _REFLEXIVE)
+        if reflexive:
+            rv = rv[:-len(reflexive)]
+        adjective = _longest_suffix(rv, _ADJECTIVE)
+        if adjective:
+            rv = rv[:-len(adjective)]
+            result = _remove_grouped(rv, _PARTICIPLE_1, _PARTICIPLE_2)
+            if result is not None:
+                rv = result
+        else:
+            result = _remove_grouped(rv, _VERB_1, _VERB_2)
+            if result is not None:
+                rv = result
+            else:
+                noun = _longest_suffix(rv, _NOUN)
+                if noun:
+                    rv = rv[:-len(noun)]
+    
+    # Шаг 2: окончание «и»
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    
+    # Шаг 3: словообразовательное окончание в области R2
+    derivational = _longest_suffix(rv, _DERIVATIONAL)
+    if derivational and rv_start + len(rv) - len(derivational) >= r2_start:
+        rv = rv[:-len(derivational)]
+    
+    # Шаг 4: превосходная степень, удвоенная «н», мягкий знак
+    superlative = _longest_suffix(rv, _SUPERLATIVE)
+    if superlative:
+        rv = rv[:-len(superlative)]
+    if rv.endswith('нн'):
+        rv = rv[:-1]
+    elif not superlative and rv.endswith('ь'):
+        rv = rv[:-1]
+    
+    return prefix + rv
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к виду для поиска: регистр и «ё» -> «е»."""
+    return text.casefold().replace('ё', 'е')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбивает текст на термы поиска.
+    
+    Слова с кириллицей заменяются основами, остальные токены (коды,
+    идентификаторы, числа) сохраняются целиком.
+    
+    Args:
+        text: Исходный текст
+    
+    Returns:
+        Список термов в порядке следования
+    """
+    return [stem(token) if _CYRILLIC_RE.search(token) else token
+            for token in _TOKEN_RE.findall(normalize(text))]
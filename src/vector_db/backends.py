@@ -0,0 +1,79 @@
+"""
+Бэкенды вычисления эмбеддингов.
+
+Одна и та же модель sentence-transformers может выполняться разными
+бэкендами, выбираемыми по имени:
+- torch       - PyTorch fp32 (исходный вариант);
+- torch-int8  - PyTorch с динамической int8-квантизацией линейных слоев;
+- onnx        - ONNX Runtime (fp32), требуется sentence-transformers>=3.2
+                и optimum[onnxruntime];
+- onnx-int8   - ONNX Runtime с квантизованной int8 моделью (файл
+                onnx/model_quint8_avx2.onnx из репозитория модели).
+
+Векторы разных бэкендов немного отличаются, поэтому дисковый кэш
+эмбеддингов ведется отдельно для каждого бэкенда (см. cache_key).
+"""
+
+from typing import Callable, Dict
+
+DEFAULT_BACKEND = 'torch'
+
+# Квантизованная ONNX-модель, совместимая с любыми x86-процессорами с AVX2
+ONNX_INT8_FILE = 'onnx/model_quint8_avx2.onnx'
+
+
+def _load_torch(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _load_torch_int8(model_name: str):
+    # Динамическая квантизация поддерживается только на CPU
+    import torch
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name, device='cpu')
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device='cpu', backend='onnx')
+
+
+def _load_onnx_int8(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device='cpu', backend='onnx', model_kwargs={'file_name': ONNX_INT8_FILE})
+
+
+BACKENDS: Dict[str, Callable] = {
+    'torch': _load_torch,
+    'torch-int8': _load_torch_int8,
+    'onnx': _load_onnx,
+    'onnx-int8': _load_onnx_int8,
+}
+
+
+def load_model(model_name: str, backend: str = DEFAULT_BACKEND):
+    """
+    Загружает модель sentence-transformers указанным бэкендом.
+    
+    Args:
+        model_name: Название модели
+        backend: Имя бэкенда из BACKENDS
+    
+    Returns:
+        Объект модели с методом encode (интерфейс SentenceTransformer)
+    
+    Raises:
+        ValueError: Если бэкенд неизвестен
+        ImportError: Если не установлены зависимости бэкенда
+    """
+    loader = BACKENDS.get(backend)
+    if loader is None:
+        raise ValueError(f"Неизвестный бэкенд эмбеддингов: {backend} (доступны: {', '.join(BACKENDS)})")
+    return loader(model_name)
+
+
+def cache_key(model_name: str, backend: str = DEFAULT_BACKEND) -> str:
+    """Возвращает ключ модели для дискового кэша эмбеддингов."""
+    return model_name if backend == DEFAULT_BACKEND else f"{model_name}@{backend}"
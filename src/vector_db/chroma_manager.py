@@ -2,13 +2,27 @@
 Модуль для работы с ChromaDB - создание и управление векторной БД.
 """
 
-import chromadb
-from chromadb.config import Settings
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 from ..models.control import Control
 from .embeddings import EmbeddingGenerator
+from .metadata_filters import FILTER_VALUES_KEY, build_where, collect_filter_values
+from .registry import get_chroma_client
+from .sync import METADATA_HASH_KEY, TEXT_HASH_KEY, SyncPlan, plan_sync, prepare_records
+
+
+# Размер пакета записи в коллекцию
+WRITE_BATCH_SIZE = 100
+# Размер страницы при чтении ID и хешей коллекции
+READ_PAGE_SIZE = 5000
+# Количество запросов в одном вызове collection.query
+QUERY_BATCH_SIZE = 256
+
+COLLECTION_DESCRIPTION = "Коллекция дополнительных контролей"
+# Ключи метаданных коллекции с моделью и бэкендом, которыми построены векторы
+EMBEDDING_MODEL_KEY = 'embedding_model'
+EMBEDDING_BACKEND_KEY = 'embedding_backend'
 
 
 class ChromaDBManager:
@@ -32,15 +46,13 @@ class ChromaDBManager:
         self.embedding_generator = EmbeddingGenerator()
     
     def initialize(self):
-        """Инициализирует клиент ChromaDB и коллекцию."""
+        """
+        Инициализирует клиент ChromaDB и коллекцию.
+        
+        Клиент берется из общего для процесса реестра (один на каталог БД).
+        """
         if self.client is None:
-            # Создаем директорию если не существует
-            self.db_path.mkdir(parents=True, exist_ok=True)
-            
-            self.client = chromadb.PersistentClient(
-                path=str(self.db_path),
-                settings=Settings(anonymized_telemetry=False)
-            )
+            self.client = get_chroma_client(str(self.db_path))
         
         # Получаем или создаем коллекцию
         try:
@@ -49,10 +61,24 @@ class ChromaDBManager:
             # Коллекция не существует, создаем новую
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "Коллекция дополнительных контролей"}
+                metadata={"description": COLLECTION_DESCRIPTION}
             )
     
-    def create_database_from_controls(self, controls: List[Control], progress_callback=None):
+    def _create_collection(self):
+        """Создает коллекцию заново (удаляя существующую)."""
+        try:
+            self.client.delete_collection(name=self.collection_name)
+        except Exception:
+            pass
+        
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata={"description": COLLECTION_DESCRIPTION}
+        )
+    
+    def create_database_from_controls(self, controls: List[Control], progress_callback=None,
+                                      incremental: bool = False, workers: int = 1,
+                                      batch_size: int = 32) -> SyncPlan:
         """
         Создает векторную БД из списка контролей.
         
@@ -60,113 +86,270 @@ class ChromaDBManager:
             controls: Список контролей для векторизации
             progress_callback: Функция обратного вызова для отображения прогресса
                                Принимает (current, total, message)
+            incremental: Синхронизировать существующую коллекцию (векторизуются
+                         только новые и изменившиеся контроли) вместо пересоздания;
+                         не действует, если коллекция построена другой моделью
+                         или бэкендом эмбеддингов
+            workers: Количество процессов векторизации (1 - в текущем процессе)
+            batch_size: Размер батча модели эмбеддингов
+        
+        Returns:
+            Выполненный план синхронизации
         """
         if not controls:
             raise ValueError("Список контролей пуст")
         
         self.initialize()
-        self.embedding_generator.load_model()
         
-        # Очищаем существующую коллекцию
-        try:
-            self.client.delete_collection(name=self.collection_name)
-        except Exception:
-            pass
+        if progress_callback:
+            progress_callback(0, len(controls), "Подготовка данных...")
         
-        self.collection = self.client.create_collection(
-            name=self.collection_name,
-            metadata={"description": "Коллекция дополнительных контролей"}
-        )
+        records = prepare_records(controls)
         
-        total = len(controls)
+        # Векторы разных моделей несравнимы: если коллекция построена другой моделью
+        # или бэкендом (или неизвестно какой), она пересоздается целиком
+        if incremental and not self.embedding_model_matches():
+            incremental = False
+            if progress_callback:
+                progress_callback(0, len(controls), "Модель эмбеддингов коллекции отличается - пересоздание...")
         
-        # Подготавливаем данные для батч-обработки
-        texts = []
-        metadatas = []
-        ids = []
+        if incremental:
+            plan = plan_sync(records, self.get_stored_hashes())
+        else:
+            # Очищаем существующую коллекцию
+            self._create_collection()
+            plan = SyncPlan(records, [], [], 0)
         
-        if progress_callback:
-            progress_callback(0, total, "Подготовка данных...")
+        self._apply_sync_plan(plan, progress_callback, workers=workers, batch_size=batch_size)
+        # Значения категорий для перевода фильтров в условия запросов (см. metadata_filters)
+        self.collection.modify(metadata={
+            "description": COLLECTION_DESCRIPTION,
+            FILTER_VALUES_KEY: collect_filter_values(record.metadata for record in records),
+            EMBEDDING_MODEL_KEY: self.embedding_generator.model_name,
+            EMBEDDING_BACKEND_KEY: self.embedding_generator.backend,
+        })
+        return plan
+    
+    def embedding_model_matches(self) -> bool:
+        """
+        Проверяет, построены ли векторы коллекции текущими моделью и бэкендом.
         
-        for idx, control in enumerate(controls):
-            # Создаем текст для эмбеддинга
-            text = control.get_text_for_embedding()
-            texts.append(text)
-            
-            # Создаем метаданные
-            metadata = control.to_dict()
-            metadatas.append(metadata)
-            
-            # Создаем ID
-            control_id = f"control_{idx}_{control.identifier}" if control.identifier else f"control_{idx}"
-            ids.append(control_id)
+        Returns:
+            True, если коллекция пуста или ее модель и бэкенд совпадают с
+            генератором эмбеддингов; False, если они другие или не записаны
+        """
+        if self.collection is None:
+            self.initialize()
+        if not self.collection.count():
+            return True
+        metadata = self.collection.metadata or {}
+        return (metadata.get(EMBEDDING_MODEL_KEY) == self.embedding_generator.model_name
+                and metadata.get(EMBEDDING_BACKEND_KEY) == self.embedding_generator.backend)
+    
+    def sync_from_controls(self, controls: List[Control], progress_callback=None, workers: int = 1,
+                           batch_size: int = 32) -> SyncPlan:
+        """
+        Инкрементально синхронизирует коллекцию с каталогом контролей.
         
-        if progress_callback:
-            progress_callback(0, total, "Генерация эмбеддингов...")
+        Векторизация выполняется моделью и бэкендом, записанными в метаданных
+        коллекции; коллекция без этих сведений пересоздается текущей моделью.
         
-        # Генерируем эмбеддинги батчами
-        embeddings = self.embedding_generator.generate_embeddings_batch(texts, batch_size=32)
+        Args:
+            controls: Список контролей макета
+            progress_callback: Функция обратного вызова (current, total, message)
+            workers: Количество процессов векторизации (1 - в текущем процессе)
+            batch_size: Размер батча модели эмбеддингов
         
-        if progress_callback:
-            progress_callback(0, total, "Сохранение в базу данных...")
-        
-        # Добавляем в ChromaDB батчами
-        batch_size = 100
-        for i in range(0, len(ids), batch_size):
-            batch_ids = ids[i:i + batch_size]
-            batch_embeddings = embeddings[i:i + batch_size]
-            batch_metadatas = metadatas[i:i + batch_size]
-            batch_texts = texts[i:i + batch_size]
-            
-            self.collection.add(
+        Returns:
+            Выполненный план синхронизации
+        """
+        self.initialize()
+        metadata = self.collection.metadata or {}
+        if metadata.get(EMBEDDING_MODEL_KEY) and metadata.get(EMBEDDING_BACKEND_KEY):
+            generator = self.embedding_generator
+            model = (metadata[EMBEDDING_MODEL_KEY], metadata[EMBEDDING_BACKEND_KEY])
+            if (generator.model_name, generator.backend) != model:
+                generator.model_name, generator.backend = model
+                generator.model = None
+        return self.create_database_from_controls(controls, progress_callback, incremental=True,
+                                                  workers=workers, batch_size=batch_size)
+    
+    def iter_pages(self, include: List[str], page_size: int = READ_PAGE_SIZE) -> Iterator[dict]:
+        """
+        Читает записи коллекции постранично.
+        
+        Args:
+            include: Поля записей (metadatas, documents, embeddings)
+            page_size: Количество записей на странице
+        
+        Yields:
+            Страницы в формате collection.get
+        """
+        if self.collection is None:
+            self.initialize()
+        
+        offset = 0
+        while True:
+            page = self.collection.get(include=include, limit=page_size, offset=offset)
+            yield page
+            if len(page['ids']) < page_size:
+                return
+            offset += page_size
+    
+    def get_stored_hashes(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Читает ID и хеши всех записей коллекции (постранично).
+        
+        Returns:
+            Словарь {ID: (хеш текста, хеш метаданных)}; для записей,
+            созданных без хешей, значения - пустые строки
+        """
+        stored = {}
+        for page in self.iter_pages(['metadatas']):
+            for record_id, metadata in zip(page['ids'], page['metadatas']):
+                metadata = metadata or {}
+                stored[record_id] = (metadata.get(TEXT_HASH_KEY, ''), metadata.get(METADATA_HASH_KEY, ''))
+        return stored
+    
+    def _apply_sync_plan(self, plan: SyncPlan, progress_callback=None, workers: int = 1, batch_size: int = 32):
+        """Выполняет план синхронизации: удаление, обновление метаданных, векторизация."""
+        total = len(plan.embed) + len(plan.update_metadata) + len(plan.delete)
+        done = 0
+        
+        for i in range(0, len(plan.delete), WRITE_BATCH_SIZE):
+            batch_ids = plan.delete[i:i + WRITE_BATCH_SIZE]
+            self.collection.delete(ids=batch_ids)
+            done += len(batch_ids)
+            if progress_callback:
+                progress_callback(done, total, f"Удалено {done} устаревших записей...")
+        
+        for i in range(0, len(plan.update_metadata), WRITE_BATCH_SIZE):
+            batch = plan.update_metadata[i:i + WRITE_BATCH_SIZE]
+            batch_ids = [record.id for record in batch]
+            # Документ зависит от метаданных (URI). Без векторов ChromaDB векторизовала бы новый
+            # документ своей функцией эмбеддингов, поэтому сохраненные векторы передаются явно
+            stored = self.collection.get(ids=batch_ids, include=['embeddings'])
+            stored_embeddings = dict(zip(stored['ids'], stored['embeddings']))
+            self.collection.update(
                 ids=batch_ids,
-                embeddings=batch_embeddings,
-                metadatas=batch_metadatas,
-                documents=batch_texts
+                embeddings=[stored_embeddings[record_id] for record_id in batch_ids],
+                metadatas=[record.metadata for record in batch],
+                documents=[record.document for record in batch]
             )
-            
+            done += len(batch)
+            if progress_callback:
+                progress_callback(done, total, f"Обновлены метаданные {done} записей...")
+        
+        if plan.embed:
             if progress_callback:
-                progress_callback(min(i + batch_size, total), total, 
-                                 f"Обработано {min(i + batch_size, total)} из {total} контролей...")
+                progress_callback(done, total, "Генерация эмбеддингов...")
+            
+            # Готовые порции эмбеддингов сразу записываются в ChromaDB, пока векторизуются остальные
+            # (upsert - запись могла существовать с другим текстом)
+            texts = [record.text for record in plan.embed]
+            embedded = 0
+            for start, embeddings in self.embedding_generator.iter_embedding_chunks(
+                    texts, batch_size=batch_size, workers=workers):
+                for i in range(0, len(embeddings), WRITE_BATCH_SIZE):
+                    batch_embeddings = embeddings[i:i + WRITE_BATCH_SIZE]
+                    batch = plan.embed[start + i:start + i + len(batch_embeddings)]
+                    self.collection.upsert(
+                        ids=[record.id for record in batch],
+                        embeddings=batch_embeddings,
+                        metadatas=[record.metadata for record in batch],
+                        documents=[record.document for record in batch]
+                    )
+                embedded += len(embeddings)
+                done += len(embeddings)
+                if progress_callback:
+                    progress_callback(done, total, f"Векторизовано {embedded} из {len(plan.embed)} контролей...")
         
         if progress_callback:
             progress_callback(total, total, "Готово!")
     
-    def search(self, query: str, n_results: int = 10) -> List[dict]:
+    def search(self, query: str, n_results: int = 10, filters: Optional[Dict] = None) -> List[dict]:
         """
         Выполняет семантический поиск по векторной БД.
         
         Args:
             query: Текст запроса
             n_results: Количество результатов
-            
+            filters: Словарь фильтров в формате FilterState.get_filters()
+                     (выполняются в ChromaDB, см. search_many)
+        
         Returns:
             Список словарей с результатами поиска
         """
+        if not query:
+            return []
+        
+        return self.search_many([query], n_results, filters=filters)[0]
+    
+    def search_many(self, queries: List[str], n_results: int = 10, batch_size: int = 32,
+                    filters: Optional[Dict] = None) -> List[List[dict]]:
+        """
+        Выполняет семантический поиск сразу по нескольким запросам.
+        
+        Запросы векторизуются одним проходом модели (повторяющиеся берутся
+        из кэша векторов запросов), а ChromaDB опрашивается пакетами по
+        QUERY_BATCH_SIZE запросов вместо отдельного вызова на каждый запрос.
+        
+        Фильтры переводятся в условия where/where_document и выполняются в
+        ChromaDB, поэтому каждый запрос возвращает n_results ближайших среди
+        контролей, удовлетворяющих фильтрам.
+        
+        Args:
+            queries: Тексты запросов
+            n_results: Количество результатов на запрос
+            batch_size: Размер батча модели эмбеддингов
+            filters: Словарь фильтров в формате FilterState.get_filters() (None - без фильтров)
+        
+        Returns:
+            Списки результатов в порядке запросов (для пустых запросов - пустые списки)
+        
+        Raises:
+            ValueError: Если фильтры заданы, а коллекция построена без
+                        нормализованных метаданных
+        """
         if self.collection is None:
             self.initialize()
         
-        if not query:
-            return []
+        results: List[List[dict]] = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query]
+        if not positions:
+            return results
         
-        # Генерируем эмбеддинг для запроса
-        query_embedding = self.embedding_generator.generate_embedding(query)
+        conditions = build_where(filters or {}, (self.collection.metadata or {}).get(FILTER_VALUES_KEY))
+        if conditions is None:
+            # Фильтрам не соответствует ни одна запись
+            return results
+        where, where_document = conditions
         
-        # Выполняем поиск
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
+        query_embeddings = self.embedding_generator.encode_queries([queries[i] for i in positions], batch_size)
         
-        # Форматируем результаты
+        for start in range(0, len(positions), QUERY_BATCH_SIZE):
+            batch = self.collection.query(
+                query_embeddings=query_embeddings[start:start + QUERY_BATCH_SIZE],
+                n_results=n_results,
+                where=where,
+                where_document=where_document
+            )
+            for offset, position in enumerate(positions[start:start + QUERY_BATCH_SIZE]):
+                results[position] = self._format_results(batch, offset)
+        
+        return results
+    
+    @staticmethod
+    def _format_results(results: dict, row: int) -> List[dict]:
+        """Форматирует результаты одного запроса из ответа collection.query."""
         formatted_results = []
-        if results['ids'] and len(results['ids'][0]) > 0:
-            for i in range(len(results['ids'][0])):
+        if results['ids'] and len(results['ids'][row]) > 0:
+            for i in range(len(results['ids'][row])):
                 result = {
-                    'id': results['ids'][0][i],
-                    'metadata': results['metadatas'][0][i],
-                    'distance': results['distances'][0][i] if 'distances' in results else None,
-                    'document': results['documents'][0][i] if 'documents' in results else None
+                    'id': results['ids'][row][i],
+                    'metadata': results['metadatas'][row][i],
+                    'distance': results['distances'][row][i] if results.get('distances') else None,
+                    'document': results['documents'][row][i] if results.get('documents') else None
                 }
                 formatted_results.append(result)
         
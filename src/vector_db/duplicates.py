@@ -0,0 +1,153 @@
+"""
+Поиск почти одинаковых контролей по эмбеддингам векторной БД.
+
+Векторы коллекции выгружаются постранично в нормализованную матрицу float32
+на диске (np.memmap), после чего косинусное сходство всех пар считается
+блочным умножением матриц: блок строк умножается на блоки столбцов правее
+диагонали, из каждого произведения отбираются пары выше порога. В памяти
+одновременно находятся только два блока векторов и их произведение, а
+основная работа выполняется BLAS, поэтому 100 тыс. контролей обрабатываются
+за минуты на одном процессоре.
+"""
+
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .chroma_manager import ChromaDBManager
+
+# Порог косинусного сходства по умолчанию
+DEFAULT_THRESHOLD = 0.95
+# Количество векторов в блоке (произведение блоков - BLOCK_SIZE^2 float32)
+BLOCK_SIZE = 4096
+# Поля контроля в отчете: заголовок -> ключ метаданных записи
+REPORT_FIELDS = {
+    'Идентификатор': 'identifier',
+    'Наименование': 'name',
+    'КодТаблицы': 'table_code',
+    'Таксономия': 'taxonomy',
+    'Рынок': 'market',
+}
+SIMILARITY_COLUMN = 'Сходство'
+
+
+class DuplicatePairs(NamedTuple):
+    """
+    Найденные пары похожих записей.
+    
+    Атрибуты:
+        first: Номера первых записей пар (строки матрицы векторов)
+        second: Номера вторых записей пар (second > first)
+        similarity: Косинусное сходство пар
+    """
+    first: np.ndarray
+    second: np.ndarray
+    similarity: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.similarity)
+
+
+def export_embeddings(manager: ChromaDBManager, path: Path) -> Tuple[List[str], List[Dict[str, str]], np.memmap]:
+    """
+    Выгружает векторы коллекции в нормализованную матрицу на диске.
+    
+    Args:
+        manager: Менеджер векторной БД
+        path: Путь к файлу матрицы (.npy)
+    
+    Returns:
+        Кортеж (ID записей, метаданные записей для отчета, матрица векторов
+        единичной длины в порядке ID)
+    """
+    count = manager.get_collection_count()
+    ids: List[str] = []
+    metadatas: List[Dict[str, str]] = []
+    matrix = None
+    for page in manager.iter_pages(['embeddings', 'metadatas']):
+        if not len(page['ids']):
+            break
+        vectors = np.asarray(page['embeddings'], dtype=np.float32)
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(count, vectors.shape[1]))
+        # Коллекция могла вырасти после подсчета записей - лишние записи не выгружаются
+        vectors = vectors[:count - len(ids)]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        matrix[len(ids):len(ids) + len(vectors)] = vectors / np.maximum(norms, 1e-12)
+        ids.extend(page['ids'][:len(vectors)])
+        metadatas.extend({key: (metadata or {}).get(key, '') for key in REPORT_FIELDS.values()}
+                         for metadata in page['metadatas'][:len(vectors)])
+        if len(ids) == count:
+            break
+    
+    if matrix is None:
+        return [], [], np.empty((0, 0), dtype=np.float32)
+    matrix.flush()
+    return ids, metadatas, matrix[:len(ids)]
+
+
+def find_near_duplicates(matrix: np.ndarray, threshold: float = DEFAULT_THRESHOLD,
+                         block_size: int = BLOCK_SIZE, progress_callback=None) -> DuplicatePairs:
+    """
+    Находит все пары строк матрицы с косинусным сходством не ниже порога.
+    
+    Args:
+        matrix: Матрица векторов единичной длины (может быть np.memmap)
+        threshold: Порог косинусного сходства
+        block_size: Количество векторов в блоке
+        progress_callback: Функция обратного вызова (current, total, message)
+    
+    Returns:
+        Найденные пары (first < second), по убыванию сходства
+    """
+    size = len(matrix)
+    firsts, seconds, similarities = [], [], []
+    for row_start in range(0, size, block_size):
+        rows = np.ascontiguousarray(matrix[row_start:row_start + block_size])
+        for column_start in range(row_start, size, block_size):
+            columns = rows if column_start == row_start else np.ascontiguousarray(
+                matrix[column_start:column_start + block_size])
+            scores = rows @ columns.T
+            first, second = np.nonzero(scores >= threshold)
+            if column_start == row_start:
+                # Диагональный блок: каждая пара учитывается один раз, без пар записи с собой
+                upper = first < second
+                first, second = first[upper], second[upper]
+            similarities.append(scores[first, second])
+            firsts.append(first + row_start)
+            seconds.append(second + column_start)
+        if progress_callback:
+            done = min(row_start + block_size, size)
+            progress_callback(done, size, f"Сравнено {done} из {size} записей...")
+    
+    if not similarities:
+        empty = np.empty(0, dtype=np.int64)
+        return DuplicatePairs(empty, empty, np.empty(0, dtype=np.float32))
+    similarity = np.concatenate(similarities)
+    order = np.argsort(-similarity, kind='stable')
+    return DuplicatePairs(np.concatenate(firsts)[order], np.concatenate(seconds)[order], similarity[order])
+
+
+def duplicates_frame(pairs: DuplicatePairs, ids: List[str], metadatas: List[Dict[str, str]]) -> pd.DataFrame:
+    """
+    Строит таблицу отчета по найденным парам.
+    
+    Args:
+        pairs: Найденные пары
+        ids: ID записей (строки матрицы векторов)
+        metadatas: Метаданные записей для отчета
+    
+    Returns:
+        DataFrame: ID и поля обеих записей пары, сходство
+    """
+    columns = {'ID': np.asarray(ids, dtype=object)}
+    for title, key in REPORT_FIELDS.items():
+        columns[title] = np.asarray([metadata[key] for metadata in metadatas], dtype=object)
+    data = {}
+    for suffix, rows in ((' 1', pairs.first), (' 2', pairs.second)):
+        for title, column in columns.items():
+            data[title + suffix] = column[rows]
+    data[SIMILARITY_COLUMN] = np.round(pairs.similarity, 4)
+    return pd.DataFrame(data)
@@ -0,0 +1,176 @@
+"""
+Дисковый кэш эмбеддингов.
+
+Эмбеддинги хранятся отдельно для каждой модели и ищутся по SHA-256 текста,
+поэтому повторная векторизация (пересоздание БД после правки нескольких строк
+макета, другая коллекция с той же моделью) берет готовые векторы без модели.
+
+Структура каталога модели:
+    vectors.bin - векторы подряд (float16 или float32), читаются через np.memmap
+    index.bin   - SHA-256 текстов (по 32 байта) в том же порядке
+    meta.json   - размерность, тип и количество записей
+
+Новые записи дописываются в конец файлов, после чего атомарно обновляется
+meta.json. Хвост, записанный после последнего meta.json (например, при сбое),
+игнорируется и отрезается при следующей записи.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Каталог кэша по умолчанию (относительно рабочей директории, как и chroma_db)
+DEFAULT_EMBEDDING_CACHE_DIR = Path('.cache') / 'embeddings'
+
+DIGEST_SIZE = 32
+
+
+def text_digest(text: str) -> bytes:
+    """Возвращает SHA-256 текста (ключ кэша)."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+def _model_dir_name(model_name: str) -> str:
+    """Имя каталога модели (без символов, недопустимых в путях)."""
+    return re.sub(r'[^\w.-]+', '_', model_name)
+
+
+class EmbeddingCache:
+    """
+    Кэш эмбеддингов одной модели на диске.
+    
+    Потокобезопасен в пределах процесса; писать в один каталог из нескольких
+    процессов одновременно нельзя.
+    """
+    
+    def __init__(self, cache_dir: Path, model_name: str, dtype: str = 'float16'):
+        """
+        Инициализирует кэш модели.
+        
+        Args:
+            cache_dir: Корневой каталог кэша эмбеддингов
+            model_name: Название модели
+            dtype: Тип хранения векторов для нового кэша (float16 или float32)
+        """
+        self.model_name = model_name
+        self.path = Path(cache_dir) / _model_dir_name(model_name)
+        self._dtype = np.dtype(dtype)
+        self._dim: Optional[int] = None
+        self._count = 0
+        self._rows: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._load()
+    
+    @property
+    def _meta_path(self) -> Path:
+        return self.path / 'meta.json'
+    
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / 'vectors.bin'
+    
+    @property
+    def _index_path(self) -> Path:
+        return self.path / 'index.bin'
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _load(self) -> None:
+        """Читает meta.json и индекс хешей (векторы открываются лениво)."""
+        try:
+            meta = json.loads(self._meta_path.read_text(encoding='utf-8'))
+            if meta.get('model_name') != self.model_name:
+                return
+            dim, dtype, count = int(meta['dim']), np.dtype(meta['dtype']), int(meta['count'])
+            with open(self._index_path, 'rb') as f:
+                index = f.read(count * DIGEST_SIZE)
+            if len(index) != count * DIGEST_SIZE or self._vectors_path.stat().st_size < count * dim * dtype.itemsize:
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        
+        self._dim, self._dtype, self._count = dim, dtype, count
+        self._rows = {index[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]: i for i in range(count)}
+    
+    def _get_vectors(self) -> np.memmap:
+        if self._vectors is None or len(self._vectors) != self._count:
+            self._vectors = np.memmap(self._vectors_path, dtype=self._dtype, mode='r', shape=(self._count, self._dim))
+        return self._vectors
+    
+    def lookup(self, digests: Sequence[bytes]) -> Tuple[List[int], Optional[np.ndarray]]:
+        """
+        Ищет векторы по хешам текстов.
+        
+        Args:
+            digests: SHA-256 текстов
+        
+        Returns:
+            Кортеж (индексы найденных хешей в digests, их векторы float32 или None)
+        """
+        with self._lock:
+            found = [(i, self._rows[d]) for i, d in enumerate(digests) if d in self._rows]
+            if not found:
+                return [], None
+            positions, rows = zip(*found)
+            # Чтение строк memmap в порядке возрастания - последовательный доступ к файлу
+            rows = np.asarray(rows)
+            order = np.argsort(rows, kind='stable')
+            vectors = np.empty((len(rows), self._dim), dtype=np.float32)
+            vectors[order] = self._get_vectors()[rows[order]]
+            return list(positions), vectors
+    
+    def add(self, digests: Sequence[bytes], vectors: np.ndarray) -> None:
+        """
+        Дописывает векторы в кэш (уже известные хеши пропускаются).
+        
+        Args:
+            digests: SHA-256 текстов
+            vectors: Векторы (по строке на хеш)
+        """
+        vectors = np.asarray(vectors)
+        if not len(digests):
+            return
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError("Размерность эмбеддингов не совпадает с кэшем модели")
+            
+            new_rows = {}
+            for i, digest in enumerate(digests):
+                if digest not in self._rows and digest not in new_rows:
+                    new_rows[digest] = i
+            if not new_rows:
+                return
+            
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Отображение файла закрываем до записи (на Windows нельзя менять размер отображенного файла)
+            self._vectors = None
+            vector_bytes = self._count * self._dim * self._dtype.itemsize
+            for file_path, size, data in (
+                (self._vectors_path, vector_bytes, vectors[list(new_rows.values())].astype(self._dtype).tobytes()),
+                (self._index_path, self._count * DIGEST_SIZE, b''.join(new_rows)),
+            ):
+                with open(file_path, 'ab') as f:
+                    # Отрезаем хвост, не подтвержденный meta.json
+                    f.truncate(size)
+                    f.write(data)
+            
+            count = self._count + len(new_rows)
+            meta = {'model_name': self.model_name, 'dim': self._dim, 'dtype': self._dtype.name, 'count': count}
+            tmp_path = self._meta_path.with_name(f'meta.json.{os.getpid()}.tmp')
+            tmp_path.write_text(json.dumps(meta), encoding='utf-8')
+            os.replace(tmp_path, self._meta_path)
+            
+            for row, digest in enumerate(new_rows, self._count):
+                self._rows[digest] = row
+            self._count = count
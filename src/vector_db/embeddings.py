@@ -2,8 +2,59 @@
 Модуль для создания эмбеддингов из текста контролей.
 """
 
-from typing import List
-from sentence_transformers import SentenceTransformer
+import threading
+from collections import OrderedDict, deque
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backends import DEFAULT_BACKEND, cache_key
+from .embedding_cache import DEFAULT_EMBEDDING_CACHE_DIR, EmbeddingCache, text_digest
+from .parallel import EncoderPool
+from .registry import get_embedding_cache, get_model
+
+
+# Размер порции текстов для потоковой (и параллельной) векторизации
+EMBED_CHUNK_SIZE = 512
+# Количество запоминаемых векторов поисковых запросов (на весь процесс)
+QUERY_CACHE_SIZE = 4096
+
+
+class QueryEmbeddingCache:
+    """
+    LRU-кэш векторов поисковых запросов, общий для всех сессий.
+    
+    Ключ - (ключ модели, текст запроса); векторы хранятся как неизменяемые
+    массивы float32.
+    """
+    
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._vectors: 'OrderedDict[Tuple[str, str], np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+            return vector
+    
+    def put(self, key: Tuple[str, str], vector: np.ndarray) -> None:
+        vector = np.array(vector, dtype=np.float32)
+        vector.flags.writeable = False
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.maxsize:
+                self._vectors.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+
+
+query_embedding_cache = QueryEmbeddingCache()
 
 
 class EmbeddingGenerator:
@@ -12,20 +63,37 @@ class EmbeddingGenerator:
     Использует модель paraphrase-multilingual-MiniLM-L12-v2 для поддержки русского языка.
     """
     
-    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self, model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+                 cache_dir: Optional[str] = str(DEFAULT_EMBEDDING_CACHE_DIR), backend: str = DEFAULT_BACKEND):
         """
         Инициализирует генератор эмбеддингов.
         
         Args:
             model_name: Название модели для создания эмбеддингов
+            cache_dir: Каталог дискового кэша эмбеддингов (None - без кэша)
+            backend: Бэкенд вычисления (torch, torch-int8, onnx, onnx-int8; см. backends.BACKENDS)
         """
         self.model_name = model_name
+        self.backend = backend
         self.model = None
+        self.cache_dir = cache_dir
+    
+    def get_cache(self) -> Optional[EmbeddingCache]:
+        """Возвращает дисковый кэш эмбеддингов текущей модели (или None, если кэш отключен)."""
+        if self.cache_dir is None:
+            return None
+        # Модель может быть заменена после создания генератора - кэш открывается по текущему имени
+        return get_embedding_cache(self.cache_dir, cache_key(self.model_name, self.backend))
     
     def load_model(self):
-        """Загружает модель эмбеддингов."""
+        """
+        Загружает модель эмбеддингов.
+        
+        Модель берется из общего для процесса реестра: загружается один раз
+        и разделяется всеми генераторами и сессиями.
+        """
         if self.model is None:
-            self.model = SentenceTransformer(self.model_name)
+            self.model = get_model(self.model_name, self.backend)
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -33,7 +101,7 @@ class EmbeddingGenerator:
         
         Args:
             text: Текст для векторизации
-            
+        
         Returns:
             Список чисел (вектор эмбеддинга)
         """
@@ -48,32 +116,153 @@ class EmbeddingGenerator:
         embedding = self.model.encode(text, show_progress_bar=False)
         return embedding.tolist()
     
+    def encode_queries(self, queries: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Векторизует поисковые запросы одним проходом модели.
+        
+        Векторы повторяющихся запросов берутся из общего LRU-кэша
+        (query_embedding_cache); модель вызывается один раз для всех
+        новых различных запросов.
+        
+        Args:
+            queries: Тексты запросов
+            batch_size: Размер батча модели
+        
+        Returns:
+            Матрица векторов float32 (по строке на запрос)
+        """
+        model_key = cache_key(self.model_name, self.backend)
+        texts = [query if query else " " for query in queries]
+        vectors = [query_embedding_cache.get((model_key, text)) for text in texts]
+        
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing:
+            if self.model is None:
+                self.load_model()
+            encoded = np.asarray(self.model.encode(
+                missing,
+                batch_size=batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            ), dtype=np.float32)
+            found = dict(zip(missing, encoded))
+            for text, vector in found.items():
+                query_embedding_cache.put((model_key, text), vector)
+            vectors = [found[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(vectors)
+    
     def generate_embeddings_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
         """
         Генерирует эмбеддинги для списка текстов.
         
+        Векторы текстов, уже векторизованных этой моделью, берутся из дискового
+        кэша; модель загружается и вызывается только для остальных текстов.
+        
         Args:
             texts: Список текстов для векторизации
             batch_size: Размер батча для обработки
-            
+        
         Returns:
             Список векторов эмбеддингов
         """
-        if self.model is None:
-            self.load_model()
-        
         if not texts:
             return []
         
         # Заменяем пустые тексты на пробел
         processed_texts = [text if text else " " for text in texts]
         
-        embeddings = self.model.encode(
-            processed_texts,
+        cache = self.get_cache()
+        if cache is None:
+            return self._encode(processed_texts, batch_size).tolist()
+        
+        digests = [text_digest(text) for text in processed_texts]
+        hit_positions, hit_vectors = cache.lookup(digests)
+        if len(hit_positions) == len(texts):
+            return hit_vectors.tolist()
+        
+        hits = set(hit_positions)
+        miss_positions = [i for i in range(len(texts)) if i not in hits]
+        miss_vectors = self._encode([processed_texts[i] for i in miss_positions], batch_size)
+        cache.add([digests[i] for i in miss_positions], miss_vectors)
+        
+        embeddings = np.empty((len(texts), miss_vectors.shape[1]), dtype=np.float32)
+        embeddings[miss_positions] = miss_vectors
+        if hit_positions:
+            embeddings[hit_positions] = hit_vectors
+        return embeddings.tolist()
+    
+    def iter_embedding_chunks(self, texts: List[str], batch_size: int = 32, workers: int = 1,
+                              chunk_size: int = EMBED_CHUNK_SIZE) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Векторизует тексты порциями и отдает готовые порции по мере готовности.
+        
+        Тексты из дискового кэша модель не вызывают. При workers > 1 остальные
+        тексты векторизуются в пуле процессов (у каждого своя копия модели),
+        и порции могут приходить не по порядку.
+        
+        Args:
+            texts: Список текстов для векторизации
+            batch_size: Размер батча модели
+            workers: Количество процессов векторизации (1 - в текущем процессе)
+            chunk_size: Количество текстов в порции
+        
+        Yields:
+            Пары (индекс первого текста порции в texts, векторы порции float32)
+        """
+        # Заменяем пустые тексты на пробел
+        processed_texts = [text if text else " " for text in texts]
+        cache = self.get_cache()
+        ready = deque()
+        partial = {}
+        
+        def chunks():
+            for start in range(0, len(processed_texts), chunk_size):
+                chunk = processed_texts[start:start + chunk_size]
+                digests = [text_digest(text) for text in chunk] if cache is not None else None
+                hit_positions, hit_vectors = cache.lookup(digests) if cache is not None else ([], None)
+                if len(hit_positions) == len(chunk):
+                    ready.append((start, hit_vectors))
+                    continue
+                hits = set(hit_positions)
+                miss_positions = [i for i in range(len(chunk)) if i not in hits]
+                partial[start] = (len(chunk), digests, miss_positions, hit_positions, hit_vectors)
+                yield start, [chunk[i] for i in miss_positions]
+        
+        def complete(start: int, miss_vectors: np.ndarray) -> Tuple[int, np.ndarray]:
+            size, digests, miss_positions, hit_positions, hit_vectors = partial.pop(start)
+            if cache is not None:
+                cache.add([digests[i] for i in miss_positions], miss_vectors)
+            vectors = np.empty((size, miss_vectors.shape[1]), dtype=np.float32)
+            vectors[miss_positions] = miss_vectors
+            if hit_positions:
+                vectors[hit_positions] = hit_vectors
+            return start, vectors
+        
+        if workers > 1:
+            with EncoderPool(self.model_name, workers, backend=self.backend) as pool:
+                for start, miss_vectors in pool.imap_unordered(chunks(), batch_size):
+                    while ready:
+                        yield ready.popleft()
+                    yield complete(start, miss_vectors)
+        else:
+            for start, miss_texts in chunks():
+                while ready:
+                    yield ready.popleft()
+                yield complete(start, self._encode(miss_texts, batch_size))
+        while ready:
+            yield ready.popleft()
+    
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Векторизует тексты моделью."""
+        if self.model is None:
+            self.load_model()
+        
+        return self.model.encode(
+            texts,
             batch_size=batch_size,
             show_progress_bar=True,
             convert_to_numpy=True
         )
-        
-        return embeddings.tolist()
-
@@ -0,0 +1,173 @@
+"""
+Перевод фильтров каталога в условия запросов ChromaDB.
+
+Фильтры FilterState (см. catalog.filter_engine) выполняются в самой ChromaDB,
+чтобы семантический поиск с фильтрами возвращал верные top-k за один запрос:
+- флаги да/нет - условие where на нормализованных (нижний регистр) копиях
+  полей в метаданных записи;
+- категориальные поля (поиск подстроки в значении) - условие where $in по
+  значениям, содержащим подстроку; список значений каждого поля хранится в
+  метаданных коллекции и обновляется при каждой синхронизации;
+- идентификатор, наименование и URI (поиск подстроки) - регулярное
+  выражение where_document по строке поля в заголовке документа записи.
+  Заголовок - первые строки документа, по одной на поле, в порядке
+  DOCUMENT_FIELDS; переводы строк внутри значений заменены пробелами.
+  Выражение привязано к номеру строки поля, поэтому строки вида
+  «Наименование: ...» внутри многострочных описания или алгоритма не дают
+  ложных совпадений, а значение с переводом строки находится целиком.
+
+Нормализованные копии полей и версия формата документа добавляются в
+метаданные при построении БД; записи со старым форматом документа
+обновляются синхронизацией без повторной векторизации.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Префикс ключей метаданных с нормализованными значениями полей
+NORMALIZED_PREFIX = 'norm_'
+# Ключ метаданных коллекции со значениями категориальных полей
+FILTER_VALUES_KEY = 'filter_values'
+
+# Поля фильтров в терминах catalog.filter_engine
+FLAG_FIELDS = ('required', 'correction_available', 'approval')
+CATEGORY_FIELDS = ('table_code', 'taxonomy', 'market')
+# Поля поиска подстроки и метки их строк в документе записи
+DOCUMENT_FIELDS = {
+    'identifier': 'Идентификатор',
+    'name': 'Наименование',
+    'uri': 'URI',
+}
+
+# Ключ метаданных записи с версией формата документа и текущая версия
+DOCUMENT_FORMAT_KEY = 'document_format'
+DOCUMENT_FORMAT = 3
+
+# Символы, экранируемые в регулярных выражениях ChromaDB
+_REGEX_SPECIAL = frozenset('\\.+*?()|[]{}^$#&-~')
+
+
+def normalized_key(field_name: str) -> str:
+    """Возвращает ключ метаданных с нормализованным значением поля."""
+    return NORMALIZED_PREFIX + field_name
+
+
+def normalized_metadata(metadata: Dict[str, str]) -> Dict[str, str]:
+    """
+    Возвращает нормализованные копии полей фильтров для метаданных записи.
+    
+    Args:
+        metadata: Метаданные контроля (Control.to_dict())
+    
+    Returns:
+        Словарь {norm_<поле>: значение в нижнем регистре}
+    """
+    return {normalized_key(field_name): (metadata.get(field_name) or '').lower()
+            for field_name in FLAG_FIELDS + CATEGORY_FIELDS}
+
+
+def document_text(text: str, metadata: Dict[str, str]) -> str:
+    """
+    Возвращает документ записи: заголовок с полями фильтров и текст для эмбеддинга.
+    
+    Заголовок (строки DOCUMENT_FIELDS, даже пустые, значения в одну строку)
+    есть только в документе, чтобы фильтровать по нему через where_document,
+    не меняя векторов.
+    
+    Args:
+        text: Текст для эмбеддинга
+        metadata: Метаданные контроля
+    
+    Returns:
+        Текст документа
+    """
+    header = [f"{label}: {_single_line(metadata.get(field_name) or '')}"
+              for field_name, label in DOCUMENT_FIELDS.items()]
+    return '\n'.join(header + [text])
+
+
+def collect_filter_values(metadatas: Iterable[Dict[str, str]]) -> str:
+    """
+    Собирает значения категориальных полей для метаданных коллекции.
+    
+    Args:
+        metadatas: Метаданные всех записей коллекции
+    
+    Returns:
+        JSON {поле: отсортированный список нормализованных значений}
+    """
+    values = {field_name: set() for field_name in CATEGORY_FIELDS}
+    for metadata in metadatas:
+        for field_name in CATEGORY_FIELDS:
+            values[field_name].add(metadata[normalized_key(field_name)])
+    return json.dumps({field_name: sorted(field_values) for field_name, field_values in values.items()},
+                      ensure_ascii=False)
+
+
+def _single_line(text: str) -> str:
+    """Заменяет переводы строк пробелами (значение поля занимает одну строку документа)."""
+    return ' '.join(text.splitlines())
+
+
+def _escape_regex(text: str) -> str:
+    return ''.join('\\' + char if char in _REGEX_SPECIAL else char for char in text)
+
+
+def _document_pattern(field_name: str, search_term: str) -> str:
+    """
+    Возвращает регулярное выражение поиска подстроки в строке поля заголовка документа.
+    
+    \\A - начало документа, за ним пропускаются строки предыдущих полей
+    заголовка; [^\\n]* - поиск в пределах строки поля.
+    """
+    term = _escape_regex(_single_line(search_term))
+    line = list(DOCUMENT_FIELDS).index(field_name)
+    return f"(?i)\\A(?:[^\\n]*\\n){{{line}}}{DOCUMENT_FIELDS[field_name]}: [^\\n]*{term}"
+
+
+def _combine(clauses: List[Dict]) -> Optional[Dict]:
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def build_where(filters: Dict, filter_values: Optional[str]) -> Optional[Tuple[Optional[Dict], Optional[Dict]]]:
+    """
+    Переводит словарь фильтров в условия where и where_document.
+    
+    Семантика совпадает с FilterEngine: флаги сравниваются с «да»/«нет»,
+    категориальные поля и поля подстрок - поиск подстроки без учета регистра.
+    
+    Args:
+        filters: Словарь фильтров в формате FilterState.get_filters()
+        filter_values: Значения категориальных полей из метаданных коллекции
+                       (см. collect_filter_values)
+    
+    Returns:
+        Кортеж (where, where_document) (None - условие не нужно) или None,
+        если фильтрам не соответствует ни одна запись
+    
+    Raises:
+        ValueError: Если задан фильтр по флагу или категории, а коллекция
+                    создана без нормализованных метаданных (нужно синхронизировать БД)
+    """
+    flags = [field_name for field_name in FLAG_FIELDS if filters.get(field_name) is not None]
+    categories = [field_name for field_name in CATEGORY_FIELDS if filters.get(field_name)]
+    if (flags or categories) and not filter_values:
+        raise ValueError("Коллекция создана без нормализованных метаданных - синхронизируйте векторную БД")
+    
+    where = [{normalized_key(field_name): 'да' if filters[field_name] else 'нет'} for field_name in flags]
+    values = json.loads(filter_values) if categories else {}
+    for field_name in categories:
+        search_term = filters[field_name].lower()
+        matching = [value for value in values.get(field_name, []) if search_term in value]
+        if not matching:
+            return None
+        where.append({normalized_key(field_name): {'$in': matching}})
+    
+    where_document = []
+    for field_name in DOCUMENT_FIELDS:
+        if filters.get(field_name):
+            where_document.append({'$regex': _document_pattern(field_name, filters[field_name])})
+    
+    return _combine(where), _combine(where_document)
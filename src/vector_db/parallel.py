@@ -0,0 +1,123 @@
+"""
+Параллельная векторизация текстов в пуле процессов.
+
+Каждый процесс пула загружает свою копию модели один раз (в initializer)
+и векторизует присланные порции текстов. Порции отдаются по мере готовности,
+поэтому вызывающий код может записывать готовые векторы в БД, пока
+остальные порции еще векторизуются.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .backends import DEFAULT_BACKEND, load_model
+
+
+# Модель, загруженная в процессе пула
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int) -> None:
+    """Загружает модель в процессе пула и ограничивает число потоков вычислений."""
+    global _worker_model
+    # Потоки BLAS/torch делятся между процессами пула, иначе ядра переподписываются
+    os.environ.setdefault('OMP_NUM_THREADS', str(threads))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = load_model(model_name, backend)
+
+
+def _encode_chunk(texts: List[str], batch_size: int) -> np.ndarray:
+    """Векторизует порцию текстов моделью процесса."""
+    return _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True
+    ).astype(np.float32, copy=False)
+
+
+def default_workers() -> int:
+    """Количество процессов по умолчанию - по числу доступных ядер."""
+    return max(1, len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1))
+
+
+class EncoderPool:
+    """
+    Пул процессов с моделью эмбеддингов.
+    
+    Использование:
+        with EncoderPool(model_name, workers=8) as pool:
+            for key, vectors in pool.imap_unordered(chunks, batch_size=32):
+                ...
+    """
+    
+    def __init__(self, model_name: str, workers: int, threads_per_worker: Optional[int] = None,
+                 backend: str = DEFAULT_BACKEND):
+        """
+        Инициализирует пул.
+        
+        Args:
+            model_name: Название модели sentence-transformers
+            workers: Количество процессов
+            threads_per_worker: Потоков вычислений на процесс (по умолчанию ядра / процессы)
+            backend: Бэкенд вычисления эмбеддингов (см. backends.BACKENDS)
+        """
+        self.workers = workers
+        threads = threads_per_worker or max(1, default_workers() // workers)
+        # spawn: модель и torch не наследуются из родительского процесса через fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_name, backend, threads),
+        )
+    
+    def __enter__(self) -> 'EncoderPool':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+    
+    def imap_unordered(self, chunks: Iterable[Tuple[object, List[str]]],
+                       batch_size: int = 32) -> Iterator[Tuple[object, np.ndarray]]:
+        """
+        Векторизует порции текстов, отдавая результаты по мере готовности.
+        
+        Порции берутся из chunks лениво: в работе одновременно не больше
+        двух порций на процесс, поэтому подготовка следующих порций и
+        обработка готовых результатов идут параллельно с векторизацией.
+        
+        Args:
+            chunks: Пары (ключ порции, тексты)
+            batch_size: Размер батча модели
+        
+        Yields:
+            Пары (ключ порции, векторы float32)
+        """
+        pending: Dict[Future, object] = {}
+        chunks = iter(chunks)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < self.workers * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                key, texts = chunk
+                pending[self._executor.submit(_encode_chunk, texts, batch_size)] = key
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
@@ -0,0 +1,162 @@
+"""
+Общий для всего процесса реестр моделей эмбеддингов и клиентов ChromaDB.
+
+Загрузка модели занимает секунды, поэтому модель загружается один раз на
+процесс и разделяется всеми сессиями Streamlit и всеми экземплярами
+EmbeddingGenerator. Так же разделяются клиенты ChromaDB (по пути к БД) и
+дисковые кэши эмбеддингов (по каталогу и модели).
+
+warm_up() при старте сервера загружает модель и открывает БД в фоновом
+потоке, чтобы первый семантический поиск сессии не ждал загрузки модели.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+import chromadb
+from chromadb.config import Settings
+
+from .backends import DEFAULT_BACKEND, load_model
+from .embedding_cache import EmbeddingCache
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+DEFAULT_DB_PATH = "chroma_db"
+
+_models: Dict[Tuple[str, str], object] = {}
+_clients: Dict[Path, chromadb.ClientAPI] = {}
+_caches: Dict[Tuple[Path, str], EmbeddingCache] = {}
+_warmed_up: Set[Tuple[str, str, Optional[Path]]] = set()
+
+# Общая блокировка защищает словари; загрузка каждого ключа идет под своей
+# блокировкой, чтобы разные модели и БД открывались параллельно
+_lock = threading.Lock()
+_key_locks: Dict[Hashable, threading.Lock] = {}
+
+
+def _key_lock(key: Hashable) -> threading.Lock:
+    with _lock:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def get_model(model_name: str, backend: str = DEFAULT_BACKEND):
+    """
+    Возвращает модель эмбеддингов, загружая ее при первом обращении.
+    
+    Одновременные обращения к еще не загруженной модели ждут одну загрузку.
+    
+    Args:
+        model_name: Название модели sentence-transformers
+        backend: Бэкенд вычисления (см. backends.BACKENDS)
+    
+    Returns:
+        Объект модели с методом encode
+    """
+    key = (model_name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+    
+    with _key_lock(('model',) + key):
+        model = _models.get(key)
+        if model is None:
+            model = load_model(model_name, backend)
+            _models[key] = model
+        return model
+
+
+def get_chroma_client(db_path: str) -> chromadb.ClientAPI:
+    """
+    Возвращает клиент ChromaDB для каталога БД (создавая каталог при необходимости).
+    
+    Args:
+        db_path: Путь к директории БД (относительные и абсолютные пути к
+                 одному каталогу дают один клиент)
+    
+    Returns:
+        Клиент PersistentClient
+    """
+    path = Path(db_path).resolve()
+    client = _clients.get(path)
+    if client is not None:
+        return client
+    
+    with _key_lock(('client', path)):
+        client = _clients.get(path)
+        if client is None:
+            path.mkdir(parents=True, exist_ok=True)
+            client = chromadb.PersistentClient(
+                path=str(path),
+                settings=Settings(anonymized_telemetry=False)
+            )
+            _clients[path] = client
+        return client
+
+
+def get_embedding_cache(cache_dir: str, model_key: str) -> EmbeddingCache:
+    """
+    Возвращает дисковый кэш эмбеддингов модели.
+    
+    Один экземпляр на каталог в процессе: EmbeddingCache потокобезопасен
+    только в пределах экземпляра.
+    
+    Args:
+        cache_dir: Корневой каталог кэша эмбеддингов
+        model_key: Ключ модели (см. backends.cache_key)
+    
+    Returns:
+        Кэш эмбеддингов
+    """
+    key = (Path(cache_dir).resolve(), model_key)
+    with _lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = EmbeddingCache(key[0], model_key)
+        return cache
+
+
+def warm_up(model_name: str = DEFAULT_MODEL_NAME, backend: str = DEFAULT_BACKEND,
+            db_path: Optional[str] = DEFAULT_DB_PATH) -> Optional[threading.Thread]:
+    """
+    Загружает модель и открывает БД в фоновом потоке (один раз на процесс).
+    
+    Если каталог БД не существует, семантический поиск недоступен и прогрев
+    не выполняется. Ошибки прогрева не прерывают работу: модель будет
+    загружена при первом поиске, где ошибка и будет показана.
+    
+    Args:
+        model_name: Название модели эмбеддингов
+        backend: Бэкенд вычисления
+        db_path: Путь к директории БД (None - прогреть только модель)
+    
+    Returns:
+        Запущенный поток или None, если прогрев уже выполнялся или не нужен
+    """
+    path = Path(db_path).resolve() if db_path is not None else None
+    if path is not None and not path.exists():
+        return None
+    
+    key = (model_name, backend, path)
+    with _lock:
+        if key in _warmed_up:
+            return None
+        _warmed_up.add(key)
+    
+    def run():
+        try:
+            if path is not None:
+                get_chroma_client(str(path))
+            get_model(model_name, backend)
+        except Exception as e:
+            logger.warning("Не удалось прогреть модель эмбеддингов %s (%s): %s", model_name, backend, e)
+    
+    thread = threading.Thread(target=run, name='embedding-warm-up', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,152 @@
+"""
+Инкрементальная синхронизация векторной БД с каталогом контролей.
+
+Каждой записи коллекции присваивается стабильный ID, не зависящий от порядка
+строк в макете, а в метаданных сохраняются хеши текста для эмбеддинга и
+метаданных контроля. Сравнение хешей с тем, что уже лежит в коллекции,
+определяет минимальный набор операций: новые и изменившиеся по тексту
+контроли векторизуются заново, у изменившихся только по метаданным
+обновляются метаданные, исчезнувшие из макета - удаляются.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from ..catalog.control_index import control_keys
+from ..models.control import Control
+from .metadata_filters import DOCUMENT_FORMAT, DOCUMENT_FORMAT_KEY, document_text, normalized_metadata
+
+
+# Ключи метаданных с хешами (не пересекаются с полями Control)
+TEXT_HASH_KEY = 'text_hash'
+METADATA_HASH_KEY = 'metadata_hash'
+# Префикс ID записи перед первичным ключом контроля
+RECORD_ID_PREFIX = 'control_'
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """Возвращает хеш текста для эмбеддинга."""
+    return _sha256(text)
+
+
+def metadata_hash(metadata: Dict[str, str]) -> str:
+    """Возвращает хеш метаданных контроля (не зависит от порядка ключей)."""
+    return _sha256(json.dumps(metadata, ensure_ascii=False, sort_keys=True))
+
+
+def stable_ids(controls: Sequence[Control]) -> List[str]:
+    """
+    Возвращает стабильные ID записей для контролей.
+    
+    ID - первичный ключ контроля в каталоге (см. catalog.control_index) с
+    префиксом: повторяющиеся идентификаторы нумеруются в порядке следования
+    (control_X, control_X#2, ...), поэтому вставка или удаление строк в макете
+    не сдвигает ID остальных контролей. Для контролей без идентификатора
+    используется хеш текста.
+    
+    Args:
+        controls: Контроли в порядке следования в макете
+    
+    Returns:
+        Список ID той же длины
+    """
+    return [RECORD_ID_PREFIX + key for key in control_keys(controls)]
+
+
+class SyncRecord(NamedTuple):
+    """
+    Запись коллекции, подготовленная из контроля.
+    
+    Атрибуты:
+        id: Стабильный ID записи
+        text: Текст для эмбеддинга
+        metadata: Метаданные контроля вместе с нормализованными полями и хешами
+    """
+    id: str
+    text: str
+    metadata: Dict[str, str]
+    
+    @property
+    def hashes(self) -> Tuple[str, str]:
+        return self.metadata[TEXT_HASH_KEY], self.metadata[METADATA_HASH_KEY]
+    
+    @property
+    def document(self) -> str:
+        """Документ записи (заголовок с полями фильтров и текст, см. metadata_filters.document_text)."""
+        return document_text(self.text, self.metadata)
+
+
+def prepare_records(controls: Sequence[Control]) -> List[SyncRecord]:
+    """
+    Подготавливает записи коллекции (ID, текст, метаданные с хешами) для контролей.
+    
+    В метаданные добавляются нормализованные копии полей фильтров и версия
+    формата документа; они входят в хеш метаданных, поэтому коллекции,
+    построенные без них (или со старым форматом документа), получают их при
+    инкрементальной синхронизации без повторной векторизации.
+    
+    Args:
+        controls: Контроли в порядке следования в макете
+    
+    Returns:
+        Список записей
+    """
+    records = []
+    for record_id, control in zip(stable_ids(controls), controls):
+        text = control.get_text_for_embedding()
+        metadata = control.to_dict()
+        metadata.update(normalized_metadata(metadata))
+        metadata[DOCUMENT_FORMAT_KEY] = DOCUMENT_FORMAT
+        metadata[METADATA_HASH_KEY] = metadata_hash(metadata)
+        metadata[TEXT_HASH_KEY] = text_hash(text)
+        records.append(SyncRecord(record_id, text, metadata))
+    return records
+
+
+class SyncPlan(NamedTuple):
+    """
+    План синхронизации коллекции.
+    
+    Атрибуты:
+        embed: Записи, которые нужно векторизовать (новые и с измененным текстом)
+        update_metadata: Записи, у которых изменились только метаданные
+        delete: ID записей коллекции, отсутствующих в макете
+        unchanged: Количество записей без изменений
+    """
+    embed: List[SyncRecord]
+    update_metadata: List[SyncRecord]
+    delete: List[str]
+    unchanged: int
+
+
+def plan_sync(records: Sequence[SyncRecord], stored: Dict[str, Tuple[str, str]]) -> SyncPlan:
+    """
+    Сравнивает подготовленные записи с содержимым коллекции.
+    
+    Args:
+        records: Записи, построенные по текущему макету
+        stored: Хеши записей коллекции {ID: (хеш текста, хеш метаданных)};
+                для записей без хешей значения - пустые строки
+    
+    Returns:
+        План синхронизации
+    """
+    embed, update_metadata = [], []
+    unchanged = 0
+    current_ids = set()
+    for record in records:
+        current_ids.add(record.id)
+        stored_hashes = stored.get(record.id)
+        if stored_hashes is None or stored_hashes[0] != record.hashes[0]:
+            embed.append(record)
+        elif stored_hashes[1] != record.hashes[1]:
+            update_metadata.append(record)
+        else:
+            unchanged += 1
+    delete = [record_id for record_id in stored if record_id not in current_ids]
+    return SyncPlan(embed, update_metadata, delete, unchanged)
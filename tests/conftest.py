@@ -0,0 +1,57 @@
+"""
+Общие данные тестов: случайные каталоги контролей.
+
+Значения берутся из небольших словарей, чтобы в каталоге были повторяющиеся
+идентификаторы, пустые значения, «#», переводы строк и «ё»; результаты
+индексов сравниваются с полным перебором.
+"""
+
+import random
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+# Добавляем корневую директорию проекта в путь для импортов
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.models.control import Control
+
+
+IDENTIFIERS = ['X', 'X#2', 'X##2', 'Y', 'y', 'ID_1', 'ID_10', '', '#']
+NAMES = ['Контроль остатков', 'Ёлка', 'елка\nвторая строка', 'Проверка сумм', 'ab', '']
+URIS = ['http://x/1.xsd', 'http://x/2.xsd;\nhttp://y/3.xsd', '', 'urn:a']
+FLAGS = ['да', 'нет', 'Да', '']
+TABLE_CODES = ['T1', 'T12', 'Т1', '']
+TAXONOMIES = ['БФО', 'НФО', '']
+MARKETS = ['Банки', 'Страхование', '']
+
+
+def random_control(rng: random.Random) -> Control:
+    """Возвращает случайный контроль из значений словарей выше."""
+    return Control(
+        uri=rng.choice(URIS),
+        identifier=rng.choice(IDENTIFIERS),
+        name=rng.choice(NAMES),
+        algorithm=rng.choice(['A <> B', 'A = B', '']),
+        correction_available=rng.choice(FLAGS),
+        description=rng.choice(['', 'Описание\nНаименование: Ёлка']),
+        required=rng.choice(FLAGS),
+        approval=rng.choice(FLAGS),
+        table_code=rng.choice(TABLE_CODES),
+        taxonomy=rng.choice(TAXONOMIES),
+        market=rng.choice(MARKETS),
+    )
+
+
+def random_controls(rng: random.Random, count: int) -> List[Control]:
+    """Возвращает случайный каталог из count контролей."""
+    return [random_control(rng) for _ in range(count)]
+
+
+@pytest.fixture(params=range(5))
+def rng(request) -> random.Random:
+    """Генератор случайных чисел с фиксированным зерном (несколько каталогов на тест)."""
+    return random.Random(request.param)
@@ -0,0 +1,47 @@
+"""Проверки первичных ключей и поиска по идентификатору ControlIndex."""
+
+from conftest import IDENTIFIERS, random_controls
+
+from src.catalog.control_index import ControlIndex, control_keys
+from src.models.control import Control
+from src.models.control_table import ControlTable
+
+
+def test_positions_match_brute_force(rng):
+    controls = random_controls(rng, 200)
+    for source in (controls, ControlTable.from_controls(controls)):
+        index = ControlIndex(source)
+        for identifier in IDENTIFIERS + ['X#3', 'нет такого']:
+            expected = [position for position, control in enumerate(controls)
+                        if identifier and control.identifier == identifier]
+            assert index.positions(identifier).tolist() == expected
+
+
+def test_keys_are_unique_and_resolve_to_their_position(rng):
+    controls = random_controls(rng, 200)
+    index = ControlIndex(controls)
+    assert len(set(index.keys)) == len(controls)
+    for position in range(len(controls)):
+        assert index.position(index.key(position)) == position
+    assert index.position('') is None
+    assert index.position(None) is None
+
+
+def test_repeat_key_does_not_collide_with_identifier():
+    controls = [Control(identifier='X'), Control(identifier='X'), Control(identifier='X#2')]
+    index = ControlIndex(controls)
+    assert index.positions('X#2').tolist() == [2]
+    assert index.positions('X').tolist() == [0, 1]
+
+
+def test_keys_of_unique_identifiers_do_not_depend_on_order(rng):
+    controls = random_controls(rng, 50)
+    keys = dict(zip(map(id, controls), control_keys(controls)))
+    shuffled = controls[:]
+    rng.shuffle(shuffled)
+    counts = {}
+    for control in controls:
+        counts[control.identifier] = counts.get(control.identifier, 0) + 1
+    for control, key in zip(shuffled, control_keys(shuffled)):
+        if control.identifier and counts[control.identifier] == 1:
+            assert key == keys[id(control)]
@@ -0,0 +1,67 @@
+"""Сравнение diff_catalogs с перебором пар контролей по первичному ключу."""
+
+from dataclasses import replace
+
+from conftest import random_control, random_controls
+
+from src.catalog.control_index import ControlIndex, control_keys
+from src.catalog.diff import NEW_COLUMN, OLD_COLUMN, changes_frame, diff_catalogs
+from src.models.control_table import CONTROL_FIELDS, ControlTable
+
+
+def edited_catalog(rng, controls):
+    """Копия каталога с удаленными, вставленными и измененными контролями."""
+    edited = []
+    for control in controls:
+        action = rng.random()
+        if action < 0.1:
+            continue
+        if action < 0.25:
+            field_name = rng.choice([name for name in CONTROL_FIELDS if name != 'identifier'])
+            control = replace(control, **{field_name: getattr(control, field_name) + ' изм.'})
+        edited.append(control)
+        if rng.random() < 0.1:
+            edited.append(random_control(rng))
+    return edited
+
+
+def test_diff_matches_brute_force(rng):
+    old_controls = random_controls(rng, 200)
+    new_controls = edited_catalog(rng, old_controls)
+    old_by_key = dict(zip(control_keys(old_controls), enumerate(old_controls)))
+    new_by_key = dict(zip(control_keys(new_controls), enumerate(new_controls)))
+    
+    diff = diff_catalogs(ControlTable.from_controls(old_controls), ControlTable.from_controls(new_controls))
+    
+    assert diff.added.tolist() == sorted(position for key, (position, _) in new_by_key.items()
+                                         if key not in old_by_key)
+    assert diff.removed.tolist() == sorted(position for key, (position, _) in old_by_key.items()
+                                           if key not in new_by_key)
+    changed = []
+    unchanged = 0
+    for key, (new_position, new_control) in new_by_key.items():
+        if key not in old_by_key:
+            continue
+        old_position, old_control = old_by_key[key]
+        fields = {name for name in CONTROL_FIELDS if getattr(old_control, name) != getattr(new_control, name)}
+        if fields:
+            changed.append((new_position, old_position, fields))
+        else:
+            unchanged += 1
+    changed.sort()
+    
+    assert diff.unchanged == unchanged
+    assert diff.changed_new.tolist() == [new_position for new_position, _, _ in changed]
+    assert diff.changed_old.tolist() == [old_position for _, old_position, _ in changed]
+    for field_name, mask in diff.changes.items():
+        assert mask.tolist() == [field_name in fields for _, _, fields in changed]
+
+
+def test_changes_frame_lists_each_changed_field(rng):
+    old_controls = random_controls(rng, 100)
+    new_controls = edited_catalog(rng, old_controls)
+    old, new = ControlTable.from_controls(old_controls), ControlTable.from_controls(new_controls)
+    diff = diff_catalogs(old, new)
+    frame = changes_frame(diff, old, new, ControlIndex(new))
+    assert len(frame) == sum(int(mask.sum()) for mask in diff.changes.values())
+    assert (frame[OLD_COLUMN] != frame[NEW_COLUMN]).all()
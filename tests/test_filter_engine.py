@@ -0,0 +1,64 @@
+"""Сравнение FilterEngine с полным перебором каталога."""
+
+import itertools
+
+from conftest import random_controls
+
+from src.catalog.filter_engine import CATEGORY_FIELDS, FLAG_FIELDS, SUBSTRING_FIELDS, FilterEngine
+from src.models.control_table import ControlTable
+
+
+def brute_force_select(controls, filters):
+    """Позиции контролей, удовлетворяющих фильтрам, прямой проверкой каждого контроля."""
+    result = []
+    for position, control in enumerate(controls):
+        matched = True
+        for field_name, value in filters.items():
+            if value is None or value == '':
+                continue
+            field_value = getattr(control, field_name).lower()
+            if field_name in FLAG_FIELDS:
+                matched &= field_value == ('да' if value else 'нет')
+            else:
+                matched &= value.lower() in field_value
+        if matched:
+            result.append(position)
+    return result
+
+
+SUBSTRING_TERMS = ['', 'x', '#2', 'id_1', 'ЁЛ', 'елка\nвт', 'контроль ост', 'http://x', ';\nh', 'zzz']
+CATEGORY_TERMS = ['', '1', 'т1', 'бфо', 'стра', 'нет такого']
+FLAG_VALUES = [None, True, False]
+
+
+def test_single_filters_match_brute_force(rng):
+    controls = random_controls(rng, 300)
+    for source in (controls, ControlTable.from_controls(controls)):
+        engine = FilterEngine(source)
+        for field_name in SUBSTRING_FIELDS:
+            for term in SUBSTRING_TERMS:
+                filters = {field_name: term}
+                assert engine.select(filters).tolist() == brute_force_select(controls, filters)
+        for field_name in CATEGORY_FIELDS:
+            for term in CATEGORY_TERMS:
+                filters = {field_name: term}
+                assert engine.select(filters).tolist() == brute_force_select(controls, filters)
+        for field_name in FLAG_FIELDS:
+            for value in FLAG_VALUES:
+                filters = {field_name: value}
+                assert engine.select(filters).tolist() == brute_force_select(controls, filters)
+
+
+def test_combined_filters_match_brute_force(rng):
+    controls = random_controls(rng, 300)
+    engine = FilterEngine(controls, version=('test', rng.random()))
+    for identifier, name, table_code, required in itertools.product(
+            ['', 'x', 'id_1'], ['', 'е', 'контроль'], ['', 't1'], FLAG_VALUES):
+        filters = {'identifier': identifier, 'name': name, 'uri': '', 'table_code': table_code,
+                   'taxonomy': '', 'market': '', 'required': required,
+                   'correction_available': None, 'approval': None}
+        expected = brute_force_select(controls, filters)
+        # Второй вызов - из кэша результатов
+        assert engine.select(filters).tolist() == expected
+        assert engine.select(filters).tolist() == expected
+        assert [control for control in engine.apply(filters)] == [controls[i] for i in expected]
@@ -0,0 +1,52 @@
+"""Сравнение фильтров в ChromaDB (build_where) с FilterEngine на тех же контролях."""
+
+import itertools
+
+import pytest
+
+from conftest import random_controls
+
+from src.catalog.filter_engine import FilterEngine
+from src.vector_db.metadata_filters import build_where, collect_filter_values
+from src.vector_db.sync import prepare_records
+
+chromadb = pytest.importorskip('chromadb')
+
+
+FILTERS = [
+    {'identifier': 'x#2'},
+    {'identifier': 'id_1'},
+    {'name': 'вторая'},
+    {'name': 'ёлка'},
+    {'name': 'наименование'},
+    {'uri': 'http://y'},
+    {'uri': 'xsd;'},
+    {'uri': '2.xsd;\nhttp'},
+    {'table_code': 't1', 'required': True},
+    {'market': 'стра', 'approval': False, 'name': 'е'},
+    {'taxonomy': 'нет такого'},
+]
+
+
+def test_collection_filters_match_filter_engine(rng):
+    controls = random_controls(rng, 150)
+    records = prepare_records(controls)
+    # Клиенты EphemeralClient одного процесса разделяют данные - у каждого каталога своя коллекция
+    collection = chromadb.EphemeralClient().create_collection(f'filters-{rng.randrange(10 ** 9)}',
+                                                              embedding_function=None)
+    collection.add(ids=[record.id for record in records], embeddings=[[1.0, 0.0]] * len(records),
+                   metadatas=[record.metadata for record in records],
+                   documents=[record.document for record in records])
+    filter_values = collect_filter_values(record.metadata for record in records)
+    positions = {record.id: position for position, record in enumerate(records)}
+    engine = FilterEngine(controls)
+    
+    for filters in FILTERS:
+        expected = engine.select(filters).tolist()
+        conditions = build_where(filters, filter_values)
+        if conditions is None:
+            assert expected == []
+            continue
+        where, where_document = conditions
+        found = collection.get(where=where, where_document=where_document)['ids']
+        assert sorted(positions[record_id] for record_id in found) == expected, filters
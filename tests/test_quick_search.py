@@ -0,0 +1,41 @@
+"""Сравнение QuickSearchIndex с полным перебором строк поиска."""
+
+import numpy as np
+
+from conftest import random_controls
+
+from src.search.quick import QUICK_SEARCH_FIELDS, QuickSearchIndex, query_terms, search_text
+
+
+QUERIES = ['', 'x', 'X#2', '#', 'id_1', 'ёлка', 'елка', 'ЕЛКА вторая', 'контроль ост', 'т1 бфо',
+           'ab', 'b', 'строка банки', 'Страхование x', 'zzz', '  ', 'елка\nвторая', 'id_10 id_1']
+
+
+def brute_force_search(rows, query, positions):
+    """Позиции из positions, строка поиска которых содержит все термы запроса."""
+    terms = query_terms(query)
+    return [position for position in positions
+            if all(term in search_text(rows[position]) for term in terms)]
+
+
+def test_search_matches_brute_force(rng):
+    controls = random_controls(rng, 300)
+    rows = [tuple(getattr(control, field_name) for field_name in QUICK_SEARCH_FIELDS) for control in controls]
+    index = QuickSearchIndex(rows)
+    subsets = [
+        np.arange(len(rows), dtype=np.int64),
+        np.asarray(rng.sample(range(len(rows)), 100), dtype=np.int64),
+        np.empty(0, dtype=np.int64),
+    ]
+    for query in QUERIES:
+        assert index.search(query).tolist() == brute_force_search(rows, query, range(len(rows)))
+        for positions in subsets:
+            # Порядок positions сохраняется
+            assert index.search(query, positions).tolist() == brute_force_search(rows, query, positions.tolist())
+
+
+def test_empty_index():
+    index = QuickSearchIndex([])
+    assert len(index) == 0
+    assert index.search('abc').tolist() == []
+    assert index.search('a').tolist() == []
@@ -0,0 +1,64 @@
+"""Сравнение plan_sync с перебором записей по ID."""
+
+from dataclasses import replace
+
+from conftest import random_control, random_controls
+
+from src.vector_db.sync import prepare_records, plan_sync
+
+
+def stored_hashes(records):
+    """Хеши записей в формате ChromaDBManager.get_stored_hashes."""
+    return {record.id: record.hashes for record in records}
+
+
+def test_plan_matches_brute_force(rng):
+    old_controls = random_controls(rng, 200)
+    new_controls = []
+    for control in old_controls:
+        action = rng.random()
+        if action < 0.1:
+            continue
+        if action < 0.2:
+            # Поле текста для эмбеддинга - нужна векторизация
+            control = replace(control, comment=control.comment + ' изм.')
+        elif action < 0.3:
+            # Поле только метаданных - векторы не меняются
+            control = replace(control, market=control.market + ' изм.')
+        new_controls.append(control)
+        if rng.random() < 0.1:
+            new_controls.append(random_control(rng))
+    
+    old_records = prepare_records(old_controls)
+    new_records = prepare_records(new_controls)
+    stored = stored_hashes(old_records)
+    old_by_id = {record.id: record for record in old_records}
+    new_by_id = {record.id: record for record in new_records}
+    
+    plan = plan_sync(new_records, stored)
+    
+    expected_embed = [record.id for record in new_records
+                      if record.id not in old_by_id or old_by_id[record.id].text != record.text]
+    expected_update = [record.id for record in new_records
+                       if record.id in old_by_id and old_by_id[record.id].text == record.text
+                       and old_by_id[record.id].metadata != record.metadata]
+    assert [record.id for record in plan.embed] == expected_embed
+    assert [record.id for record in plan.update_metadata] == expected_update
+    assert sorted(plan.delete) == sorted(set(old_by_id) - set(new_by_id))
+    assert plan.unchanged == len(new_records) - len(expected_embed) - len(expected_update)
+    
+    # После применения плана повторная синхронизация ничего не меняет
+    applied = dict(stored)
+    for record_id in plan.delete:
+        del applied[record_id]
+    applied.update(stored_hashes(plan.embed + plan.update_metadata))
+    again = plan_sync(new_records, applied)
+    assert (again.embed, again.update_metadata, again.delete) == ([], [], [])
+    assert again.unchanged == len(new_records)
+
+
+def test_records_without_hashes_are_embedded_again(rng):
+    records = prepare_records(random_controls(rng, 50))
+    plan = plan_sync(records, {record.id: ('', '') for record in records})
+    assert [record.id for record in plan.embed] == [record.id for record in records]
+    assert plan.unchanged == 0